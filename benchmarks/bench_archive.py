@@ -0,0 +1,70 @@
+"""Measure the raw-page archive: write cost, random lookups and offline re-extraction.
+
+Archives N synthetic site pages (as --archive does while crawling), reports the
+per-page write cost and compression ratio, looks up random URLs through the index,
+then replays the whole archive through the extractors (as --from-archive does) on
+one process and on every core.
+
+Usage: python benchmarks/bench_archive.py [--pages N] [--lookups N] [--path FILE]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper.archive import ArchiveReader, PageArchive, index_path, scrape_archive
+from local_site import build_graph_page
+
+HEADERS = {"Content-Type": "text/html; charset=utf-8", "Server": "bench"}
+
+def main():
+    parser = argparse.ArgumentParser(description="Page archive benchmark")
+    parser.add_argument("--pages", type=int, default=5000, help="Pages to archive")
+    parser.add_argument("--lookups", type=int, default=1000, help="Random URL lookups through the index")
+    parser.add_argument("--path", help="Archive file (default: a temporary file)")
+    args = parser.parse_args()
+
+    path = args.path or os.path.join(tempfile.mkdtemp(), "pages.warc.gz")
+    urls = [f"https://example.com/page/{n}" for n in range(args.pages)]
+    bodies = [build_graph_page(n, args.pages).encode("utf-8") for n in range(args.pages)]
+
+    archive = PageArchive(path)
+    start = time.perf_counter()
+    for url, body in zip(urls, bodies):
+        archive.write(url, 200, "OK", HEADERS, body)
+    archive.close()
+    elapsed = time.perf_counter() - start
+    raw = sum(len(body) for body in bodies)
+    size = os.path.getsize(path)
+    print(f"write:       {args.pages / elapsed:10.0f} pages/s  ({raw / 1e6:.1f} MB of pages in {size / 1e6:.1f} MB, "
+          f"index {os.path.getsize(index_path(path)) / 1e6:.1f} MB)")
+
+    reader = ArchiveReader(path)
+    sample = random.Random(0).choices(urls, k=args.lookups)
+    start = time.perf_counter()
+    for url in sample:
+        reader.get(url)
+    elapsed = time.perf_counter() - start
+    reader.close()
+    print(f"lookup:      {elapsed / args.lookups * 1e6:10.0f} us/URL")
+
+    for workers in sorted({1, os.cpu_count() or 1}):
+        start = time.perf_counter()
+        with contextlib.redirect_stderr(io.StringIO()):
+            results = scrape_archive(path, extract_workers=workers)
+        elapsed = time.perf_counter() - start
+        print(f"replay x{workers:<3d}: {len(results) / elapsed:10.0f} pages/s")
+
+    if not args.path:
+        for suffix in ("", ".idx", ".idx-wal", ".idx-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+if __name__ == "__main__":
+    main()
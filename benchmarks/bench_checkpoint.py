@@ -0,0 +1,75 @@
+"""Measure the cost of checkpointing a crawl and of resuming a large one.
+
+Records N synthetic pages (results and discovered links) in a checkpoint, as a crawl
+does, then reopens it the way --resume does: loading every known URL into the
+visited store and the frontier of the next depth to fetch.
+
+Usage: python benchmarks/bench_checkpoint.py [--urls N] [--pending F] [--path FILE]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper.checkpoint import Checkpoint
+from scraper.seen import open_seen_store
+
+def page_data(i):
+    """Results of a typical small page."""
+    return {
+        "emails": [f"team{i % 50}@example.com"],
+        "phones": [f"+1202555{i % 10000:04d}"],
+        "social": {"twitter": [f"https://twitter.com/site{i % 10}"]},
+        "metadata": {"title": f"Page {i}", "description": f"Synthetic page {i}"},
+    }
+
+def build(path, count, pending):
+    """Write a checkpoint of count URLs of which the pending fraction is still queued; return pages/s."""
+    checkpoint = Checkpoint(path)
+    fetched = int(count * (1 - pending))
+    fanout = 10
+    checkpoint.add_urls(["https://example.com/page/0"], 1)
+    start = time.perf_counter()
+    for i in range(fetched):
+        links = [f"https://example.com/page/{j}" for j in range(i * fanout + 1, i * fanout + fanout + 1) if j < count]
+        checkpoint.add_urls(links, 2)
+        checkpoint.page_done(f"https://example.com/page/{i}", page_data(i))
+    checkpoint.close()
+    return fetched / (time.perf_counter() - start)
+
+def resume(path, seen_store):
+    start = time.perf_counter()
+    checkpoint = Checkpoint(path)
+    visited = open_seen_store(seen_store)
+    for url in checkpoint.iter_urls():
+        visited.add(url)
+    depth = checkpoint.next_depth()
+    frontier = checkpoint.pending(depth)
+    elapsed = time.perf_counter() - start
+    checkpoint.close()
+    visited.close()
+    return elapsed, len(visited), len(frontier)
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkpoint benchmark")
+    parser.add_argument("--urls", type=int, default=1000000, help="URLs known to the crawl")
+    parser.add_argument("--pending", type=float, default=0.3, help="Fraction of URLs not fetched yet")
+    parser.add_argument("--seen-store", default="fingerprint", help="Visited store to load on resume")
+    parser.add_argument("--path", help="Checkpoint file (default: a temporary file)")
+    args = parser.parse_args()
+
+    path = args.path or os.path.join(tempfile.mkdtemp(), "checkpoint.sqlite")
+    rate = build(path, args.urls, args.pending)
+    print(f"checkpointing:  {rate:10.0f} pages/s  ({os.path.getsize(path) / 1e6:.0f} MB for {args.urls} URLs)")
+    elapsed, visited, frontier = resume(path, args.seen_store)
+    print(f"resume:         {elapsed:10.2f} s      ({visited} visited URLs loaded into {args.seen_store}, {frontier} queued)")
+    if not args.path:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+if __name__ == "__main__":
+    main()
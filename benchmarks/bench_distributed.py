@@ -0,0 +1,106 @@
+"""Crawl the local site graph with several worker processes sharing a work queue.
+
+Runs main.py --work-queue against a local site of --pages pages with 1, 2, 4 ...
+worker processes and reports pages/s, checking that every page was crawled and how
+many were fetched more than once. With --kill, independent workers are started on
+one queue, one of them is killed mid-crawl, and the crawl must still finish once
+its lease runs out and another worker takes its batch over.
+
+Usage: python benchmarks/bench_distributed.py [--pages N] [--workers 1,2,4] [--kill]
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from scraper.workqueue import open_work_queue
+from local_site import Site
+
+def crawl_command(site, depth, queue_path, max_workers, *options):
+    return [
+        sys.executable, os.path.join(ROOT, "main.py"),
+        "--url", f"{site.base_url}/page/0", "--recursive", "--depth", str(depth),
+        "--work-queue", queue_path, "--max-workers", str(max_workers), "--ignore-crawl-delay",
+        "--output", "file", "--format", "json", "--filename", os.path.join(os.path.dirname(queue_path), "output.json"),
+        *options
+    ]
+
+def queue_counts(queue_path):
+    """Return ((done, leased, pending) URLs, pages with results) of a work queue, or zeros before it exists."""
+    if not os.path.exists(queue_path):
+        return (0, 0, 0), 0
+    work_queue = open_work_queue("sqlite", queue_path)
+    try:
+        return work_queue.counts(), sum(1 for _ in work_queue.iter_results())
+    finally:
+        work_queue.close()
+
+def run_workers(site, depth, workers, max_workers):
+    """Crawl with main.py --workers and return (seconds, pages with results, URLs fetched more than once)."""
+    with tempfile.TemporaryDirectory() as directory:
+        queue_path = os.path.join(directory, "queue.sqlite")
+        served = site.served
+        start = time.perf_counter()
+        subprocess.run(crawl_command(site, depth, queue_path, max_workers, "--workers", str(workers)),
+                       check=True, stdout=subprocess.DEVNULL)
+        elapsed = time.perf_counter() - start
+        # Every queued URL is fetched once, including links to files the site does not serve.
+        (done, _, _), results = queue_counts(queue_path)
+        return elapsed, results, site.served - served - done
+
+def run_with_kill(site, depth, workers, max_workers, lease):
+    """Start independent --queue-only workers, kill one mid-crawl, then collect the results from a fresh process."""
+    with tempfile.TemporaryDirectory() as directory:
+        queue_path = os.path.join(directory, "queue.sqlite")
+        command = crawl_command(site, depth, queue_path, max_workers, "--lease", str(lease), "--queue-only")
+        processes = [subprocess.Popen(command, stdout=subprocess.DEVNULL) for _ in range(workers)]
+        # Kill the first worker once the crawl is under way, so it dies holding a leased batch.
+        while queue_counts(queue_path)[0][0] < 10 and processes[0].poll() is None:
+            time.sleep(0.1)
+        processes[0].send_signal(signal.SIGKILL)
+        (done, leased, pending), _ = queue_counts(queue_path)
+        print(f"killed worker {processes[0].pid} with {done} done, {leased} leased, {pending} pending")
+        start = time.perf_counter()
+        for process in processes[1:]:
+            process.wait()
+        # A worker started after the others finished only collects the results.
+        subprocess.run(crawl_command(site, depth, queue_path, max_workers, "--lease", str(lease)),
+                       check=True, stdout=subprocess.DEVNULL)
+        (done, leased, pending), results = queue_counts(queue_path)
+        print(f"finished {time.perf_counter() - start:.1f} s after the kill: {results} pages with results, {leased + pending} left")
+        return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Distributed crawl benchmark")
+    parser.add_argument("--pages", type=int, default=500, help="Pages in the local site graph")
+    parser.add_argument("--fanout", type=int, default=5, help="Child links per page in the site graph")
+    parser.add_argument("--latency", type=float, default=0.05, help="Artificial server latency per request (seconds)")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker process counts to compare")
+    parser.add_argument("--max-workers", type=int, default=5, help="Threads per worker process")
+    parser.add_argument("--kill", action="store_true", help="Also kill a worker mid-crawl and check the crawl completes")
+    parser.add_argument("--lease", type=float, default=3, help="Lease seconds for the --kill run")
+    args = parser.parse_args()
+
+    # Deep enough for the breadth-first crawl from /page/0 to reach every page.
+    depth, reached = 1, 1
+    while reached < args.pages:
+        depth += 1
+        reached = reached * args.fanout + 1
+
+    with Site(latency=args.latency, pages=args.pages, fanout=args.fanout) as site:
+        for workers in (int(count) for count in args.workers.split(",")):
+            elapsed, results, refetched = run_workers(site, depth, workers, args.max_workers)
+            status = "ok" if results == args.pages else f"MISSING {args.pages - results}"
+            print(f"{workers:3d} workers: {results / elapsed:8.1f} pages/s  ({elapsed:.1f} s, {refetched} refetched, {status})")
+        if args.kill:
+            results = run_with_kill(site, depth, max(2, int(args.workers.split(",")[-1])), args.max_workers, args.lease)
+            print("kill recovery:", "ok" if results == args.pages else f"MISSING {args.pages - results}")
+
+if __name__ == "__main__":
+    main()
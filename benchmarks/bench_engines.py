@@ -0,0 +1,47 @@
+"""Compare the thread, asyncio and pipeline crawl engines against a local HTTP server.
+
+Usage: python benchmarks/bench_engines.py [--pages N] [--latency SECONDS]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import scrape_parallel
+from scraper.async_engine import scrape_async
+from scraper.pipeline import scrape_pipeline
+from scraper.scraper import configure_fetcher
+from local_site import Site
+
+def run(name, func, urls):
+    start = time.perf_counter()
+    results = func(urls)
+    elapsed = time.perf_counter() - start
+    failed = sum(1 for data in results.values() if "error" in data)
+    print(f"{name:<28} {elapsed:6.2f} s  {len(urls) / elapsed:7.1f} pages/s  ({failed} failed)")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl engine benchmark")
+    parser.add_argument("--pages", type=int, default=200, help="Number of URLs to scrape")
+    parser.add_argument("--latency", type=float, default=0.2, help="Artificial server latency per request (seconds)")
+    parser.add_argument("--links", type=int, default=20, help="Link blocks per synthetic page")
+    parser.add_argument("--max-workers", type=int, default=5, help="Threads for the thread engine")
+    parser.add_argument("--max-in-flight", type=int, default=100, help="In-flight window for the async engine")
+    args = parser.parse_args()
+
+    configure_fetcher(max_workers=args.max_workers)
+    with Site(latency=args.latency, links=args.links) as site:
+        urls = site.urls(args.pages)
+        threaded = run(f"thread ({args.max_workers} workers)", lambda u: scrape_parallel(u, max_workers=args.max_workers), urls)
+        asynced = run(f"async ({args.max_in_flight} in flight)", lambda u: scrape_async(u, max_in_flight=args.max_in_flight), urls)
+        pipelined = run(f"pipeline ({args.max_workers} fetchers)", lambda u: scrape_pipeline(u, fetch_workers=args.max_workers), urls)
+
+    if not threaded == asynced == pipelined:
+        print("Error: engines returned different results")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Compare per-extractor parsing against a single shared parse per page.
+
+Usage: python benchmarks/bench_extractors.py [--links N] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper.extractors import (
+    ParsedDocument,
+    extract_all,
+    extract_emails,
+    extract_links,
+    extract_social_links,
+    extract_author_names,
+    extract_phone_numbers,
+    extract_images,
+    extract_metadata,
+    extract_document_links,
+    extract_tables
+)
+from scraper.streaming import extract_streaming
+
+def build_page(n_links=500):
+    """Build a synthetic page with links, images, meta tags and a table."""
+    parts = [
+        "<html><head><title>Benchmark page</title>",
+        '<meta name="author" content="Jane Doe">',
+        '<meta property="og:title" content="Benchmark">',
+        "</head><body>"
+    ]
+    for i in range(n_links):
+        parts.append(f'<p>Paragraph {i} contact user{i}@example.com</p>')
+        parts.append(f'<a href="/page/{i}">Page {i}</a>')
+        parts.append(f'<a href="https://twitter.com/user{i}">tw</a>')
+        parts.append(f'<a href="/files/report{i}.pdf">report</a>')
+        parts.append(f'<img src="/img/{i}.png">')
+    parts.append("<table><tr><th>a</th><th>b</th></tr>")
+    for i in range(n_links // 5):
+        parts.append(f"<tr><td>{i}</td><td>{i * 2}</td></tr>")
+    parts.append("</table></body></html>")
+    return "".join(parts)
+
+def separate(html):
+    return {
+        "links": extract_links(html),
+        "emails": extract_emails(html),
+        "social": extract_social_links(html),
+        "authors": extract_author_names(html),
+        "phones": extract_phone_numbers(html),
+        "images": extract_images(html),
+        "metadata": extract_metadata(html),
+        "documents": extract_document_links(html),
+        "tables": extract_tables(html)
+    }
+
+def timed(func, html, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(html)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def peak_memory(func, html):
+    tracemalloc.start()
+    func(html)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def stream(html, chunk_size=65536):
+    return extract_streaming(html[i:i + chunk_size] for i in range(0, len(html), chunk_size))
+
+def main():
+    parser = argparse.ArgumentParser(description="Extractor benchmark")
+    parser.add_argument("--links", type=int, default=500, help="Number of link blocks in the synthetic page")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timed runs (best is reported)")
+    args = parser.parse_args()
+
+    html = build_page(args.links)
+    separate_time, separate_result = timed(separate, html, args.repeat)
+    shared_time, shared_result = timed(extract_all, html, args.repeat)
+    stream_time, stream_result = timed(stream, html, args.repeat)
+
+    if separate_result != shared_result:
+        print("Error: extract_all output differs from the individual extractors")
+        sys.exit(1)
+    if stream_result != extract_all(ParsedDocument(html, "html.parser")):
+        print("Error: streaming output differs from the tree extractors")
+        sys.exit(1)
+
+    fields = ("links", "social", "authors", "images", "metadata", "documents")
+    tree_peak = peak_memory(lambda page: extract_all(page, fields=fields), html)
+    stream_peak = peak_memory(lambda page: extract_streaming(page, fields=fields), html)
+
+    print(f"Page size:          {len(html) / 1024:.1f} KiB")
+    print(f"Separate parses:    {separate_time * 1000:.1f} ms/page")
+    print(f"Shared parse:       {shared_time * 1000:.1f} ms/page")
+    print(f"Speedup:            {separate_time / shared_time:.2f}x")
+    print(f"Streaming:          {stream_time * 1000:.1f} ms/page")
+    print(f"Peak memory (tree-free fields): tree {tree_peak / 1024:.0f} KiB, streaming {stream_peak / 1024:.0f} KiB")
+
+if __name__ == "__main__":
+    main()
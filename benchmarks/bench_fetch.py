@@ -0,0 +1,132 @@
+"""Compare buffered requests .text with the streaming, size-capped fetch of Fetcher.fetch_html.
+
+A local server serves one large page in several ways: with a charset in the
+Content-Type, with only a <meta charset>, with no Content-Type at all (where
+requests runs charset detection over the whole body), as Latin-1 declaring
+nothing, and as a large PDF and an endless HTML dump that should be skipped
+without being downloaded. For each, prints the time, the bytes read and whether
+the decoded text is right.
+
+Usage: python benchmarks/bench_fetch.py [--size-kb N] [--dump-mb N] [--max-mb N]
+"""
+import argparse
+import http.server
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from scraper.scraper import Fetcher
+from corpus import build_huge_page
+
+def make_handler(page, dump_bytes):
+    utf8 = page.encode("utf-8")
+    meta = page.replace("<head>", '<head><meta charset="utf-8">', 1).encode("utf-8")
+    latin1 = page.replace("<head>", "<head><title>Café Zürich</title>", 1).encode("latin-1", errors="replace")
+    bodies = {
+        "/header": ("text/html; charset=utf-8", utf8),
+        "/meta": ("text/html", meta),
+        "/no-type": (None, utf8),
+        "/latin1": ("text/html", latin1),
+    }
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            if self.path in bodies:
+                content_type, body = bodies[self.path]
+                self.send_response(200)
+                if content_type:
+                    self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+            # /pdf declares its length; /dump streams until the client goes away.
+            content_type = "application/pdf" if self.path == "/pdf" else "text/html"
+            chunk = b"<p>" + b"x" * 65529 + b"</p>"
+            chunks = dump_bytes // len(chunk)
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            if self.path == "/pdf":
+                self.send_header("Content-Length", str(chunks * len(chunk)))
+            else:
+                self.send_header("Connection", "close")
+            self.end_headers()
+            try:
+                for _ in range(chunks):
+                    self.wfile.write(chunk)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            self.close_connection = True
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming fetch benchmark")
+    parser.add_argument("--size-kb", type=int, default=5000, help="Size of the large page")
+    parser.add_argument("--dump-mb", type=int, default=300, help="Size of the PDF and of the HTML dump")
+    parser.add_argument("--max-mb", type=float, default=50, help="Fetcher size limit")
+    args = parser.parse_args()
+
+    # Accented words make charset detection work as it would on most non-English pages.
+    page = build_huge_page(args.size_kb).replace("</p>", " Grüße aus Zürich.</p>")
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), make_handler(page, args.dump_mb * 1024 * 1024))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    expected = {
+        "/header": page,
+        "/meta": page.replace("<head>", '<head><meta charset="utf-8">', 1),
+        "/no-type": page,
+        "/latin1": page.replace("<head>", "<head><title>Café Zürich</title>", 1).encode("latin-1", errors="replace").decode("latin-1"),
+    }
+
+    session = requests.Session()
+    fetcher = Fetcher(retries=0, read_timeout=60, max_bytes=int(args.max_mb * 1024 * 1024))
+    # One untimed round over the pages, so imports and connection setup are not measured.
+    for path in expected:
+        session.get(base + path).text
+        fetcher.fetch_html(base + path)
+
+    print(f"{'path':<10} {'requests .text':>24} {'fetch_html':>24}")
+    for path in ("/header", "/meta", "/no-type", "/latin1", "/pdf", "/dump"):
+        def buffered():
+            response = session.get(base + path, timeout=120)
+            return response.text, len(response.content)
+
+        def streamed():
+            response_bytes = []
+            original = fetcher._record_response
+            fetcher._record_response = lambda url, response, started, size=None: response_bytes.append(response.raw.tell())
+            try:
+                return fetcher.fetch_html(base + path), sum(response_bytes)
+            finally:
+                fetcher._record_response = original
+
+        cells = []
+        for func in (buffered, streamed):
+            (text, size), elapsed = timed(func)
+            if path in expected:
+                status = "ok" if text == expected[path] else "wrong"
+            else:
+                status = "read" if text else "skipped"
+            cells.append(f"{elapsed * 1000:7.0f} ms {size / 1e6:7.1f} MB {status:>7}")
+        print(f"{path:<10} {cells[0]:>24} {cells[1]:>24}")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
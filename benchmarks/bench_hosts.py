@@ -0,0 +1,62 @@
+"""Compare input-order dispatch with the per-host scheduler on a URL list dominated by one host.
+
+One local site allows only a few requests in flight and answers the rest with 429
+and Retry-After; a few other sites are unthrottled. scrape_parallel runs the same
+mixed list without the scheduler (URLs in input order) and with it (per-host
+queues and concurrency caps, backoff on 429).
+
+Usage: python benchmarks/bench_hosts.py [--pages N] [--share F] [--hosts N] [--latency SECONDS]
+"""
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import scrape_parallel
+from scraper.politeness import HostScheduler
+from scraper.scraper import configure_fetcher
+from local_site import Site
+
+def mixed_urls(busy, others, pages, share):
+    """Interleave pages URLs so that share of them go to busy and the rest round-robin over others."""
+    busy_count = int(pages * share)
+    urls = busy.urls(busy_count)
+    other_urls = [site.urls(pages)[i // len(others)] for i, site in zip(range(pages - busy_count), others * pages)]
+    # The dominant host comes first, as in a list sorted by URL.
+    return urls + other_urls
+
+def run(name, urls, busy, max_workers, scheduler):
+    configure_fetcher(max_workers=max_workers, backoff=0.5, host_scheduler=scheduler)
+    throttled = busy.throttled
+    start = time.perf_counter()
+    with contextlib.redirect_stderr(open(os.devnull, "w")):
+        results = scrape_parallel(urls, max_workers=max_workers)
+    elapsed = time.perf_counter() - start
+    failed = sum(1 for data in results.values() if "error" in data)
+    print(f"{name:<24} {elapsed:6.2f} s  {(len(urls) - failed) / elapsed:7.1f} pages/s  "
+          f"{busy.throttled - throttled:5d} x 429  ({failed} failed)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-host scheduler benchmark")
+    parser.add_argument("--pages", type=int, default=200, help="Number of URLs in the list")
+    parser.add_argument("--share", type=float, default=0.8, help="Fraction of URLs on the throttled host")
+    parser.add_argument("--hosts", type=int, default=3, help="Number of unthrottled hosts")
+    parser.add_argument("--latency", type=float, default=0.05, help="Artificial server latency per request (seconds)")
+    parser.add_argument("--host-limit", type=int, default=2, help="Requests the throttled host serves concurrently")
+    parser.add_argument("--max-workers", type=int, default=8, help="Worker threads")
+    args = parser.parse_args()
+
+    sites = [Site(latency=args.latency, pages=args.pages, max_concurrent=args.host_limit)]
+    sites += [Site(latency=args.latency, pages=args.pages) for _ in range(args.hosts)]
+    with contextlib.ExitStack() as stack:
+        busy, *others = [stack.enter_context(site) for site in sites]
+        urls = mixed_urls(busy, others, args.pages, args.share)
+        run("input order", urls, busy, args.max_workers, None)
+        run(f"host scheduler ({args.host_limit}/host)", urls, busy, args.max_workers,
+            HostScheduler(max_per_host=args.host_limit, respect_crawl_delay=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Check that every parser backend gives identical extractor output, then time each one.
+
+The corpus and the check are in scraper/parser_parity.py, which tests/test_parsers.py
+runs as well.
+
+Usage: python benchmarks/bench_parsers.py [--links N] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper.extractors import ParsedDocument, available_parsers, extract_all
+from scraper.parser_parity import CORPUS, check_parity
+from bench_extractors import build_page
+
+def main():
+    parser = argparse.ArgumentParser(description="Parser backend parity check and benchmark")
+    parser.add_argument("--links", type=int, default=500, help="Number of link blocks in the synthetic page")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timed runs (best is reported)")
+    args = parser.parse_args()
+
+    parsers = available_parsers()
+    print(f"Installed backends: {', '.join(parsers)}")
+
+    mismatches = check_parity(parsers)
+    for name, field, backend in mismatches:
+        print(f"Mismatch: {backend} differs from html.parser on '{name}' ({field})")
+    if mismatches:
+        sys.exit(1)
+    print(f"Parity: {len(CORPUS)} pages identical on every backend")
+
+    html = build_page(args.links)
+    for backend in parsers:
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            extract_all(ParsedDocument(html, backend))
+            best = min(best, time.perf_counter() - start)
+        print(f"{backend:<12} {best * 1000:.1f} ms/page")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Compare the visited/dedup stores on a large synthetic URL set.
+
+Adds N distinct URLs, re-adds a sample of them, and probes URLs that were never
+added, reporting throughput, the memory each store says it holds and the false
+positive rate (non-zero only for the Bloom filter).
+
+Usage: python benchmarks/bench_seen.py [--urls N] [--error-rate P]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper.seen import SEEN_STORES, format_bytes, open_seen_store
+
+def build_urls(count):
+    """Build count distinct crawl-like URLs."""
+    return [f"https://example.com/section/{i % 1000}/page-{i}?ref=home" for i in range(count)]
+
+def measure(kind, urls, error_rate, probes=100000):
+    store = open_seen_store(kind, error_rate=error_rate)
+    start = time.perf_counter()
+    new = sum(store.add(url) for url in urls)
+    elapsed = time.perf_counter() - start
+    repeated = sum(store.add(url) for url in urls[:probes])
+    false_positives = sum(f"https://other.org/{i}" in store for i in range(probes))
+    memory = store.memory_bytes()
+    store.close()
+    return elapsed, new, repeated, false_positives / probes, memory
+
+def main():
+    parser = argparse.ArgumentParser(description="Seen store benchmark")
+    parser.add_argument("--urls", type=int, default=300000, help="Number of distinct URLs to add")
+    parser.add_argument("--error-rate", type=float, default=0.001, help="False positive rate of the bloom store")
+    args = parser.parse_args()
+
+    urls = build_urls(args.urls)
+    print(f"{'store':<12} {'adds/s':>10} {'memory':>10} {'dropped':>8} {'fp rate':>8}")
+    for kind in SEEN_STORES:
+        elapsed, new, repeated, fp_rate, memory = measure(kind, urls, args.error_rate)
+        print(f"{kind:<12} {len(urls) / elapsed:10.0f} {format_bytes(memory):>10} {len(urls) - new:8d} {fp_rate:8.4%}")
+        assert repeated == 0, f"{kind} reported a re-added URL as new"
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Measure CLI startup: the import time of main.py and the slowest modules it pulls in.
+
+Runs `python -X importtime -c "import main"` in fresh interpreters and reports the
+best cumulative import time, the heaviest imports and the wall time of
+`main.py --help`. With --max-ms it exits with status 1 when importing main.py takes
+longer, so it can gate startup regressions in CI.
+
+Usage: python benchmarks/bench_startup.py [--repeat N] [--top N] [--max-ms MS]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def import_times(code="import main"):
+    """Run code in a fresh interpreter and return {module: cumulative import microseconds}."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+def help_time():
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "main.py", "--help"], cwd=ROOT, capture_output=True, check=True)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI startup benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of fresh interpreters (best is reported)")
+    parser.add_argument("--top", type=int, default=10, help="Number of heaviest imports to list")
+    parser.add_argument("--max-ms", type=float, help="Fail if importing main.py takes longer than this")
+    args = parser.parse_args()
+
+    # Modules the bare interpreter imports at startup (site and friends) are not main.py's cost.
+    baseline = import_times("pass")
+    runs = [import_times() for _ in range(args.repeat)]
+    best = min(runs, key=lambda times: times["main"])
+    main_ms = best["main"] / 1000
+    help_ms = min(help_time() for _ in range(args.repeat)) * 1000
+
+    print(f"import main:      {main_ms:8.1f} ms")
+    print(f"main.py --help:   {help_ms:8.1f} ms (wall, including interpreter start)")
+    print("Heaviest imports (cumulative, nested modules included):")
+    heaviest = sorted(((us, name) for name, us in best.items() if name != "main" and name not in baseline), reverse=True)
+    for us, name in heaviest[:args.top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    if args.max_ms is not None and main_ms > args.max_ms:
+        print(f"FAIL: import main took {main_ms:.1f} ms, over the {args.max_ms:.1f} ms budget")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
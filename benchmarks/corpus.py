@@ -0,0 +1,85 @@
+"""Generated HTML corpus for benchmarks: small, huge, table-heavy, script-heavy and link-dense pages.
+
+Every page is built from a fixed seed, so the same corpus is produced on every run
+and results from different commits can be compared.
+"""
+import random
+
+from bench_extractors import build_page
+from bench_phones import build_script_heavy_page
+
+WORDS = (
+    "data page scraper contact team market report service product support policy "
+    "research customer office annual update project network design quality global"
+).split()
+
+def build_small_page(seed=0):
+    """Build a typical small page: a header, a short article, a few links and a footer."""
+    rng = random.Random(seed)
+    paragraphs = "".join(
+        f"<p>{' '.join(rng.choice(WORDS) for _ in range(40))}</p>" for _ in range(5)
+    )
+    return "".join([
+        "<html><head><title>About us</title>",
+        '<meta name="description" content="About the company">',
+        '<meta name="author" content="Jane Doe">',
+        "</head><body>",
+        '<nav><a href="/">Home</a> <a href="/products">Products</a> <a href="/contact">Contact</a></nav>',
+        f"<article><h1>About us</h1>{paragraphs}</article>",
+        '<img src="/img/logo.png" alt="logo">',
+        "<footer>Email info@example.com or call (202) 555-0143. ",
+        '<a href="https://twitter.com/example">Twitter</a> <a href="/files/brochure.pdf">Brochure</a></footer>',
+        "</body></html>"
+    ])
+
+def build_huge_page(size_kb=5000, seed=0):
+    """Build a long text page of about size_kb KiB with a sprinkling of emails, phones and links."""
+    rng = random.Random(seed)
+    parts = ["<html><head><title>Archive</title></head><body>"]
+    size = 0
+    i = 0
+    while size < size_kb * 1024:
+        text = " ".join(rng.choice(WORDS) for _ in range(120))
+        if i % 25 == 0:
+            text += f" Write to editor{i}@example.org or call +1 312 555 {i % 10000:04d}."
+        if i % 10 == 0:
+            text += f' <a href="/archive/{i}">More</a>'
+        part = f"<p>{text}</p>"
+        parts.append(part)
+        size += len(part)
+        i += 1
+    parts.append("</body></html>")
+    return "".join(parts)
+
+def build_table_page(tables=5, rows=1000, columns=6, seed=0):
+    """Build a page of numeric and text tables, one with a stacked header and spanning cells."""
+    rng = random.Random(seed)
+    parts = ["<html><head><title>Statistics</title></head><body>"]
+    for t in range(tables):
+        parts.append("<table>")
+        if t == 0:
+            parts.append(f'<thead><tr><th rowspan="2">name</th><th colspan="{columns - 1}">values</th></tr><tr>')
+            parts.append("".join(f"<th>v{c}</th>" for c in range(1, columns)))
+            parts.append("</tr></thead>")
+        else:
+            parts.append("<tr>" + "".join(f"<th>col{c}</th>" for c in range(columns)) + "</tr>")
+        parts.append("<tbody>")
+        for r in range(rows):
+            cells = [f"<td>{rng.choice(WORDS)} {r}</td>"]
+            for c in range(1, columns):
+                value = rng.randint(0, 100000) if c % 2 else rng.random() * 1000
+                cells.append(f"<td>{value:.2f}</td>" if isinstance(value, float) else f"<td>{value}</td>")
+            parts.append("<tr>" + "".join(cells) + "</tr>")
+        parts.append("</tbody></table>")
+    parts.append("</body></html>")
+    return "".join(parts)
+
+def build_corpus(scale=1.0):
+    """Return {name: html} for every corpus page; scale shrinks or grows the large pages."""
+    return {
+        "small": build_small_page(),
+        "huge": build_huge_page(int(5000 * scale)),
+        "table_heavy": build_table_page(rows=int(1000 * scale)),
+        "script_heavy": build_script_heavy_page(int(500 * scale)),
+        "link_dense": build_page(int(2000 * scale)),
+    }
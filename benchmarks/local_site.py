@@ -0,0 +1,137 @@
+"""Local threaded HTTP server serving a synthetic site for benchmarks.
+
+Every path /page/<n> returns a generated page after an optional artificial latency,
+so crawl engines can be compared offline. By default every page has the same body;
+with pages=N the site is a graph of N pages where page n links to its fanout
+children (n * fanout + 1 ...), back to the home page and to a few pseudo-random
+pages, so a breadth-first crawl from /page/0 reaches every page and also meets
+links it has already visited. With max_concurrent, requests beyond that many in
+flight are answered 429 with Retry-After, like a rate-limited origin.
+"""
+import http.server
+import random
+import threading
+import time
+
+from bench_extractors import build_page
+
+def build_graph_page(n, pages, fanout=5, cross_links=3):
+    """Build page n of a pages-page site graph."""
+    rng = random.Random(n)
+    targets = [child for child in range(n * fanout + 1, n * fanout + fanout + 1) if child < pages]
+    targets += [0] + [rng.randrange(pages) for _ in range(cross_links)]
+    links = "".join(f'<li><a href="/page/{target}">Page {target}</a></li>' for target in targets)
+    return "".join([
+        f"<html><head><title>Page {n}</title>",
+        f'<meta name="description" content="Synthetic page {n}">',
+        "</head><body>",
+        f"<h1>Page {n}</h1>",
+        f"<p>Contact team{n % 50}@example.com or call (202) 555-{n % 10000:04d}.</p>",
+        f'<img src="/img/{n % 20}.png"> <a href="https://twitter.com/site{n % 10}">tw</a>',
+        f'<a href="/files/report{n}.pdf">report</a>',
+        f"<ul>{links}</ul>",
+        "<table><tr><th>id</th><th>value</th></tr>",
+        "".join(f"<tr><td>{i}</td><td>{n * i}</td></tr>" for i in range(10)),
+        "</table></body></html>"
+    ])
+
+class SiteHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+    body = b""
+    pages = None
+    fanout = 5
+    max_concurrent = None
+    state = None
+
+    def _body(self):
+        if self.pages is None:
+            return self.body
+        prefix, _, number = self.path.partition("?")[0].rpartition("/")
+        if prefix != "/page" or not number.isdigit() or int(number) >= self.pages:
+            return None
+        return build_graph_page(int(number), self.pages, self.fanout).encode("utf-8")
+
+    def do_GET(self):
+        if self.max_concurrent is None:
+            self._respond()
+            return
+        with self.state["lock"]:
+            throttled = self.state["active"] >= self.max_concurrent
+            if throttled:
+                self.state["throttled"] += 1
+            else:
+                self.state["active"] += 1
+        if throttled:
+            self.send_response(429)
+            self.send_header("Retry-After", "1")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        try:
+            self._respond()
+        finally:
+            with self.state["lock"]:
+                self.state["active"] -= 1
+
+    def _respond(self):
+        if self.latency:
+            time.sleep(self.latency)
+        with self.state["lock"]:
+            self.state["served"] += 1
+        body = self._body()
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class Site:
+    """Run the synthetic site in a background thread; use as a context manager."""
+
+    def __init__(self, latency=0.05, links=50, pages=None, fanout=5, max_concurrent=None):
+        self.state = {"lock": threading.Lock(), "active": 0, "throttled": 0, "served": 0}
+        handler = type("Handler", (SiteHandler,), {
+            "latency": latency,
+            "body": build_page(links).encode("utf-8") if pages is None else b"",
+            "pages": pages,
+            "fanout": fanout,
+            "max_concurrent": max_concurrent,
+            "state": self.state
+        })
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def urls(self, count):
+        return [f"{self.base_url}/page/{i}" for i in range(count)]
+
+    @property
+    def throttled(self):
+        """Number of requests answered 429 so far."""
+        return self.state["throttled"]
+
+    @property
+    def served(self):
+        """Number of requests answered (not throttled) so far."""
+        return self.state["served"]
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
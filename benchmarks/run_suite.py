@@ -0,0 +1,263 @@
+"""Reproducible offline benchmark suite with JSON results that can be compared between commits.
+
+Measures, against a generated corpus (benchmarks/corpus.py) and a local site graph
+(benchmarks/local_site.py), so no network access is needed:
+
+- extractors: throughput of parsing and of every extractor on each corpus page,
+  each extractor running on an already parsed page, plus extract_all and streaming
+- engines: end-to-end pages/sec of scrape_parallel over a URL list and of
+  scrape_recursive crawling the site graph from its home page
+- outputs: the cost of save_to_file for every --format and of every incremental
+  page writer on the same scraped pages (formats whose dependency is missing are skipped)
+
+Every metric is the best of --repeat runs. Results are written to --output with the
+git commit they were measured on; --compare prints the change against an earlier file.
+
+Usage: python benchmarks/run_suite.py [--output FILE] [--compare FILE] [--quick]
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from scraper.extractors import (
+    ParsedDocument,
+    _match_phones,
+    extract_all,
+    extract_emails,
+    extract_links,
+    extract_social_links,
+    extract_author_names,
+    extract_phone_numbers,
+    extract_images,
+    extract_metadata,
+    extract_document_links,
+    extract_tables
+)
+from scraper.output import PAGE_WRITERS, open_page_writer, save_to_file
+from scraper.streaming import extract_streaming
+from corpus import build_corpus
+from local_site import Site, build_graph_page
+
+EXTRACTORS = {
+    "links": extract_links,
+    "emails": extract_emails,
+    "social": extract_social_links,
+    "authors": extract_author_names,
+    "phones": extract_phone_numbers,
+    "images": extract_images,
+    "metadata": extract_metadata,
+    "documents": extract_document_links,
+    "tables": extract_tables,
+}
+
+SAVE_FORMATS = ("txt", "json", "csv", "md", "xlsx", "sqlite", "parquet")
+
+# Optional modules each output format needs.
+FORMAT_DEPENDENCIES = {"xlsx": ("pandas", "openpyxl"), "parquet": ("pyarrow",)}
+
+# Units where a larger value is better; for every other unit smaller is better.
+HIGHER_IS_BETTER = ("MB/s", "pages/s")
+
+def best_time(func, repeat, setup=None):
+    """Return the shortest wall time of func() over repeat runs, calling setup() untimed before each."""
+    best = float("inf")
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+@contextlib.contextmanager
+def quiet():
+    """Silence the progress output of the scraping functions while they are timed."""
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        yield
+
+def git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT, capture_output=True, text=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip() + ("-dirty" if dirty.strip() else "")
+
+def bench_extractors(corpus, repeat):
+    results = {}
+    for page, html in corpus.items():
+        mb = len(html.encode("utf-8")) / 1e6
+        soup = ParsedDocument(html).soup
+        current = {}
+
+        def fresh():
+            # A parsed page without cached hrefs, so every extractor pays for its own walk.
+            current["doc"] = ParsedDocument(html)
+            current["doc"]._soup = soup
+            _match_phones.cache_clear()
+
+        timings = {"parse": best_time(lambda: ParsedDocument(html).soup, repeat)}
+        for name, extractor in EXTRACTORS.items():
+            timings[name] = best_time(lambda: extractor(current["doc"]), repeat, fresh)
+        timings["extract_all"] = best_time(lambda: extract_all(html), repeat, _match_phones.cache_clear)
+        chunks = lambda: (html[i:i + 65536] for i in range(0, len(html), 65536))
+        timings["streaming"] = best_time(lambda: extract_streaming(chunks()), repeat, _match_phones.cache_clear)
+
+        for name, elapsed in timings.items():
+            results[f"{page}/{name}"] = {"value": mb / elapsed, "unit": "MB/s", "seconds": elapsed}
+    return results
+
+def bench_engines(pages, latency, workers, fanout, repeat):
+    import main
+    from scraper.scraper import configure_fetcher
+
+    configure_fetcher(max_workers=workers)
+    results = {}
+    with Site(latency=latency, pages=pages, fanout=fanout) as site:
+        urls = site.urls(pages)
+        with quiet():
+            elapsed = best_time(lambda: main.scrape_parallel(urls, max_workers=workers), repeat)
+        results["scrape_parallel"] = {"value": pages / elapsed, "unit": "pages/s", "seconds": elapsed}
+
+        # Deep enough for the breadth-first crawl from /page/0 to reach every page.
+        depth, reached = 1, 1
+        while reached < pages:
+            depth += 1
+            reached = reached * fanout + 1
+        crawled = []
+        with quiet():
+            elapsed = best_time(
+                lambda: main.scrape_recursive(f"{site.base_url}/page/0", max_depth=depth, max_workers=workers,
+                                              on_result=lambda url, data: crawled.append(url)),
+                repeat, crawled.clear
+            )
+        results["scrape_recursive"] = {"value": len(crawled) / elapsed, "unit": "pages/s", "seconds": elapsed, "pages": len(crawled)}
+    return results
+
+def format_available(format):
+    return all(importlib.util.find_spec(module) for module in FORMAT_DEPENDENCIES.get(format, ()))
+
+def crawl_summary(scraped):
+    """Merge scraped pages into one result the way a recursive crawl reports them."""
+    summary = {"url": next(iter(scraped)), "depth": 1}
+    pages = list(scraped.values())
+    for key in ("links", "emails", "authors", "phones", "images", "documents"):
+        summary[key] = list(dict.fromkeys(value for data in pages for value in data[key]))
+    summary["social"] = {
+        platform: list(dict.fromkeys(link for data in pages for link in data["social"][platform]))
+        for platform in pages[0]["social"]
+    }
+    summary["metadata"] = pages[0]["metadata"]
+    summary["tables"] = [table for data in pages for table in data["tables"]]
+    return summary
+
+def bench_outputs(pages, repeat):
+    scraped = {f"https://example.com/page/{n}": extract_all(build_graph_page(n, pages)) for n in range(pages)}
+    summary = crawl_summary(scraped)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        def remove(filename):
+            return lambda: os.path.exists(filename) and os.remove(filename)
+
+        for format in SAVE_FORMATS:
+            if not format_available(format):
+                print(f"[I] Skipping {format}: dependency not installed")
+                continue
+            filename = os.path.join(directory, f"save.{format}")
+            with quiet():
+                elapsed = best_time(lambda: save_to_file(summary, filename, format), repeat, remove(filename))
+            results[f"save/{format}"] = {"value": elapsed * 1000, "unit": "ms", "pages": pages}
+
+        for format in PAGE_WRITERS:
+            if not format_available(format):
+                continue
+            filename = os.path.join(directory, f"stream.{format}")
+
+            def write():
+                with open_page_writer(filename, format) as writer:
+                    for url, data in scraped.items():
+                        writer.write_page(url, data)
+
+            elapsed = best_time(write, repeat, remove(filename))
+            results[f"writer/{format}"] = {"value": elapsed * 1000, "unit": "ms", "pages": pages}
+    return results
+
+def compare(old, new):
+    """Print every metric present in both result files with its relative change."""
+    print(f"\nCompared with {old['meta'].get('commit') or 'baseline'}:")
+    print(f"{'metric':<44} {'before':>12} {'after':>12} {'change':>8}")
+    for section, metrics in new["results"].items():
+        for name, metric in metrics.items():
+            before = old["results"].get(section, {}).get(name)
+            if not before or not before["value"] or before["unit"] != metric["unit"]:
+                continue
+            change = metric["value"] / before["value"] - 1
+            better = change > 0 if metric["unit"] in HIGHER_IS_BETTER else change < 0
+            flag = "" if abs(change) < 0.05 else (" +" if better else " -")
+            print(f"{section + '/' + name:<44} {before['value']:12.2f} {metric['value']:12.2f} {change:8.1%}{flag}")
+
+def print_section(section, metrics):
+    print(f"\n{section}:")
+    for name, metric in metrics.items():
+        print(f"  {name:<40} {metric['value']:12.2f} {metric['unit']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON file to write the results to")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    parser.add_argument("--only", choices=["extractors", "engines", "outputs"], action="append", help="Run only these sections")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is reported)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Size factor for the large corpus pages")
+    parser.add_argument("--pages", type=int, default=200, help="Pages in the local site graph")
+    parser.add_argument("--fanout", type=int, default=5, help="Child links per page in the site graph")
+    parser.add_argument("--latency", type=float, default=0.02, help="Artificial server latency per request (seconds)")
+    parser.add_argument("--max-workers", type=int, default=5, help="Threads for scrape_parallel and scrape_recursive")
+    parser.add_argument("--quick", action="store_true", help="Small corpus, site and repeat count for a fast smoke run")
+    args = parser.parse_args()
+
+    if args.quick:
+        args.repeat, args.scale, args.pages = 1, 0.1, 50
+    sections = args.only or ["extractors", "engines", "outputs"]
+
+    results = {}
+    if "extractors" in sections:
+        results["extractors"] = bench_extractors(build_corpus(args.scale), args.repeat)
+        print_section("extractors", results["extractors"])
+    if "engines" in sections:
+        results["engines"] = bench_engines(args.pages, args.latency, args.max_workers, args.fanout, args.repeat)
+        print_section("engines", results["engines"])
+    if "outputs" in sections:
+        results["outputs"] = bench_outputs(args.pages, args.repeat)
+        print_section("outputs", results["outputs"])
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,3 @@
-import subprocess
-import sys
 import queue
 import argparse
 import re
@@ -7,22 +5,25 @@ import time
 import threading
 import json
 import os
+import sys
+from collections import Counter
 
 from scraper.extractors import (
-    extract_emails, 
-    extract_links, 
-    extract_social_links, 
-    extract_author_names, 
-    extract_phone_numbers, 
-    extract_images, 
-    extract_metadata, 
-    extract_document_links, 
-    extract_tables
+    FIELDS,
+    LazyResult,
+    extract_all,
+    parse_fields,
+    set_parser,
+    get_parser,
+    set_phone_mode,
+    get_phone_mode
 )
 
 from scraper.output import (
     print_to_terminal, 
-    save_to_file
+    save_to_file,
+    open_page_writer,
+    PAGE_WRITERS
 )
 
 from concurrent.futures import (
@@ -30,192 +31,560 @@ from concurrent.futures import (
     as_completed
 )
 
-from scraper.scraper import fetch_html
-from tqdm import tqdm
-
-REQUIRED_PACKAGES = [
-    "beautifulsoup4", 
-    "requests", 
-    "colorama", 
-    "phonenumbers", 
-    "tqdm",
-    "pandas",
-    "openpyxl",
-    "schedule",
-    "whois",
-    "dnspython",
-    "textblob",
-    "langdetect"
-]
+# Network clients, engines and optional formats are imported where they are used,
+# so --help, --query and argument errors start without loading them.
+from scraper.streaming import extract_streaming
+from scraper.urls import is_same_site, normalize_url, url_host
+from scraper.history import open_history
+from scraper.filters import DataFilter
+from scraper.metrics import configure_metrics, get_metrics, run_profiled, serve_metrics, timed
+from scraper.seen import SEEN_STORES, UniqueValues, format_bytes, open_seen_store
+from scraper.store import QUERY_KINDS, ResultStore
 
 DOWNLOAD_IMAGES = False
+STREAMING = False
+SELECTED_FIELDS = None
+
+FIELD_LABELS = {
+    "links": "links",
+    "emails": "emails",
+    "social": "social links",
+    "authors": "author names",
+    "phones": "phone numbers",
+    "images": "images",
+    "metadata": "metadata",
+    "documents": "documents",
+    "tables": "tables",
+}
+
+def scrape_page(url, country="US", fields=None):
+    """Fetch a URL and extract the selected fields, streaming the body through the extractor when enabled.
+
+    With a response cache, results extracted from an unchanged (304 or fresh) body are reused.
+    """
+    from requests.exceptions import RequestException
+    from scraper.scraper import get_fetcher, fetch_html, fetch_html_chunks
+
+    fields = fields or SELECTED_FIELDS or FIELDS
+    cache = get_fetcher().cache
+    cache_key = f"{country}|{get_parser()}|{get_phone_mode()}|{DOWNLOAD_IMAGES}|{','.join(fields)}"
 
-def install_missing_packages():
-    """Check and install missing packages."""
-    for package in REQUIRED_PACKAGES:
+    if STREAMING:
+        chunks = fetch_html_chunks(url)
+        if chunks is None:
+            return None
+        if cache:
+            cached = cache.get_extracted(url, cache_key)
+            if cached is not None:
+                return cached
         try:
-            __import__(package if package != "beautifulsoup4" else "bs4")
-        except ImportError:
-            print(f"[I] Installing missing package: {package}")
-            subprocess.check_call([sys.executable, "-m", "pip", "install", package])
+            data = extract_streaming(chunks, fields, country, DOWNLOAD_IMAGES, base_url=url)
+        except RequestException as e:
+            print(f"Error fetching {url}: {e}")
+            return None
+    else:
+        html = fetch_html(url)
+        if not html:
+            return None
+        if cache:
+            cached = cache.get_extracted(url, cache_key)
+            if cached is not None:
+                return cached
+        data = extract_all(html, fields, country, DOWNLOAD_IMAGES, base_url=url)
 
-install_missing_packages()
+    if cache:
+        cache.put_extracted(url, cache_key, data)
+    return data
 
-def scrape_recursive(url, depth=1, max_depth=1, visited=None, country="US", accumulated_data=None):
-    """Recursively scrape a website up to specified depth with deduplication."""
-    if visited is None:
-        visited = set()
-    
-    if accumulated_data is None:
-        accumulated_data = {
-            "links": set(),
-            "emails": set(),
-            "social": {},
-            "authors": set(),
-            "phones": set(),
-            "images": set(),
-            "metadata": {},
-            "documents": set(),
-            "tables": []
-        }
+def scrape_recursive(url, max_depth=1, country="US", max_workers=5, max_pages_per_depth=None, max_pages_per_host=None,
+                     on_result=None, seen_store="set", seen_path=None, seen_error_rate=0.001, checkpoint=None):
+    """Crawl a website breadth-first up to max_depth, fetching each depth level concurrently.
 
-    if url in visited or depth > max_depth:
-        return accumulated_data
-    
-    visited.add(url)
-    print(f"Scraping: {url} Depth: {depth}")
+    With on_result, each page is handed to it as soon as it is scraped instead of being merged into the result.
+    Visited URLs are remembered in a seen store of kind seen_store ("set", "fingerprint",
+    "bloom" or "sqlite"), which bounds memory on very large crawls; merged values are
+    deduplicated exactly.
+    With a Checkpoint, the frontier, visited URLs and page results are saved as the crawl
+    goes; a checkpoint from an interrupted crawl continues it without refetching finished
+    pages, whose results are merged (or handed to on_result) at the end.
+    """
+    from scraper.scraper import get_fetcher
 
-    html = fetch_html(url)
-    if not html: 
-        return accumulated_data
-    
-    page_data = {
-        "links": set(extract_links(html)), 
-        "emails": set(extract_emails(html)), 
-        "social": extract_social_links(html), 
-        "authors": set(extract_author_names(html)), 
-        "phones": set(extract_phone_numbers(html, country)),
-        "images": set(extract_images(html, download=DOWNLOAD_IMAGES)), 
-        "metadata": extract_metadata(html), 
-        "documents": set(extract_document_links(html)),
-        "tables": extract_tables(html)
+    root = normalize_url(url)
+    if root is None:
+        print(f"Error: Cannot crawl {url}")
+        return None
+
+    visited = open_seen_store(seen_store, seen_path, "visited", seen_error_rate)
+    host_pages = Counter()
+    if checkpoint is not None and checkpoint.resumed:
+        for known_url in checkpoint.iter_urls():
+            visited.add(known_url)
+            host_pages[url_host(known_url)] += 1
+        depth = checkpoint.next_depth() or max_depth + 1
+        frontier = checkpoint.pending(depth)
+        fetched, pending = checkpoint.counts()
+        print(f"[I] Resuming crawl: {fetched} pages fetched, {pending} queued")
+    else:
+        visited.add(root)
+        host_pages[url_host(root)] += 1
+        depth = 1
+        frontier = [root]
+        if checkpoint is not None:
+            checkpoint.add_urls(frontier, depth)
+    fields = SELECTED_FIELDS or FIELDS
+    # Links are always needed to find the next level, even when they are not reported.
+    crawl_fields = fields if "links" in fields or max_depth <= 1 else fields + ("links",)
+    merged_values = []
+    accumulated_data = {"social": {}, "metadata": {}, "tables": []}
+    for key in ("links", "emails", "authors", "phones", "images", "documents"):
+        if key in fields and on_result is None:
+            accumulated_data[key] = UniqueValues()
+            merged_values.append(accumulated_data[key])
+        else:
+            accumulated_data[key] = set()
+
+    def fetch(page_url, depth):
+        print(f"Scraping: {page_url} Depth: {depth}")
+        page_data = scrape_page(page_url, country, crawl_fields)
+        if page_data and crawl_fields is not fields:
+            links = page_data.pop("links")
+            return page_data, links
+        return page_data, page_data and page_data.get("links")
+
+    scheduler = get_fetcher().host_scheduler
+    # The host scheduler runs its own workers, so the pool is only needed without one.
+    executor = ThreadPoolExecutor(max_workers=max_workers) if scheduler is None else None
+    try:
+        while frontier and depth <= max_depth:
+            if scheduler is not None:
+                level = depth
+                done = {url: future.result() for url, future in scheduler.map(lambda url: fetch(url, level), frontier, max_workers)}
+                pages = (done[url] for url in frontier)
+            else:
+                pages = executor.map(fetch, frontier, [depth] * len(frontier))
+            # Links found before an interruption are already queued for the next level.
+            next_frontier = checkpoint.pending(depth + 1) if checkpoint is not None and depth < max_depth else []
+
+            for page_url, (page_data, links) in zip(frontier, pages):
+                if not page_data:
+                    if checkpoint is not None:
+                        checkpoint.page_done(page_url, None)
+                    continue
+
+                if on_result is not None:
+                    on_result(page_url, page_data)
+                else:
+                    accumulate_page(accumulated_data, page_data)
+
+                if depth == max_depth:
+                    if checkpoint is not None:
+                        checkpoint.page_done(page_url, page_data)
+                    continue
+
+                found = len(next_frontier)
+                for link in links:
+                    if max_pages_per_depth and len(next_frontier) >= max_pages_per_depth:
+                        break
+                    link = normalize_url(link, page_url)
+                    if link is None or link in visited or not is_same_site(link, root):
+                        continue
+                    host = url_host(link)
+                    if max_pages_per_host and host_pages[host] >= max_pages_per_host:
+                        continue
+                    visited.add(link)
+                    host_pages[host] += 1
+                    next_frontier.append(link)
+
+                if checkpoint is not None:
+                    # The page and the links it added are committed together.
+                    checkpoint.add_urls(next_frontier[found:], depth + 1)
+                    checkpoint.page_done(page_url, page_data)
+
+            frontier = next_frontier
+            depth += 1
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    if checkpoint is not None:
+        for page_url, page_data in checkpoint.iter_results(before_session=checkpoint.session):
+            if on_result is not None:
+                on_result(page_url, page_data)
+            else:
+                accumulate_page(accumulated_data, page_data)
+
+    value_count = sum(len(values) for values in merged_values)
+    value_bytes = sum(values.memory_bytes() for values in merged_values)
+    print(
+        f"[I] Seen stores ({seen_store}): {len(visited)} visited URLs in {format_bytes(visited.memory_bytes())}, "
+        f"{value_count} unique values in {format_bytes(value_bytes)}"
+    )
+    if scheduler is not None:
+        print(f"[I] Host scheduler: {scheduler.summary()}")
+    visited.close()
+    return crawl_result(url, accumulated_data, fields)
+
+def crawl_result(url, accumulated_data, fields):
+    """Build the result of a crawl from url out of its accumulated data, keeping the selected fields."""
+    result = {
+        "url": url,
+        "depth": 1,
+        "links": list(accumulated_data["links"]),
+        "emails": list(accumulated_data["emails"]),
+        "social": {platform: list(links) for platform, links in accumulated_data["social"].items()},
+        "authors": list(accumulated_data["authors"]),
+        "phones": list(accumulated_data["phones"]),
+        "images": list(accumulated_data["images"]),
+        "metadata": accumulated_data["metadata"],
+        "documents": list(accumulated_data["documents"]),
+        "tables": accumulated_data["tables"]
     }
-    
-    accumulated_data["links"].update(page_data["links"])
-    accumulated_data["emails"].update(page_data["emails"])
-    accumulated_data["authors"].update(page_data["authors"])
-    accumulated_data["phones"].update(page_data["phones"])
-    accumulated_data["images"].update(page_data["images"])
-    accumulated_data["documents"].update(page_data["documents"])
-    
-    for platform, links in page_data["social"].items():
-        if platform not in accumulated_data["social"]:
-            accumulated_data["social"][platform] = set()
-        accumulated_data["social"][platform].update(links)
-    
-    if not accumulated_data["metadata"] and page_data["metadata"]:
+    return {key: value for key, value in result.items() if key in ("url", "depth") or key in fields}
+
+
+def accumulate_page(accumulated_data, page_data):
+    """Merge one page's results into the crawl-wide sets; fields the page lacks are skipped."""
+    for key in ("links", "emails", "authors", "phones", "images", "documents"):
+        accumulated_data[key].update(page_data.get(key, ()))
+
+    for platform, links in page_data.get("social", {}).items():
+        accumulated_data["social"].setdefault(platform, set()).update(links)
+
+    if not accumulated_data["metadata"] and page_data.get("metadata"):
         accumulated_data["metadata"] = page_data["metadata"]
-    
-    accumulated_data["tables"].extend(page_data["tables"])
 
-    if depth < max_depth:
-        internal_links = [
-            link for link in page_data["links"]
-            if link.startswith('/') or url.split('/')[2] in link
-        ]
+    accumulated_data["tables"].extend(page_data.get("tables", ()))
 
-        for link in internal_links:
-            if link.startswith('/'):
-                base_url = '/'.join(url.split('/')[:3])
-                link = base_url + link
+def scrape_distributed(work_queue, urls, recursive=False, max_depth=1, country="US", max_workers=5, batch_size=None,
+                       lease=300.0, on_result=None, collect=True, poll_interval=1.0):
+    """Work on a crawl shared through a WorkQueue with any number of other worker processes.
 
-            accumulated_data = scrape_recursive(link, depth + 1, max_depth, visited, country, accumulated_data)
-    
-    if depth == 1:
-        result = {
-            "url": url,
-            "depth": depth,
-            "links": list(accumulated_data["links"]),
-            "emails": list(accumulated_data["emails"]),
-            "social": {platform: list(links) for platform, links in accumulated_data["social"].items()},
-            "authors": list(accumulated_data["authors"]),
-            "phones": list(accumulated_data["phones"]),
-            "images": list(accumulated_data["images"]),
-            "metadata": accumulated_data["metadata"],
-            "documents": list(accumulated_data["documents"]),
-            "tables": accumulated_data["tables"]
-        }
-        return result
-    
-    return accumulated_data
+    The URLs (the crawl root if recursive) seed the queue; seeding a queue that already
+    holds them does nothing, so every worker is started the same way and none of them
+    coordinates the others. The worker claims batches of batch_size URLs (default: twice
+    max_workers) for lease seconds, scrapes them on max_workers threads and completes
+    them with the same-site links they found, until every queued URL is done. A
+    background thread renews the worker's leases every third of lease, so a batch
+    that takes longer than lease stays with it; a lease only runs out when its
+    worker process has died. With
+    collect, the results of the whole crawl are then read back from the queue, merged
+    as scrape_recursive merges them if recursive and as {url: data} otherwise, or
+    handed to on_result page by page. Returns None without collect.
+    """
+    import socket
+    from scraper.scraper import get_fetcher
+
+    if recursive:
+        root = normalize_url(urls[0])
+        if root is None:
+            print(f"Error: Cannot crawl {urls[0]}")
+            return None
+        work_queue.add_urls([root], 1)
+    else:
+        max_depth = 1
+        work_queue.add_urls(urls, 1)
 
+    fields = SELECTED_FIELDS or FIELDS
+    crawl_fields = fields if "links" in fields or max_depth <= 1 else fields + ("links",)
+    batch_size = batch_size or 2 * max_workers
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+
+    def fetch(page_url, depth):
+        print(f"Scraping: {page_url} Depth: {depth}")
+        if not recursive:
+            return fetch_and_extract(page_url, country), None
+        page_data = scrape_page(page_url, country, crawl_fields)
+        if page_data and crawl_fields is not fields:
+            return page_data, page_data.pop("links")
+        return page_data, page_data and page_data.get("links")
+
+    scheduler = get_fetcher().host_scheduler
+    recorded = 0
+    stop_renewing = threading.Event()
+
+    def renew_leases():
+        while not stop_renewing.wait(lease / 3):
+            work_queue.renew(worker, lease)
+
+    renewer = threading.Thread(target=renew_leases, daemon=True)
+    # The host scheduler runs its own workers, so the pool is only needed without one.
+    executor = ThreadPoolExecutor(max_workers=max_workers) if scheduler is None else None
+    renewer.start()
+    try:
+        while True:
+            batch = work_queue.claim(worker, batch_size, lease)
+            if not batch:
+                if work_queue.finished():
+                    break
+                # Other workers hold the remaining URLs and may still find links.
+                time.sleep(poll_interval)
+                continue
+
+            depths = dict(batch)
+            if scheduler is not None:
+                done = {url: future.result() for url, future in scheduler.map(lambda url: fetch(url, depths[url]), depths, max_workers)}
+                pages = (done[url] for url in depths)
+            else:
+                pages = executor.map(fetch, depths, depths.values())
+
+            completed = []
+            for (page_url, depth), (page_data, links) in zip(batch, pages):
+                found = []
+                if page_data and links and depth < max_depth:
+                    for link in links:
+                        link = normalize_url(link, page_url)
+                        if link is not None and is_same_site(link, root):
+                            found.append(link)
+                completed.append((page_url, page_data, found, depth + 1))
+            recorded += work_queue.complete(worker, completed)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        stop_renewing.set()
+        renewer.join()
+        # URLs still leased after an interruption go straight back to the other workers.
+        work_queue.release(worker)
+
+    total, _, _ = work_queue.counts()
+    print(f"[I] Worker {worker}: {recorded} of {total} pages in the work queue")
+    if scheduler is not None:
+        print(f"[I] Host scheduler: {scheduler.summary()}")
+    if not collect:
+        return None
+
+    if not recursive:
+        results = {}
+        for page_url, page_data in work_queue.iter_results():
+            if on_result is not None:
+                on_result(page_url, page_data)
+            else:
+                results[page_url] = page_data
+        return results
+
+    accumulated_data = {"social": {}, "metadata": {}, "tables": []}
+    for key in ("links", "emails", "authors", "phones", "images", "documents"):
+        accumulated_data[key] = set()
+    for page_url, page_data in work_queue.iter_results():
+        if on_result is not None:
+            on_result(page_url, page_data)
+        else:
+            accumulate_page(accumulated_data, page_data)
+    return crawl_result(urls[0], accumulated_data, fields)
+
+def replay_archive(args, on_result=None):
+    """Extract the pages of the --from-archive archive instead of fetching them.
+
+    The result has the shape the same options give when fetching: {url: data} for
+    --urls (or the whole archive without --url), the page's data for --url, and for
+    --url --recursive the merged crawl of the archived pages a live crawl would reach,
+    within --depth, --max-pages-per-depth and --max-pages-per-host.
+    """
+    from scraper.archive import scrape_archive
+
+    options = {
+        "country": args.country,
+        "extract_workers": args.extract_workers,
+        "download_images": DOWNLOAD_IMAGES,
+        "fields": SELECTED_FIELDS,
+    }
+    if args.urls or not args.url:
+        return scrape_archive(args.from_archive, args.urls, on_result=on_result, **options)
+
+    if not args.recursive:
+        page_data = scrape_archive(args.from_archive, [args.url], **options)[args.url]
+        if "error" in page_data:
+            return None
+        page_data.pop("url", None)
+        return page_data
+
+    root = normalize_url(args.url)
+    if root is None:
+        print(f"Error: Cannot crawl {args.url}")
+        return None
+
+    # Pages are handed on in the order a crawl from root reaches them, so the result matches the live crawl's.
+    fields = SELECTED_FIELDS or FIELDS
+    crawl_fields = fields if "links" in fields or args.depth <= 1 else fields + ("links",)
+    pages = scrape_archive(args.from_archive, root=root, **{**options, "fields": crawl_fields})
+    accumulated_data = {"social": {}, "metadata": {}, "tables": []}
+    for key in ("links", "emails", "authors", "phones", "images", "documents"):
+        accumulated_data[key] = UniqueValues() if key in fields and on_result is None else set()
+    for page_url in crawl_order(root, pages, args.depth, args.max_pages_per_depth, args.max_pages_per_host):
+        page_data = pages[page_url]
+        if "error" in page_data:
+            continue
+        if crawl_fields is not fields:
+            page_data.pop("links", None)
+        if on_result is not None:
+            on_result(page_url, page_data)
+        else:
+            accumulate_page(accumulated_data, page_data)
+    return crawl_result(args.url, accumulated_data, fields)
+
+def crawl_order(root, pages, max_depth=1, max_pages_per_depth=None, max_pages_per_host=None):
+    """Return the URLs of pages a crawl from root reaches, in the breadth-first order it reaches them.
+
+    Links are followed as scrape_recursive follows them, with the same depth and page
+    limits; links to pages missing from pages still count towards the limits, as their
+    failed fetches would, and pages the crawl does not reach are left out.
+    """
+    visited = {root}
+    host_pages = Counter([url_host(root)])
+    order = []
+    frontier = [root]
+    for depth in range(1, max_depth + 1):
+        next_frontier = []
+        for page_url in frontier:
+            page_data = pages.get(page_url)
+            if page_data is None:
+                continue
+            order.append(page_url)
+            if depth == max_depth or "error" in page_data:
+                continue
+            for link in page_data.get("links", ()):
+                if max_pages_per_depth and len(next_frontier) >= max_pages_per_depth:
+                    break
+                link = normalize_url(link, page_url)
+                if link is None or link in visited or not is_same_site(link, root):
+                    continue
+                host = url_host(link)
+                if max_pages_per_host and host_pages[host] >= max_pages_per_host:
+                    continue
+                visited.add(link)
+                host_pages[host] += 1
+                next_frontier.append(link)
+        frontier = next_frontier
+    return order
+
+def worker_command(argv):
+    """Return the command line of a --queue-only worker process for a --work-queue run started with argv."""
+    # Output, stats and profiling belong to the process the crawl was started from.
+    value_options = ("--workers", "--output", "--format", "--filename", "--stats-file", "--metrics-port", "--profile")
+    flag_options = ("--stream-output", "--queue-only")
+    command = []
+    skip = False
+    for arg in argv:
+        name = arg.split("=", 1)[0]
+        if skip:
+            skip = False
+        elif name in value_options:
+            skip = "=" not in arg
+        elif name not in flag_options:
+            command.append(arg)
+    return [sys.executable, os.path.abspath(__file__)] + command + ["--queue-only"]
+
+def scrape_parallel(urls, country="US", max_workers=5, on_result=None, checkpoint=None):
+    """Scrape multiple URLs in parallel.
+
+    With on_result, each page is handed to it as soon as it finishes and is not kept in the returned dict.
+    When the fetcher has a host scheduler, workers take URLs from whichever host is
+    ready instead of in input order, within each host's concurrency and rate limits.
+    With a Checkpoint, finished pages are saved as they complete; a checkpoint from an
+    interrupted run only fetches the URLs it has not finished.
+    """
+    from tqdm import tqdm
+    from scraper.scraper import get_fetcher
 
-def scrape_parallel(urls, country="US", max_workers=5):
-    """Scrape multiple URLs in parallel."""
     results = {}
-    
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_url = {
-            executor.submit(fetch_and_extract, url, country): url 
-            for url in urls
-        }
-        
-        for future in tqdm(as_completed(future_to_url), total=len(urls), desc="Scraping URLs"):
-            url = future_to_url[future]
-            try:
-                data = future.result()
+    if checkpoint is not None:
+        if checkpoint.resumed:
+            fetched, pending = checkpoint.counts()
+            print(f"[I] Resuming run: {fetched} pages fetched, {pending} queued")
+        else:
+            checkpoint.add_urls(urls, 1)
+        urls = checkpoint.pending()
+
+    def finish(url, future):
+        try:
+            data = future.result()
+        except Exception as e:
+            print(f"Error scraping {url}: {e}")
+            data = {"error": str(e)}
+
+        if checkpoint is not None:
+            checkpoint.page_done(url, data)
+        if on_result is not None:
+            on_result(url, data)
+        else:
+            results[url] = data
+
+    scheduler = get_fetcher().host_scheduler
+    if scheduler is not None:
+        completed = scheduler.map(lambda url: fetch_and_extract(url, country), urls, max_workers)
+        for url, future in tqdm(completed, total=len(urls), desc="Scraping URLs"):
+            finish(url, future)
+        print(f"[I] Host scheduler: {scheduler.summary()}")
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            future_to_url = {
+                executor.submit(fetch_and_extract, url, country): url 
+                for url in urls
+            }
+            
+            for future in tqdm(as_completed(future_to_url), total=len(urls), desc="Scraping URLs"):
+                finish(future_to_url.pop(future), future)
+
+    if checkpoint is not None:
+        for url, data in checkpoint.iter_results(before_session=checkpoint.session):
+            if on_result is not None:
+                on_result(url, data)
+            else:
                 results[url] = data
-            except Exception as e:
-                print(f"Error scraping {url}: {e}")
-                results[url] = {"error": str(e)}
     return results
 
 def fetch_and_extract(url, country="US"):
     """Fetch HTML from a URL and extract all data."""
     try:
-        html = fetch_html(url)
-        if not html: 
+        page_data = scrape_page(url, country)
+        if not page_data: 
             return {"error": "Failed to fetch HTML"}
     
-        return {
-            "url": url, 
-            "links":        extract_links(html), 
-            "social":       extract_social_links(html), 
-            "authors":      extract_author_names(html), 
-            "phones":       extract_phone_numbers(html, country), 
-            "images":       extract_images(html, download=DOWNLOAD_IMAGES), 
-            "metadata":     extract_metadata(html), 
-            "documents":    extract_document_links(html), 
-            "tables":       extract_tables(html)
-        }
+        return {"url": url, **page_data}
     except Exception as e:
         return {"error": f"\nError processing {url}: {str(e)}"}
 
-def schedule_scraping(url, interval_hours=24, output_file="scheduled_output.json", country="US"):
-    """Schedule scraping to return at regular intervals."""
+SCHEDULE_OUTPUTS = {"json": "scheduled_output.json", "jsonl": "scheduled_output.jsonl", "sqlite": "scheduled_output.db"}
+
+def schedule_scraping(url, interval_hours=24, output_file=None, country="US", store="json", stats_file=None):
+    """Schedule scraping to return at regular intervals.
+
+    The "json" store rewrites a single JSON list; "jsonl" and "sqlite" append only
+    the fields that changed since the previous run. Without output_file, each store
+    writes to its own file from SCHEDULE_OUTPUTS. With stats_file, the collected
+    metrics are saved there after every run.
+    """
     import schedule
 
+    output_file = output_file or SCHEDULE_OUTPUTS[store]
+    history = open_history(output_file, store) if store != "json" else None
+
     def job():
         print(f"Running scheduled scraping at {time.strftime('%Y-%m-%d %H-%M-%S')}")
-        html = fetch_html(url)
-        if not html: 
+        try:
+            run_job()
+        finally:
+            if stats_file and get_metrics() is not None:
+                get_metrics().save(stats_file)
+
+    def run_job():
+        page_data = scrape_page(url, country)
+        if not page_data: 
             print("Failed to fetch HTML")
             return 
         
         data = {
             "timestamp": time.strftime('%Y-%m-%d %H:%M:%S'), 
             "url": url, 
-            "links":        extract_links(html), 
-            "emails":       extract_emails(html), 
-            "social":       extract_social_links(html), 
-            "authors":      extract_author_names(html),
-            "phones":       extract_phone_numbers(html, country),
-            "images":       extract_images(html, download=DOWNLOAD_IMAGES), 
-            "metadata":     extract_metadata(html),
-            "documents":    extract_document_links(html),
-            "tables":       extract_tables(html)
+            **page_data
         }
 
+        if history is not None:
+            with timed("write", url):
+                changed = history.append(data)
+            print(f"Changed fields appended to {output_file}: {', '.join(changed) or 'none'}")
+            return
+
         try:
             with open(output_file, 'r') as f:
                 existing_data = json.load(f)
@@ -224,7 +593,7 @@ def schedule_scraping(url, interval_hours=24, output_file="scheduled_output.json
 
         existing_data.append(data)
 
-        with open(output_file, 'w') as f:
+        with timed("write", url), open(output_file, 'w') as f:
             json.dump(existing_data, f, indent=4)
 
         print(f"Data appended to {output_file}")
@@ -238,73 +607,25 @@ def schedule_scraping(url, interval_hours=24, output_file="scheduled_output.json
             time.sleep(1)
     except KeyboardInterrupt: 
         print("\nScheduled scraping stopped.")
+    finally:
+        if history is not None:
+            history.close()
 
 def filter_data(data, keyword=None, regex_pattern=None):
     """Filter data by keyword or regex pattern."""
     if not keyword and not regex_pattern:
         return data
-    
-    filtered_data = {}
-
-    for key, value in data.items():
-        if isinstance(value, list):
-            if keyword:
-                filtered_items = [
-                    item for item in value 
-                    if keyword.lower() in str(item).lower()
-                ]
-            else: 
-                try:
-                    pattern = re.compile(regex_pattern)
-                    filtered_items = [
-                        item for item in value
-                        if pattern.search(str(item))
-                    ]
-                except re.error:
-                    filtered_items = value
-            
-            if filtered_items:
-                filtered_data[key] = filtered_items
-        elif isinstance(value, dict):
-            filtered_dict = filter_data(value, keyword, regex_pattern)
-            if filtered_dict:
-                filtered_data[key] = filtered_dict
-        elif keyword and keyword.lower() in str(value).lower():
-            filtered_data[key] = value
-        elif regex_pattern:
-            try:
-                pattern = re.compile(regex_pattern)
-                if pattern.search(str(value)):
-                    filtered_data[key] = value
-            except re.error:
-                if key in data:
-                    filtered_data[key] = value 
-    return filtered_data
+    return DataFilter(keyword, regex_pattern).apply(data)
 
 def process_data(data):
     """Process data by removing duplicates and sorting."""
-    processed_data = {}
-   
-    for key, value in data.items():
-        if isinstance(value, list):
-            unique_items = list(set(value)) if all(isinstance(item, str) for item in value) else value
-            
-            if key == "emails":
-                processed_data[key] = sorted(unique_items, key=lambda x: x.lower())
-            elif key == "phones":
-                processed_data[key] = sorted(unique_items)
-            elif key == "links":
-                processed_data[key] = sorted(unique_items)
-            else:
-                processed_data[key] = unique_items
-        else:
-            processed_data[key] = value
-    
-    return processed_data
+    return DataFilter(process=True).apply(data)
 
 
 def live_preview_mode(url, country="US"):
     """Show scraping results as they're being extracted."""
+    from scraper.scraper import fetch_html
+
     data_queue = queue.Queue()
     
     def scrape_thread():
@@ -312,42 +633,11 @@ def live_preview_mode(url, country="US"):
         if not html:
             data_queue.put({"error": "Failed to fetch HTML"})
             return
-            
-        data_queue.put({"status": "Extracting links..."})
-        links = extract_links(html)
-        data_queue.put({"links": links})
-        
-        data_queue.put({"status": "Extracting emails..."})
-        emails = extract_emails(html)
-        data_queue.put({"emails": emails})
-        
-        data_queue.put({"status": "Extracting social links..."})
-        social = extract_social_links(html)
-        data_queue.put({"social": social})
-        
-        data_queue.put({"status": "Extracting author names..."})
-        authors = extract_author_names(html)
-        data_queue.put({"authors": authors})
-        
-        data_queue.put({"status": "Extracting phone numbers..."})
-        phones = extract_phone_numbers(html, country)
-        data_queue.put({"phones": phones})
-        
-        data_queue.put({"status": "Extracting images..."})
-        images = extract_images(html, download=DOWNLOAD_IMAGES)
-        data_queue.put({"images": images})
-        
-        data_queue.put({"status": "Extracting metadata..."})
-        metadata = extract_metadata(html)
-        data_queue.put({"metadata": metadata})
-        
-        data_queue.put({"status": "Extracting documents..."})
-        documents = extract_document_links(html)
-        data_queue.put({"documents": documents})
 
-        data_queue.put({"status": "Extracting tables..."})
-        tables = extract_tables(html)
-        data_queue.put({"tables": tables})
+        page = LazyResult(html, SELECTED_FIELDS, country, DOWNLOAD_IMAGES, base_url=url)
+        for field in page:
+            data_queue.put({"status": f"Extracting {FIELD_LABELS[field]}..."})
+            data_queue.put({field: page[field]})
         data_queue.put({"status": "Done"})
 
     thread = threading.Thread(target=scrape_thread)
@@ -380,34 +670,219 @@ def live_preview_mode(url, country="US"):
 
     return collected_data
 
+def run_query(args):
+    """Print rows from a SQLite results file matching the --query options."""
+    if not os.path.exists(args.filename):
+        print(f"Error: {args.filename} does not exist")
+        return
+
+    store = ResultStore(args.filename)
+    try:
+        rows = store.query(args.query, domain=args.domain, value=args.value, run_id=args.run, limit=args.limit)
+    finally:
+        store.close()
+
+    for page_url, value in rows:
+        print(f"{page_url}\t{value}")
+    print(f"[I] {len(rows)} rows")
+
 def main():
     """Main entry point for the web scraping tool"""
-    global DOWNLOAD_IMAGES
+    global DOWNLOAD_IMAGES, STREAMING, SELECTED_FIELDS
 
     parser = argparse.ArgumentParser(description="Web Scraping Tool")
 
-    url_group = parser.add_mutually_exclusive_group(required=True)
+    url_group = parser.add_mutually_exclusive_group()
     url_group.add_argument("--url", help="URL to scrape")
     url_group.add_argument("--urls", nargs='+', help="Multiple URLs to scrape in parallel")
 
     parser.add_argument("--output", choices=["terminal", "file"], default="terminal", help="Output mode")
-    parser.add_argument("--format", choices=["txt", "json", "csv", "md", "xlsx", "sqlite"], default="txt", help="File format if saving to file")
+    parser.add_argument("--format", choices=["txt", "json", "csv", "md", "xlsx", "sqlite", "parquet"], default="txt", help="File format if saving to file")
     parser.add_argument("--filename", default="output.txt", help="Filename for scraped data")
     parser.add_argument("--country", default="US", help="Country code (e.g., PL, US, DE) for phone number parsing")
+    parser.add_argument("--fields", help=f"Comma-separated fields to extract (default: all of {','.join(FIELDS)})")
+    parser.add_argument("--phone-mode", choices=["raw", "visible"], default="raw", help="Match phone numbers over the raw HTML or only visible text and tel: links")
     parser.add_argument("--depth", type=int, default=1, help="Depth for recursive scraping")
     parser.add_argument("--recursive", action="store_true", help="Enable recursive scraping")
+    parser.add_argument("--max-pages-per-depth", type=int, help="Maximum pages queued per depth level in recursive scraping")
+    parser.add_argument("--max-pages-per-host", type=int, help="Maximum pages fetched per host in recursive scraping")
+    parser.add_argument("--seen-store", choices=SEEN_STORES, default="set", help="Store for visited URLs in recursive scraping (fingerprint, bloom and sqlite bound memory)")
+    parser.add_argument("--seen-error-rate", type=float, default=0.001, help="False positive rate of the bloom seen store")
+    parser.add_argument("--seen-path", help="SQLite file for the sqlite seen store (default: a temporary file)")
     parser.add_argument("--parallel", action="store_true", help="Enable parallel scraping")
     parser.add_argument("--max-workers", type=int, default=5, help="Maximum number of workers for parallel scraping")
+    parser.add_argument("--engine", choices=["thread", "async", "pipeline"], default="thread", help="Engine for parallel scraping")
+    parser.add_argument("--max-in-flight", type=int, default=100, help="Maximum concurrent requests for the async engine")
+    parser.add_argument("--extract-workers", type=int, help="Extraction processes for the async and pipeline engines and --from-archive (default: CPU count)")
+    parser.add_argument("--queue-size", type=int, default=100, help="Pages buffered between fetch and extract in the pipeline engine")
     parser.add_argument("--schedule", type=int, help="Schedule scraping every x hours")
-    parser.add_argument("--schedule-output", default="scheduled_output.json", help="Output file for scheduled scraping")
+    parser.add_argument("--schedule-output", help="Output file for scheduled scraping (default: scheduled_output.json, .jsonl or .db by --schedule-store)")
+    parser.add_argument("--schedule-store", choices=["json", "jsonl", "sqlite"], default="json", help="Storage for scheduled scraping (jsonl/sqlite append only changed fields)")
     parser.add_argument("--filter-keyword", help="Filter results by keyword")
     parser.add_argument("--filter-regex", help="Filter results by regex pattern")
+    parser.add_argument("--include", action="append", default=[], metavar="FIELD:REGEX", help="Keep only items of FIELD matching REGEX (case-insensitive, repeatable; no FIELD means every field)")
+    parser.add_argument("--exclude", action="append", default=[], metavar="FIELD:REGEX", help="Drop items of FIELD matching REGEX (case-insensitive, repeatable; no FIELD means every field)")
     parser.add_argument("--process", action="store_true", help="Process data (remove duplicates and sort)")
     parser.add_argument("--download-images", action="store_true", help="Download images locally")
+    parser.add_argument("--image-dir", default="images", help="Directory for downloaded images and their manifest.jsonl")
+    parser.add_argument("--image-workers", type=int, help="Concurrent image downloads, on a connection pool of their own (default: 4)")
+    parser.add_argument("--max-image-size", type=float, default=10, help="Skip images larger than this many MB")
+    parser.add_argument("--image-types", default="image/", help="Comma-separated Content-Type prefixes accepted for images")
     parser.add_argument("--live-preview", action="store_true", help="Enable live preview mode")
+    parser.add_argument("--stream-output", action="store_true", help="Write each page to the output file as soon as it is scraped (json, csv, sqlite, xlsx, parquet)")
+    parser.add_argument("--max-per-host", type=int, default=4, help="Maximum concurrent requests per host in parallel and recursive scraping (0 sends URLs in input order without per-host scheduling)")
+    parser.add_argument("--host-rate", type=float, help="Maximum requests per second to each host (token bucket)")
+    parser.add_argument("--host-burst", type=int, default=1, help="Requests a host may receive in a burst under --host-rate")
+    parser.add_argument("--ignore-crawl-delay", action="store_true", help="Do not fetch robots.txt for its Crawl-delay")
+    parser.add_argument("--retries", type=int, default=3, help="Retries on connection errors and 429/5xx responses")
+    parser.add_argument("--backoff", type=float, default=0.5, help="Exponential backoff factor between retries (seconds)")
+    parser.add_argument("--connect-timeout", type=float, default=5, help="Connect timeout in seconds")
+    parser.add_argument("--read-timeout", type=float, default=10, help="Read timeout in seconds")
+    parser.add_argument("--max-page-size", type=float, default=50, help="Abandon pages larger than this many MB (0 for no limit)")
+    parser.add_argument("--page-types", default="text/html,application/xhtml+xml,text/plain", help="Comma-separated Content-Type prefixes fetched as pages; other responses are skipped before their body is read")
+    parser.add_argument("--cache-dir", help="Directory for an on-disk response cache with conditional revalidation")
+    parser.add_argument("--cache-ttl", type=int, default=0, help="Seconds a cached page is reused without revalidating")
+    parser.add_argument("--cache-size", type=int, default=512, help="Maximum response cache size in MB")
+    parser.add_argument("--streaming", action="store_true", help="Extract from the response as it downloads, without building a tree")
+    parser.add_argument("--query", choices=QUERY_KINDS, help="Query a SQLite results file (--filename) instead of scraping")
+    parser.add_argument("--domain", help="Domain to match in --query (email domain, link/image/document host or page host)")
+    parser.add_argument("--value", help="Exact value to match in --query (metadata name for metadata)")
+    parser.add_argument("--run", type=int, help="Restrict --query to one crawl run")
+    parser.add_argument("--limit", type=int, help="Maximum rows returned by --query")
+    parser.add_argument("--parser", choices=["html.parser", "lxml"], default="html.parser", help="HTML parser backend (lxml is faster but can extract malformed markup differently)")
+    parser.add_argument("--checkpoint", metavar="FILE", help="Save the frontier, visited URLs and page results of a recursive or parallel crawl to this SQLite file as it runs")
+    parser.add_argument("--checkpoint-interval", type=float, default=5, help="Seconds between checkpoint commits (at most this much work is refetched after a crash)")
+    parser.add_argument("--resume", metavar="FILE", help="Continue the crawl saved in a checkpoint with its saved options, without refetching finished pages")
+    parser.add_argument("--archive", metavar="FILE", help="Append the raw response of every fetched page to this compressed WARC archive (indexed in FILE.idx)")
+    parser.add_argument("--from-archive", metavar="FILE", help="Extract from the pages in this archive instead of fetching them (all of them, or --url/--urls), on --extract-workers processes")
+    parser.add_argument("--work-queue", metavar="FILE", help="Crawl through a work queue in this SQLite file; the same command started again, here or on machines sharing the file, adds workers to the crawl")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes to run on this machine for --work-queue")
+    parser.add_argument("--batch-size", type=int, help="URLs a --work-queue worker claims at a time (default: twice --max-workers)")
+    parser.add_argument("--lease", type=float, default=300, help="Seconds a worker's claimed batch outlives it if the worker dies or hangs (renewed while it runs)")
+    parser.add_argument("--queue-journal", choices=["wal", "delete"], default="wal", help="SQLite journal of the work queue: wal for workers on one machine, delete for machines sharing a network filesystem")
+    parser.add_argument("--queue-only", action="store_true", help="Only work on the --work-queue crawl and leave writing its results to another worker")
+    parser.add_argument("--stats-file", help="Save per-stage timings, bytes, status codes and retries (aggregate and per URL) to this JSON file")
+    parser.add_argument("--metrics-port", type=int, help="Serve aggregate metrics in Prometheus text format at http://HOST:PORT/metrics while running")
+    parser.add_argument("--metrics-host", default="127.0.0.1", help="Address the --metrics-port endpoint listens on")
+    parser.add_argument("--profile", metavar="FILE", help="Run under cProfile, save the profile to FILE and print the slowest calls")
 
     args = parser.parse_args()
+
+    if args.query:
+        run_query(args)
+        return
+
+    checkpoint = None
+    if args.resume or args.checkpoint:
+        from scraper.checkpoint import Checkpoint
+
+        if args.resume and not os.path.exists(args.resume):
+            parser.error(f"checkpoint not found: {args.resume}")
+        checkpoint = Checkpoint(args.resume or args.checkpoint, args.checkpoint_interval)
+        saved = checkpoint.get_meta("args")
+        if args.resume:
+            if saved is None:
+                parser.error(f"{args.resume} holds no crawl to resume")
+            # The crawl continues with its saved options; options given now override them.
+            explicit = {key: value for key, value in vars(args).items() if value != parser.get_default(key)}
+            vars(args).update(saved)
+            vars(args).update(explicit)
+            args.checkpoint = args.resume
+        elif saved is not None:
+            parser.error(f"{args.checkpoint} already holds a crawl; continue it with --resume {args.checkpoint}")
+        if not (args.recursive or (args.parallel and args.urls and args.engine == "thread")) or args.live_preview or args.schedule:
+            parser.error("--checkpoint and --resume work with --recursive and with --parallel --urls (thread engine)")
+        if saved is None:
+            checkpoint.set_meta("args", vars(args))
+            checkpoint.commit()
+
+    if args.from_archive:
+        if not os.path.exists(args.from_archive):
+            parser.error(f"archive not found: {args.from_archive}")
+        if checkpoint is not None or args.work_queue or args.parallel or args.live_preview or args.schedule or args.archive:
+            parser.error("--from-archive cannot be combined with --checkpoint, --resume, --work-queue, --parallel, --live-preview, --schedule or --archive")
+    elif not args.url and not args.urls:
+        parser.error("one of the arguments --url --urls is required")
+
+    if args.cache_dir and args.parallel and args.engine == "async":
+        parser.error("--cache-dir is not supported with --engine async; use the thread or pipeline engine")
+
+    # --recursive, --live-preview and --schedule report their own error for --urls.
+    if args.urls and not (args.parallel or args.work_queue or args.from_archive or args.recursive or args.live_preview or args.schedule):
+        parser.error("--urls needs --parallel (or --work-queue or --from-archive)")
+
+    # The async and pipeline engines and archive replay extract in worker processes, which a profile cannot see.
+    if args.profile and (args.from_archive or (args.parallel and args.engine != "thread")):
+        parser.error("--profile does not see extraction processes; use it with the thread engine, not with --engine async/pipeline or --from-archive")
+
+    work_queue = None
+    if args.work_queue:
+        from scraper.workqueue import open_work_queue
+
+        if checkpoint is not None or args.parallel or args.live_preview or args.schedule:
+            parser.error("--work-queue cannot be combined with --checkpoint, --resume, --parallel, --live-preview or --schedule")
+        if args.url and not args.recursive:
+            parser.error("--work-queue needs --recursive with --url, or --urls")
+        if args.max_pages_per_depth or args.max_pages_per_host:
+            parser.error("--max-pages-per-depth and --max-pages-per-host are not supported with --work-queue")
+        work_queue = open_work_queue("sqlite", args.work_queue, args.queue_journal)
+        # Every worker must run the crawl the queue was started with.
+        crawl = {key: getattr(args, key) for key in ("url", "urls", "recursive", "depth", "fields", "country", "phone_mode")}
+        saved = work_queue.set_meta("crawl", crawl)
+        if saved != crawl:
+            work_queue.close()
+            parser.error(f"{args.work_queue} holds a different crawl: {json.dumps(saved)}")
+    elif args.queue_only:
+        parser.error("--queue-only needs --work-queue")
+
+    if args.fields:
+        try:
+            SELECTED_FIELDS = parse_fields(args.fields)
+        except ValueError as e:
+            parser.error(str(e))
+
+    page_filter = None
+    if args.filter_keyword or args.filter_regex or args.include or args.exclude or args.process:
+        try:
+            page_filter = DataFilter(args.filter_keyword, args.filter_regex, args.include, args.exclude, args.process)
+        except re.error as e:
+            parser.error(f"invalid filter pattern: {e}")
+        except ValueError as e:
+            parser.error(str(e))
+
+    from scraper.archive import PageArchive
+    from scraper.cache import ResponseCache
+    from scraper.images import configure_image_downloader
+    from scraper.politeness import HostScheduler
+    from scraper.scraper import configure_fetcher, get_fetcher
+
     DOWNLOAD_IMAGES = args.download_images
+    STREAMING = args.streaming
+    set_parser(args.parser)
+    set_phone_mode(args.phone_mode)
+    configure_fetcher(
+        max_workers=args.max_workers,
+        retries=args.retries,
+        backoff=args.backoff,
+        connect_timeout=args.connect_timeout,
+        read_timeout=args.read_timeout,
+        cache=ResponseCache(args.cache_dir, args.cache_ttl, args.cache_size * 1024 * 1024) if args.cache_dir else None,
+        host_scheduler=HostScheduler(
+            max_per_host=args.max_per_host,
+            rate=args.host_rate,
+            burst=args.host_burst,
+            respect_crawl_delay=not args.ignore_crawl_delay
+        ) if args.max_per_host > 0 else None,
+        max_bytes=int(args.max_page_size * 1024 * 1024) or None,
+        page_types=[prefix.strip() for prefix in args.page_types.split(",") if prefix.strip()],
+        archive=PageArchive(args.archive) if args.archive else None
+    )
+    configure_image_downloader(
+        download_path=args.image_dir,
+        max_workers=args.image_workers,
+        max_bytes=int(args.max_image_size * 1024 * 1024),
+        content_types=[prefix.strip() for prefix in args.image_types.split(",") if prefix.strip()]
+    )
 
     format_extensions = {
         "txt" : ".txt",
@@ -416,65 +891,226 @@ def main():
         "md" : ".md",
         "xlsx" : ".xlsx",
         "sqlite" : ".sqlite",
+        "parquet" : ".parquet",
     }
 
     if args.output == "file":
         base_name, current_ext = os.path.splitext(args.filename)
         expected_ext = format_extensions.get(args.format, "")
+        if args.stream_output and args.format == "json":
+            expected_ext = ".jsonl"
 
         if current_ext.lower() != expected_ext.lower():
             args.filename = base_name + expected_ext
             print(f"[I] Updated filename: {args.filename}")
 
+    if args.stats_file or args.metrics_port is not None:
+        # Per-URL entries are only kept for the stats file; the endpoint serves aggregates.
+        metrics = configure_metrics(per_url=bool(args.stats_file))
+        if args.metrics_port is not None:
+            try:
+                serve_metrics(metrics, args.metrics_port, args.metrics_host)
+            except OSError as e:
+                print(f"Error: Cannot serve metrics on {args.metrics_host}:{args.metrics_port}: {e}")
+                return
+
+    def run(func, *func_args):
+        if args.profile:
+            return run_profiled(args.profile, func, *func_args)
+        return func(*func_args)
+
     if args.schedule: 
         if args.urls: 
             print("Error: Scheduled scraping only works with a single URL")
             return
-        schedule_scraping(args.url, args.schedule, args.schedule_output, args.country)
+        run(schedule_scraping, args.url, args.schedule, args.schedule_output, args.country, args.schedule_store, args.stats_file)
         return
     
+    writer = None
+    if args.stream_output and not args.queue_only:
+        if args.output != "file" or args.format not in PAGE_WRITERS:
+            print(f"Error: --stream-output needs --output file and one of: {', '.join(PAGE_WRITERS)}")
+            return
+        try:
+            writer = open_page_writer(args.filename, args.format)
+        except ImportError as e:
+            print(f"Error: {e.name} is required for {args.format} output. Install with: pip install {e.name}")
+            return
+
+    workers = []
+    if work_queue is not None and args.workers > 1:
+        import subprocess
+
+        command = worker_command(sys.argv[1:])
+        workers = [subprocess.Popen(command) for _ in range(args.workers - 1)]
+        print(f"[I] Started {len(workers)} more worker processes on {args.work_queue}")
+
+    try:
+        run(run_scraping, args, writer, page_filter, checkpoint, work_queue)
+    finally:
+        for process in workers:
+            process.wait()
+        archive = get_fetcher().archive
+        if archive is not None:
+            archive.close()
+            print(f"[I] Archived {archive.count} pages to: {args.archive}")
+        if work_queue is not None:
+            done, leased, pending = work_queue.counts()
+            work_queue.close()
+            if leased or pending:
+                print(f"[I] Work queue {args.work_queue}: {done} pages done, {leased + pending} queued. Continue by running the same command again")
+        if writer is not None:
+            writer.close()
+            print(f"Data saved to: {args.filename}")
+        if checkpoint is not None:
+            fetched, pending = checkpoint.counts()
+            checkpoint.close()
+            if pending:
+                print(f"[I] Checkpoint {args.checkpoint}: {fetched} pages fetched, {pending} queued. Continue with: --resume {args.checkpoint}")
+        if args.stats_file:
+            get_metrics().save(args.stats_file)
+            print(f"[I] Stats saved to: {args.stats_file}")
+
+def run_scraping(args, writer=None, page_filter=None, checkpoint=None, work_queue=None):
+    """Run the scraping mode selected on the command line and output its results.
+
+    page_filter (a compiled DataFilter) is applied to each page as it arrives, and
+    recursive and thread-engine parallel crawls save their progress to checkpoint.
+    With a work_queue, this process is one of the workers of a distributed crawl.
+    """
+    collected = None
+
+    def write_page(url, page_data):
+        if page_filter is not None:
+            with timed("filter", url):
+                page_data = page_filter.apply(page_data)
+        with timed("write", url):
+            writer.write_page(url, page_data)
+
+    def collect_page(url, page_data):
+        with timed("filter", url):
+            collected[url] = page_filter.apply(page_data)
+
+    if writer is not None:
+        on_result = write_page
+    elif page_filter is not None and (
+        (args.urls and (args.parallel or work_queue is not None)) or (args.from_archive and (args.urls or not args.url))
+    ):
+        collected = {}
+        on_result = collect_page
+    else:
+        on_result = None
+
     if args.live_preview:
         if args.urls:
             print("Error: Live preview only works with a single URL")
             return
         data = live_preview_mode(args.url, args.country)
 
+    elif work_queue is not None:
+        data = scrape_distributed(
+            work_queue,
+            args.urls or [args.url],
+            recursive=args.recursive,
+            max_depth=args.depth,
+            country=args.country,
+            max_workers=args.max_workers,
+            batch_size=args.batch_size,
+            lease=args.lease,
+            on_result=on_result,
+            collect=not args.queue_only
+        )
+        if data is None:
+            return
+
+    elif args.from_archive:
+        data = replay_archive(args, on_result)
+        if data is None:
+            return
+
+    elif args.parallel and args.urls and args.engine == "async":
+        from scraper.async_engine import scrape_async
+        from scraper.scraper import get_fetcher
+
+        fetcher = get_fetcher()
+        data = scrape_async(
+            args.urls, args.country,
+            max_in_flight=args.max_in_flight,
+            extract_workers=args.extract_workers,
+            download_images=DOWNLOAD_IMAGES,
+            on_result=on_result,
+            retries=args.retries,
+            backoff=args.backoff,
+            connect_timeout=args.connect_timeout,
+            read_timeout=args.read_timeout,
+            fields=SELECTED_FIELDS,
+            max_bytes=fetcher.max_bytes,
+            page_types=fetcher.page_types,
+            archive=fetcher.archive,
+            host_scheduler=fetcher.host_scheduler
+        )
+
+    elif args.parallel and args.urls and args.engine == "pipeline":
+        from scraper.pipeline import scrape_pipeline
+        from scraper.scraper import get_fetcher
+
+        data = scrape_pipeline(
+            args.urls, args.country,
+            fetch_workers=args.max_workers,
+            extract_workers=args.extract_workers,
+            queue_size=args.queue_size,
+            download_images=DOWNLOAD_IMAGES,
+            on_result=on_result,
+            fields=SELECTED_FIELDS,
+            host_scheduler=get_fetcher().host_scheduler
+        )
+
     elif args.parallel and args.urls:
-        data = scrape_parallel(args.urls, args.country, args.max_workers)
+        data = scrape_parallel(args.urls, args.country, args.max_workers, on_result=on_result, checkpoint=checkpoint)
 
     elif args.recursive:
         if args.urls:
             print("Error: Recursive scraping only works with a single URL")
             return
-        data = scrape_recursive(args.url, depth=1, max_depth=args.depth, country=args.country)
+        data = scrape_recursive(
+            args.url,
+            max_depth=args.depth,
+            country=args.country,
+            max_workers=args.max_workers,
+            max_pages_per_depth=args.max_pages_per_depth,
+            max_pages_per_host=args.max_pages_per_host,
+            on_result=on_result,
+            seen_store=args.seen_store,
+            seen_path=args.seen_path,
+            seen_error_rate=args.seen_error_rate,
+            checkpoint=checkpoint
+        )
+        if data is None:
+            return
     elif args.url:
-        html = fetch_html(args.url)
-        if not html:
+        data = scrape_page(args.url, args.country)
+        if not data:
             return
-        
-        data = {
-            "links": extract_links(html),
-            "emails": extract_emails(html), 
-            "social": extract_social_links(html),
-            "author": extract_author_names(html), 
-            "phones": extract_phone_numbers(html, args.country), 
-            "images": extract_images(html, download=DOWNLOAD_IMAGES), 
-            "metadata": extract_metadata(html), 
-            "documents": extract_document_links(html), 
-            "tables": extract_tables(html)
-        }
-    
-    if args.filter_keyword or args.filter_regex: 
-        data =filter_data(data, args.filter_keyword, args.filter_regex)
 
-    if args.process: 
-        data = process_data(data)
+    # Pages filtered as they arrived replace whatever the mode returned.
+    if collected is not None:
+        data = collected
 
-    if args.output == "terminal":
-        print_to_terminal(data)
-    else:
-        save_to_file(data, args.filename, args.format)
-        print(f"Data saved to: {args.filename}")
+    if writer is not None:
+        if args.url and not args.recursive:
+            write_page(args.url, data)
+        return
+
+    if page_filter is not None and collected is None:
+        with timed("filter"):
+            data = page_filter.apply(data)
+
+    with timed("write"):
+        if args.output == "terminal":
+            print_to_terminal(data)
+        else:
+            save_to_file(data, args.filename, args.format, url=args.url)
+            print(f"Data saved to: {args.filename}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,310 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+INDEX_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS records (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    offset INTEGER UNIQUE NOT NULL,
+    length INTEGER NOT NULL,
+    status INTEGER,
+    content_type TEXT,
+    date TEXT
+);
+CREATE INDEX IF NOT EXISTS records_url ON records (url);
+'''
+
+# Headers describing a transfer that already happened: the stored body is decoded and complete.
+TRANSFER_HEADERS = ("content-encoding", "transfer-encoding", "content-length")
+
+def index_path(filename):
+    return filename + ".idx"
+
+def _open_index(filename):
+    conn = sqlite3.connect(index_path(filename), timeout=60, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(INDEX_SCHEMA)
+    conn.commit()
+    return conn
+
+def build_record(url, status, reason, headers, body, date, compresslevel=6):
+    """Return a WARC/1.0 response record for a fetched page, compressed as one gzip member."""
+    http_head = f"HTTP/1.1 {status} {reason or ''}\r\n"
+    http_head += "".join(f"{name}: {value}\r\n" for name, value in headers.items() if name.lower() not in TRANSFER_HEADERS)
+    http_head = (http_head + f"Content-Length: {len(body)}\r\n\r\n").encode("latin-1", errors="replace")
+    warc_head = (
+        "WARC/1.0\r\n"
+        "WARC-Type: response\r\n"
+        f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>\r\n"
+        f"WARC-Date: {date}\r\n"
+        f"WARC-Target-URI: {url}\r\n"
+        "Content-Type: application/http; msgtype=response\r\n"
+        f"Content-Length: {len(http_head) + len(body)}\r\n\r\n"
+    ).encode("utf-8")
+    # Compressed piece by piece, so the body is not copied into one buffer with the headers.
+    compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, 31)
+    return b"".join((compressor.compress(warc_head), compressor.compress(http_head), compressor.compress(body),
+                     compressor.compress(b"\r\n\r\n"), compressor.flush()))
+
+def _parse_headers(lines):
+    headers = {}
+    for line in lines:
+        name, _, value = line.partition(":")
+        headers[name.strip()] = value.strip()
+    return headers
+
+def parse_record(data):
+    """Parse a decompressed record into {url, date, status, headers, content_type, body}."""
+    warc_head, _, rest = data.partition(b"\r\n\r\n")
+    warc = _parse_headers(warc_head.decode("utf-8").split("\r\n")[1:])
+    payload = rest[:int(warc["Content-Length"])]
+    http_head, _, body = payload.partition(b"\r\n\r\n")
+    status_line, *header_lines = http_head.decode("latin-1").split("\r\n")
+    headers = _parse_headers(header_lines)
+    return {
+        "url": warc["WARC-Target-URI"],
+        "date": warc["WARC-Date"],
+        "status": int(status_line.split()[1]),
+        "headers": headers,
+        "content_type": next((value for name, value in headers.items() if name.lower() == "content-type"), None),
+        "body": body,
+    }
+
+def _scan(f, start, end, chunk_size=1 << 20):
+    """Yield (offset, length, data) for each complete gzip member between start and end."""
+    offset = start
+    while offset < end:
+        f.seek(offset)
+        decompressor = zlib.decompressobj(31)
+        parts = []
+        consumed = 0
+        while not decompressor.eof:
+            chunk = f.read(min(chunk_size, end - offset - consumed))
+            if not chunk:
+                # A record cut short by a crash; nothing after it can be read by scanning.
+                return
+            consumed += len(chunk)
+            try:
+                parts.append(decompressor.decompress(chunk))
+            except zlib.error:
+                return
+        length = consumed - len(decompressor.unused_data)
+        yield offset, length, b"".join(parts)
+        offset += length
+
+class PageArchive:
+    """Append-only archive of raw page responses, with an index for lookups by URL.
+
+    Each response (URL, status, headers, decoded body and fetch time) is a WARC/1.0
+    response record compressed as its own gzip member, so the file is a standard
+    .warc.gz that other WARC tools can read, and any record can be decompressed on
+    its own from its offset. Content-Encoding and Transfer-Encoding headers are not
+    kept, since the stored body is already decoded. The records' URLs, offsets and
+    lengths go to a SQLite index next to the archive (FILE.idx), written in batches
+    of index_batch. Appends take an exclusive file lock, so several processes on one
+    machine can write to the same archive. Records whose index rows were lost in a
+    crash are indexed again when the archive is next opened for reading.
+    """
+
+    def __init__(self, filename, index_batch=100, compresslevel=6):
+        self.filename = filename
+        self.index_batch = index_batch
+        self.compresslevel = compresslevel
+        self.file = open(filename, "ab")
+        self.index = _open_index(filename)
+        self.lock = threading.Lock()
+        self.rows = []
+        self.count = 0
+
+    def write(self, url, status, reason, headers, body):
+        """Append one response; body is the decoded response body as bytes."""
+        date = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        record = build_record(url, status, reason, headers, body, date, self.compresslevel)
+        content_type = headers.get("Content-Type")
+        with self.lock:
+            if fcntl is not None:
+                fcntl.flock(self.file, fcntl.LOCK_EX)
+            try:
+                self.file.seek(0, os.SEEK_END)
+                offset = self.file.tell()
+                self.file.write(record)
+                self.file.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self.file, fcntl.LOCK_UN)
+            self.rows.append((url, offset, len(record), status, content_type, date))
+            self.count += 1
+            if len(self.rows) >= self.index_batch:
+                self._flush_index()
+
+    def _flush_index(self):
+        # One short transaction per batch, so writers in other processes are not held up.
+        with self.index:
+            self.index.executemany(
+                "INSERT OR IGNORE INTO records (url, offset, length, status, content_type, date) VALUES (?, ?, ?, ?, ?, ?)",
+                self.rows
+            )
+        self.rows = []
+
+    def close(self):
+        with self.lock:
+            if self.rows:
+                self._flush_index()
+            self.file.close()
+            self.index.close()
+
+class ArchiveReader:
+    """Random access to the records of a PageArchive through its index."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = open(filename, "rb")
+        self.index = _open_index(filename)
+        self.reindex()
+
+    def reindex(self):
+        """Index records missing from the index, as after a crash; returns how many were added."""
+        size = os.fstat(self.file.fileno()).st_size
+        indexed = self.index.execute("SELECT COALESCE(SUM(length), 0) FROM records").fetchone()[0]
+        if indexed == size:
+            return 0
+        gaps = []
+        end = 0
+        for offset, length in self.index.execute("SELECT offset, length FROM records ORDER BY offset"):
+            if offset > end:
+                gaps.append((end, offset))
+            end = offset + length
+        gaps.append((end, size))
+
+        added = 0
+        with self.index:
+            for start, stop in gaps:
+                for offset, length, data in _scan(self.file, start, stop):
+                    record = parse_record(data)
+                    self.index.execute(
+                        "INSERT OR IGNORE INTO records (url, offset, length, status, content_type, date) VALUES (?, ?, ?, ?, ?, ?)",
+                        (record["url"], offset, length, record["status"], record["content_type"], record["date"])
+                    )
+                    added += 1
+        if added:
+            print(f"[I] Indexed {added} records missing from {index_path(self.filename)}")
+        return added
+
+    def entries(self, urls=None):
+        """Return (url, offset, length) of the latest record of each URL (or of the given URLs), in archive order."""
+        if urls is None:
+            rows = self.index.execute(
+                "SELECT url, offset, length FROM records WHERE id IN (SELECT MAX(id) FROM records GROUP BY url) ORDER BY offset"
+            )
+            return rows.fetchall()
+        entries = []
+        for url in urls:
+            row = self.index.execute("SELECT url, offset, length FROM records WHERE url = ? ORDER BY id DESC LIMIT 1", (url,)).fetchone()
+            if row is not None:
+                entries.append(row)
+        return entries
+
+    def read(self, offset, length):
+        """Read and parse the record at offset."""
+        self.file.seek(offset)
+        return parse_record(zlib.decompress(self.file.read(length), 31))
+
+    def get(self, url):
+        """Return the latest record of url, or None if it is not archived."""
+        entries = self.entries([url])
+        return self.read(entries[0][1], entries[0][2]) if entries else None
+
+    def __len__(self):
+        return self.index.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def close(self):
+        self.file.close()
+        self.index.close()
+
+# Archive files opened by each extraction process, by filename.
+_process_files = {}
+
+def extract_archived(filename, url, offset, length, country="US", download_images=False, parser=None, phone_mode=None,
+                     fields=None):
+    """Read one archived page and extract it, as extract_page does for a fetched one.
+
+    Top-level and picklable for process pools: each process reads the record from
+    the archive itself, so page bodies are never sent between processes.
+    """
+    from scraper.extractors import extract_page
+    from scraper.scraper import decode_page
+
+    f = _process_files.get(filename)
+    if f is None:
+        f = _process_files[filename] = open(filename, "rb")
+    try:
+        f.seek(offset)
+        record = parse_record(zlib.decompress(f.read(length), 31))
+        html = decode_page(record["body"], record["content_type"])
+        return extract_page(url, html, country, download_images, parser, phone_mode, fields)
+    except Exception as e:
+        return {"error": f"Error processing {url}: {e}"}
+
+def scrape_archive(filename, urls=None, country="US", extract_workers=None, download_images=False, on_result=None,
+                   fields=None, root=None, chunksize=16):
+    """Extract every page of an archive (the latest record of each URL), or only urls, without any network access.
+
+    Pages are decompressed, decoded and extracted on a pool of extract_workers
+    processes (default: CPU count). With root, only pages on the same site as root
+    are extracted. Returns the same {url: data} mapping as scrape_parallel; with
+    on_result, pages are handed to it in archive order instead. URLs not in the
+    archive get an error entry.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from itertools import repeat
+    from tqdm import tqdm
+    from scraper.extractors import get_parser, get_phone_mode
+
+    from scraper.urls import is_same_site
+
+    reader = ArchiveReader(filename)
+    try:
+        entries = reader.entries(urls)
+    finally:
+        reader.close()
+    if root is not None:
+        entries = [entry for entry in entries if is_same_site(entry[0], root)]
+
+    results = {}
+
+    def finish(url, data):
+        if on_result is not None:
+            on_result(url, data)
+        else:
+            results[url] = data
+
+    if urls is not None:
+        archived = {url for url, _, _ in entries}
+        for url in urls:
+            if url not in archived:
+                print(f"Error: {url} is not in {filename}")
+                finish(url, {"error": "Not in archive"})
+
+    archive_urls = [url for url, _, _ in entries]
+    count = len(entries)
+    with ProcessPoolExecutor(max_workers=extract_workers) as executor:
+        pages = executor.map(
+            extract_archived, repeat(filename, count), archive_urls,
+            [offset for _, offset, _ in entries], [length for _, _, length in entries],
+            repeat(country, count), repeat(download_images, count), repeat(get_parser(), count),
+            repeat(get_phone_mode(), count), repeat(fields, count),
+            chunksize=chunksize
+        )
+        for url, data in tqdm(zip(archive_urls, pages), total=count, desc="Extracting archived pages"):
+            finish(url, data)
+    return results
@@ -0,0 +1,220 @@
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from tqdm import tqdm
+
+from scraper.extractors import extract_page, get_parser, get_phone_mode
+from scraper.metrics import get_metrics
+from scraper.politeness import TokenBucket, parse_crawl_delay
+from scraper.scraper import PAGE_TYPES, RETRY_STATUSES, decode_page
+
+def _retry_delay(retry_after, backoff, attempt):
+    """Seconds to wait before the next attempt, preferring the server's Retry-After."""
+    if retry_after:
+        if retry_after.strip().isdigit():
+            return float(retry_after)
+        try:
+            return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+        except (TypeError, ValueError):
+            pass
+    return backoff * (2 ** attempt)
+
+async def _read_page(response, url, max_bytes, page_types, archive=None):
+    # Like Fetcher.fetch_html: check the Content-Type and size before and while reading, and decode once.
+    content_type = response.headers.get("Content-Type", "")
+    mime = content_type.split(";")[0].strip().lower()
+    if mime and page_types and not mime.startswith(tuple(page_types)):
+        print(f"[I] Skipping {url}: content type {mime}")
+        return None
+    if max_bytes and response.content_length and response.content_length > max_bytes:
+        print(f"Error fetching {url}: {response.content_length} bytes is over the {max_bytes} byte limit")
+        return None
+    body = bytearray()
+    async for chunk in response.content.iter_chunked(65536):
+        body += chunk
+        if max_bytes and len(body) > max_bytes:
+            print(f"Error fetching {url}: over the {max_bytes} byte limit")
+            return None
+    if archive is not None:
+        # Compression, the file lock and index commits would otherwise stall every request in flight.
+        await asyncio.get_running_loop().run_in_executor(
+            None, archive.write, url, response.status, response.reason, response.headers, body
+        )
+    return decode_page(body, content_type)
+
+def _record_fetch(metrics, url, response, started, headers_at, attempt):
+    # The same fetch_html stages and response counts as Fetcher._record_response.
+    total = time.perf_counter() - started
+    metrics.observe("fetch_html", total, url)
+    metrics.observe("fetch_html.connect", headers_at - started, url)
+    metrics.observe("fetch_html.download", total - (headers_at - started), url)
+    metrics.record_response(url, response.status, response.content.total_bytes, attempt)
+
+async def fetch_html_async(session, url, retries=3, backoff=0.5, max_bytes=None, page_types=PAGE_TYPES, archive=None):
+    """Fetch HTML content from a URL with an aiohttp session, retrying on 429/5xx."""
+    import aiohttp
+
+    metrics = get_metrics()
+    started = time.perf_counter()
+    for attempt in range(retries + 1):
+        try:
+            async with session.get(url) as response:
+                if response.status in RETRY_STATUSES and attempt < retries:
+                    delay = _retry_delay(response.headers.get("Retry-After"), backoff, attempt)
+                else:
+                    headers_at = time.perf_counter()
+                    response.raise_for_status()
+                    html = await _read_page(response, url, max_bytes, page_types, archive)
+                    if metrics is not None:
+                        _record_fetch(metrics, url, response, started, headers_at, attempt)
+                    return html
+        except aiohttp.ClientResponseError as e:
+            if metrics is not None:
+                metrics.record_response(url, e.status, 0, attempt)
+                metrics.record_error(url, e)
+            print(f"Error fetching {url}: {e}")
+            return None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if attempt == retries:
+                if metrics is not None:
+                    metrics.record_error(url, e)
+                print(f"Error fetching {url}: {e}")
+                return None
+            delay = backoff * (2 ** attempt)
+        await asyncio.sleep(delay)
+    return None
+
+class _AsyncHost:
+    def __init__(self, scheduler):
+        self.slots = asyncio.Semaphore(scheduler.max_per_host)
+        self.pacing = asyncio.Lock()
+        self.bucket = TokenBucket(scheduler.rate, scheduler.burst) if scheduler.rate else None
+        self.crawl_delay = None
+        self.not_before = 0.0
+
+class HostGate:
+    """The per-host limits of a HostScheduler, enforced on an event loop.
+
+    Each host gets at most max_per_host requests in flight, its token bucket rate
+    and the Crawl-delay of its robots.txt, fetched once per host.
+    """
+
+    def __init__(self, scheduler, session):
+        self.scheduler = scheduler
+        self.session = session
+        self.hosts = {}
+
+    async def _crawl_delay(self, url):
+        import aiohttp
+
+        parts = urlsplit(url)
+        try:
+            async with self.session.get(f"{parts.scheme}://{parts.netloc}/robots.txt") as response:
+                if response.status != 200:
+                    return 0.0
+                robots_txt = await response.text(errors="replace")
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return 0.0
+        return parse_crawl_delay(robots_txt, self.scheduler.user_agent) or 0.0
+
+    @asynccontextmanager
+    async def slot(self, url):
+        """Wait until url's host may take another request, and hold one of its slots meanwhile."""
+        host = self.scheduler.host_of(url)
+        if host not in self.hosts:
+            self.hosts[host] = _AsyncHost(self.scheduler)
+        state = self.hosts[host]
+        async with state.slots:
+            async with state.pacing:
+                if state.crawl_delay is None:
+                    state.crawl_delay = await self._crawl_delay(url) if self.scheduler.respect_crawl_delay else 0.0
+                now = time.monotonic()
+                wait_time = state.not_before - now
+                if state.bucket is not None:
+                    wait_time = max(wait_time, state.bucket.wait_time(now))
+                if wait_time > 0:
+                    await asyncio.sleep(wait_time)
+                    now = time.monotonic()
+                if state.bucket is not None:
+                    state.bucket.take(now)
+                if state.crawl_delay:
+                    state.not_before = now + state.crawl_delay
+            yield
+
+async def _scrape(urls, country, max_in_flight, executor, download_images, on_result,
+                  retries, backoff, connect_timeout, read_timeout, fields, max_bytes, page_types, archive,
+                  host_scheduler):
+    import aiohttp
+
+    results = {}
+    pending = iter(urls)
+    loop = asyncio.get_running_loop()
+    parser = get_parser()
+    phone_mode = get_phone_mode()
+    progress = tqdm(total=len(urls), desc="Scraping URLs")
+
+    timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+    connector = aiohttp.TCPConnector(limit=max_in_flight)
+
+    async def worker(session, gate):
+        # Each worker pulls the next URL only when it is free, so at most
+        # max_in_flight requests (and pages) are alive at any time.
+        for url in pending:
+            try:
+                if gate is None:
+                    html = await fetch_html_async(session, url, retries, backoff, max_bytes, page_types, archive)
+                else:
+                    async with gate.slot(url):
+                        html = await fetch_html_async(session, url, retries, backoff, max_bytes, page_types, archive)
+                if not html:
+                    data = {"error": "Failed to fetch HTML"}
+                else:
+                    data = await loop.run_in_executor(
+                        executor, extract_page, url, html, country, download_images, parser, phone_mode, fields
+                    )
+            except Exception as e:
+                print(f"Error scraping {url}: {e}")
+                data = {"error": str(e)}
+
+            if on_result is not None:
+                on_result(url, data)
+            else:
+                results[url] = data
+            progress.update(1)
+
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        gate = HostGate(host_scheduler, session) if host_scheduler is not None else None
+        await asyncio.gather(*(worker(session, gate) for _ in range(min(max_in_flight, len(urls)))))
+
+    progress.close()
+    return results
+
+def scrape_async(urls, country="US", max_in_flight=100, extract_workers=None, download_images=False, on_result=None,
+                 retries=3, backoff=0.5, connect_timeout=5, read_timeout=10, fields=None, max_bytes=None,
+                 page_types=PAGE_TYPES, archive=None, host_scheduler=None):
+    """Scrape multiple URLs on an asyncio event loop with a bounded in-flight window.
+
+    Fetching runs on the event loop; extraction runs in a process pool so parsing
+    never blocks it. Returns the same {url: data} mapping as scrape_parallel;
+    with on_result, finished pages are handed to it instead. Responses are checked
+    against page_types and max_bytes as the thread engine's fetcher checks them,
+    and page bodies are appended to archive (a PageArchive) from a worker thread
+    when given. With a host_scheduler, its per-host concurrency, rate and
+    crawl-delay limits apply; fetches are recorded in the metrics when enabled.
+    """
+    try:
+        import aiohttp
+    except ImportError:
+        print("Error: aiohttp is required for the async engine. Install with: pip install aiohttp")
+        return {}
+
+    with ProcessPoolExecutor(max_workers=extract_workers) as executor:
+        return asyncio.run(_scrape(
+            urls, country, max_in_flight, executor, download_images, on_result,
+            retries, backoff, connect_timeout, read_timeout, fields, max_bytes, page_types, archive,
+            host_scheduler
+        ))
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+class ResponseCache:
+    """Size-bounded on-disk cache of HTML responses and their extraction results.
+
+    Bodies are stored as files under cache_dir, indexed in a small SQLite table
+    holding the ETag/Last-Modified validators used for conditional requests.
+    Entries younger than ttl seconds are served without contacting the server.
+    When the cache grows past max_bytes the least recently used bodies are evicted.
+    """
+
+    def __init__(self, cache_dir, ttl=0, max_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.body_dir = os.path.join(cache_dir, "bodies")
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+        os.makedirs(self.body_dir, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(cache_dir, "index.sqlite"), check_same_thread=False)
+        self.conn.execute('''
+        CREATE TABLE IF NOT EXISTS responses (
+            url TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            stored_at REAL,
+            accessed_at REAL,
+            size INTEGER,
+            extract_key TEXT,
+            extracted TEXT
+        )
+        ''')
+        self.conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        self.conn.commit()
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def _body_path(self, url):
+        return os.path.join(self.body_dir, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".html")
+
+    def lookup(self, url):
+        """Return the cached entry for url as a dict including its body, or None."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT etag, last_modified, stored_at FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            try:
+                with open(self._body_path(url), encoding="utf-8") as f:
+                    body = f.read()
+            except OSError:
+                self._delete(url)
+                self.conn.commit()
+                return None
+            self.conn.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            self.conn.commit()
+        return {"url": url, "etag": row[0], "last_modified": row[1], "stored_at": row[2], "body": body}
+
+    def is_fresh(self, entry):
+        return bool(self.ttl) and time.time() - entry["stored_at"] < self.ttl
+
+    def conditional_headers(self, entry):
+        """Return the If-None-Match/If-Modified-Since headers for revalidating entry."""
+        headers = {}
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def refresh(self, url):
+        """Mark a revalidated (304) entry as fresh again."""
+        with self.lock:
+            self.conn.execute("UPDATE responses SET stored_at = ? WHERE url = ?", (time.time(), url))
+            self.conn.commit()
+
+    def store(self, url, body, headers):
+        """Store a new body for url, dropping any extraction results of the old one."""
+        data = body.encode("utf-8")
+        now = time.time()
+        with self.lock:
+            self._delete(url)
+            with open(self._body_path(url), "wb") as f:
+                f.write(data)
+            self.conn.execute(
+                "INSERT INTO responses (url, etag, last_modified, stored_at, accessed_at, size) VALUES (?, ?, ?, ?, ?, ?)",
+                (url, headers.get("ETag"), headers.get("Last-Modified"), now, now, len(data))
+            )
+            self.total_bytes += len(data)
+            self._evict()
+            self.conn.commit()
+
+    def invalidate_extracted(self, url):
+        with self.lock:
+            self.conn.execute("UPDATE responses SET extract_key = NULL, extracted = NULL WHERE url = ?", (url,))
+            self.conn.commit()
+
+    def get_extracted(self, url, key):
+        """Return extraction results cached for the current body of url, or None."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT extracted FROM responses WHERE url = ? AND extract_key = ?", (url, key)
+            ).fetchone()
+        return json.loads(row[0]) if row and row[0] is not None else None
+
+    def put_extracted(self, url, key, data):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE responses SET extract_key = ?, extracted = ? WHERE url = ?", (key, json.dumps(data), url)
+            )
+            self.conn.commit()
+
+    def _delete(self, url):
+        row = self.conn.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return
+        self.conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+        self.total_bytes -= row[0]
+        try:
+            os.remove(self._body_path(url))
+        except OSError:
+            pass
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes:
+            row = self.conn.execute("SELECT url FROM responses ORDER BY accessed_at LIMIT 1").fetchone()
+            if row is None:
+                break
+            self._delete(row[0])
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
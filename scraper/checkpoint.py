@@ -0,0 +1,98 @@
+import json
+import sqlite3
+import time
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS urls (
+    id INTEGER PRIMARY KEY,
+    url TEXT UNIQUE NOT NULL,
+    depth INTEGER NOT NULL,
+    session INTEGER NOT NULL DEFAULT 0,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS urls_pending ON urls (session, depth);
+'''
+
+class Checkpoint:
+    """SQLite checkpoint of a crawl: every URL discovered, its depth and, once fetched, its results.
+
+    A URL with session 0 is still in the frontier; a finished URL records the session
+    (one per run of the crawl) that fetched it and its results as JSON. Together the
+    rows are the frontier, the visited set and the completed results. Writes are
+    batched into one transaction every interval seconds, so a killed crawl loses at
+    most that much work and the per-page cost is a couple of row updates. A page and
+    the links found on it are committed together, so resuming never loses a link.
+    """
+
+    def __init__(self, filename, interval=5.0):
+        self.filename = filename
+        self.interval = interval
+        self.conn = sqlite3.connect(filename)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.resumed = self.conn.execute("SELECT 1 FROM urls LIMIT 1").fetchone() is not None
+        self.session = (self.get_meta("session") or 0) + 1
+        self.set_meta("session", self.session)
+        self.conn.commit()
+        self.committed = time.monotonic()
+
+    def get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def add_urls(self, urls, depth):
+        """Add newly discovered URLs to the frontier; URLs already known are ignored."""
+        self.conn.executemany("INSERT OR IGNORE INTO urls (url, depth) VALUES (?, ?)", ((url, depth) for url in urls))
+
+    def page_done(self, url, data):
+        """Record a fetched URL and its results (None if it failed)."""
+        self.conn.execute(
+            "UPDATE urls SET session = ?, data = ? WHERE url = ?",
+            (self.session, None if data is None else json.dumps(data, separators=(",", ":"), default=str), url)
+        )
+        if time.monotonic() - self.committed >= self.interval:
+            self.commit()
+
+    def pending(self, depth=None):
+        """Return the URLs still to fetch, at depth if given, in discovery order."""
+        if depth is None:
+            rows = self.conn.execute("SELECT url FROM urls WHERE session = 0 ORDER BY id")
+        else:
+            rows = self.conn.execute("SELECT url FROM urls WHERE session = 0 AND depth = ? ORDER BY id", (depth,))
+        return [url for url, in rows]
+
+    def next_depth(self):
+        """Return the smallest depth with URLs still to fetch, or None when the frontier is empty."""
+        return self.conn.execute("SELECT MIN(depth) FROM urls WHERE session = 0").fetchone()[0]
+
+    def iter_urls(self):
+        """Yield every URL known to the crawl, fetched or not: the visited set."""
+        for url, in self.conn.execute("SELECT url FROM urls"):
+            yield url
+
+    def iter_results(self, before_session=None):
+        """Yield (url, data) for fetched pages with results, only from earlier sessions if before_session is given."""
+        query = "SELECT url, data FROM urls WHERE session > 0 AND data IS NOT NULL"
+        params = ()
+        if before_session is not None:
+            query += " AND session < ?"
+            params = (before_session,)
+        for url, data in self.conn.execute(query + " ORDER BY id", params):
+            yield url, json.loads(data)
+
+    def counts(self):
+        """Return (fetched, pending) URL counts."""
+        return self.conn.execute("SELECT COALESCE(SUM(session > 0), 0), COALESCE(SUM(session = 0), 0) FROM urls").fetchone()
+
+    def commit(self):
+        self.conn.commit()
+        self.committed = time.monotonic()
+
+    def close(self):
+        self.commit()
+        self.conn.close()
@@ -1,17 +1,195 @@
 import re
-from bs4 import BeautifulSoup
-import phonenumbers
+from collections.abc import Mapping
+from functools import lru_cache
+from urllib.parse import unquote
+
+from scraper.metrics import timed
+
+FIELDS = ("links", "emails", "social", "authors", "phones", "images", "metadata", "documents", "tables")
+
+# Tree builders: html.parser is always available and the default; lxml is C-accelerated but
+# builds different trees from some malformed markup (implied table cell ends, NUL characters),
+# so it is only used when asked for.
+PARSERS = ("html.parser", "lxml")
+
+# "raw" matches phone numbers over the whole HTML; "visible" only over visible text and tel: links.
+PHONE_MODES = ("raw", "visible")
+
+# Elements whose text is never rendered; inline JSON in scripts is the main source of junk matches.
+INVISIBLE_TAGS = ("script", "style")
+
+# Cheap digit-density pre-filter: at least six digits, separated only by characters phone numbers use.
+PHONE_CANDIDATE = re.compile(r"\+?\(?\d(?:[\s().\-/]{0,3}\d){5,}")
+
+_parser = None
+_phone_mode = "raw"
+
+def available_parsers():
+    """Return the parser backends installed in this environment."""
+    from bs4.builder import builder_registry
+    return [name for name in PARSERS if builder_registry.lookup(name)]
+
+def set_parser(name="html.parser"):
+    """Select the parser backend used by the extractors and return the one in effect."""
+    global _parser
+    installed = available_parsers()
+
+    if name not in PARSERS:
+        raise ValueError(f"Unknown parser: {name}")
+    elif name not in installed:
+        print(f"[I] Parser '{name}' is not installed, falling back to html.parser")
+        _parser = "html.parser"
+    else:
+        _parser = name
+    return _parser
+
+def get_parser():
+    """Return the parser backend in effect, html.parser unless another was selected."""
+    if _parser is None:
+        return set_parser()
+    return _parser
+
+def set_phone_mode(mode="raw"):
+    """Select how phone numbers are found ("raw" or "visible")."""
+    global _phone_mode
+    if mode not in PHONE_MODES:
+        raise ValueError(f"Unknown phone mode: {mode}")
+    _phone_mode = mode
+    return _phone_mode
+
+def get_phone_mode():
+    return _phone_mode
+
+class ParsedDocument:
+    """An HTML page parsed once and shared between all extractors.
+
+    The tree is only built the first time an extractor needs it, so fields that
+    work on the raw HTML (emails, raw-mode phones) never pay for parsing.
+    """
+
+    def __init__(self, html, parser=None, url=None):
+        self.html = html
+        self.parser = parser
+        self.url = url
+        self._soup = None
+        self._hrefs = None
+
+    @property
+    def soup(self):
+        if self._soup is None:
+            from bs4 import BeautifulSoup
+            with timed("parse", self.url):
+                self._soup = BeautifulSoup(self.html, self.parser or get_parser())
+        return self._soup
+
+    @property
+    def hrefs(self):
+        if self._hrefs is None:
+            self._hrefs = [a['href'] for a in self.soup.find_all('a', href=True)]
+        return self._hrefs
+
+def parse_document(html):
+    """Return a ParsedDocument for raw HTML, reusing one that is already parsed."""
+    if isinstance(html, ParsedDocument):
+        return html
+    return ParsedDocument(html)
+
+def _raw_html(html):
+    return html.html if isinstance(html, ParsedDocument) else html
+
+def parse_fields(value):
+    """Parse a comma-separated field list such as "emails,phones" into a tuple."""
+    fields = tuple(field.strip() for field in value.split(",") if field.strip())
+    for field in fields:
+        if field not in FIELDS:
+            raise ValueError(f"Unknown field: {field} (choose from {', '.join(FIELDS)})")
+    return fields
+
+# Metrics stage of each field: the name of the extract_* function that computes it.
+EXTRACTOR_STAGES = {
+    "links": "extract_links",
+    "emails": "extract_emails",
+    "social": "extract_social_links",
+    "authors": "extract_author_names",
+    "phones": "extract_phone_numbers",
+    "images": "extract_images",
+    "metadata": "extract_metadata",
+    "documents": "extract_document_links",
+    "tables": "extract_tables",
+}
+
+class LazyResult(Mapping):
+    """Extraction results for the selected fields, each computed on first access.
+
+    Behaves like a read-only dict; extractors of fields that are never read never run.
+    """
+
+    def __init__(self, html, fields=None, country="US", download_images=False, phone_mode=None, base_url=None):
+        self.fields = tuple(fields or FIELDS)
+        for field in self.fields:
+            if field not in FIELDS:
+                raise ValueError(f"Unknown field: {field}")
+
+        doc = parse_document(html)
+        if doc.url is None:
+            doc.url = base_url
+        self.base_url = base_url
+        self._values = {}
+        self._extractors = {
+            'links': lambda: extract_links(doc),
+            'emails': lambda: extract_emails(doc),
+            'social': lambda: extract_social_links(doc),
+            'authors': lambda: extract_author_names(doc),
+            'phones': lambda: extract_phone_numbers(doc, country, phone_mode),
+            'images': lambda: extract_images(doc, download=download_images, base_url=base_url),
+            'metadata': lambda: extract_metadata(doc),
+            'documents': lambda: extract_document_links(doc),
+            'tables': lambda: extract_tables(doc),
+        }
+
+    def __getitem__(self, field):
+        if field not in self.fields:
+            raise KeyError(field)
+        if field not in self._values:
+            with timed(EXTRACTOR_STAGES[field], self.base_url):
+                self._values[field] = self._extractors[field]()
+        return self._values[field]
+
+    def __iter__(self):
+        return iter(self.fields)
+
+    def __len__(self):
+        return len(self.fields)
+
+def extract_all(html, fields=None, country="US", download_images=False, phone_mode=None, base_url=None):
+    """Parse the page once and run the requested extractors over it.
+
+    base_url is the page URL, used to resolve relative image URLs when downloading.
+    """
+    return dict(LazyResult(html, fields, country, download_images, phone_mode, base_url))
+
+EMAIL_PATTERN = re.compile(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+")
+
+def extract_page(url, html, country="US", download_images=False, parser=None, phone_mode=None, fields=None):
+    """Parse a fetched page and return its URL with every extracted field.
+
+    Top-level and picklable so process pools can run it; pass the parser name and
+    phone mode explicitly since worker processes do not share the module settings.
+    """
+    doc = ParsedDocument(html, parser)
+    return {"url": url, **extract_all(doc, fields, country, download_images, phone_mode, url)}
 
 def extract_emails(html):
-    return re.findall(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+", html)
+    return EMAIL_PATTERN.findall(_raw_html(html))
 
 def extract_links(html):
-    soup = BeautifulSoup(html, "html.parser")
-    return [a['href'] for a in soup.find_all('a', href=True)]
+    return list(parse_document(html).hrefs)
 
 def extract_social_links(html):
-    soup = BeautifulSoup(html, "html.parser")
-    social_links = [a['href'] for a in soup.find_all('a', href=True)]
+    return classify_social_links(parse_document(html).hrefs)
+
+def classify_social_links(social_links):
+    """Group hrefs by the social media platform they point to."""
     social = {
         'facebook': [l for l in social_links if 'facebook.com' in l],
         'twitter': [l for l in social_links if 'twitter.com' in l],
@@ -24,10 +202,19 @@ def extract_social_links(html):
     }
     return social
 
-def extract_phone_numbers(html, country_code="US"):
+def extract_phone_numbers(html, country_code="US", mode=None):
+    if (mode or _phone_mode) == "visible":
+        doc = parse_document(html)
+        numbers = []
+        for text in visible_strings(doc.soup):
+            numbers.extend(phones_in_text(text, country_code))
+        numbers.extend(phones_in_tel_links(doc.hrefs, country_code))
+        return numbers
+
+    import phonenumbers
     numbers = []
 
-    for match in phonenumbers.PhoneNumberMatcher(html, country_code.upper()):
+    for match in phonenumbers.PhoneNumberMatcher(_raw_html(html), country_code.upper()):
         phone_number = match.number
         formated_number = phonenumbers.format_number(
             phone_number, phonenumbers.PhoneNumberFormat.E164
@@ -35,46 +222,63 @@ def extract_phone_numbers(html, country_code="US"):
         numbers.append(formated_number)
     return numbers
 
+def visible_strings(soup):
+    """Yield the text nodes of a tree that are rendered: no comments, scripts or styles."""
+    from bs4.element import PreformattedString
+    for text in soup.find_all(string=True):
+        if isinstance(text, PreformattedString) or text.parent.name in INVISIBLE_TAGS:
+            continue
+        yield text
+
+@lru_cache(maxsize=8192)
+def _match_phones(candidate, country_code):
+    import phonenumbers
+    return tuple(
+        phonenumbers.format_number(match.number, phonenumbers.PhoneNumberFormat.E164)
+        for match in phonenumbers.PhoneNumberMatcher(candidate, country_code)
+    )
+
+def phones_in_text(text, country_code="US"):
+    """Return E.164 numbers in a text block, only running the matcher on digit-dense candidates."""
+    numbers = []
+    for candidate in PHONE_CANDIDATE.findall(text):
+        numbers.extend(_match_phones(candidate, country_code.upper()))
+    return numbers
+
+def phones_in_tel_links(hrefs, country_code="US"):
+    """Return E.164 numbers from tel: hrefs."""
+    numbers = []
+    for href in hrefs:
+        if href[:4].lower() == "tel:":
+            numbers.extend(_match_phones(unquote(href[4:]), country_code.upper()))
+    return numbers
+
 def extract_author_names(html):
-    soup = BeautifulSoup(html, "html.parser")
+    soup = parse_document(html).soup
     authors = [meta.get('content') for meta in soup.find_all('meta', attrs={'name':'author'})]
     return authors
 
-def extract_images(html, download=False, download_path='images'):
-    soup = BeautifulSoup(html, "html.parser")
+def extract_images(html, download=False, download_path=None, base_url=None):
+    soup = parse_document(html).soup
     img_tags = soup.find_all('img')
     img_urls = [img.get('src') for img in img_tags if img.get('src')]
 
     if download:
-        import os 
-        import requests
-        from urllib.parse import urlparse
-
-        if not os.path.exists(download_path):
-            os.makedirs(download_path)
-
-        downloaded_images = []
-        for i, img_url in enumerate(img_urls):
-            try:
-                if not bool(urlparse(img_url).netloc):
-                    continue
-
-                img_data = requests.get(img_url).content
-                img_extension = os.path.splitext(urlparse(img_url).path)[1]
-                if not img_extension:
-                    img_extension = '.jpg'
-
-                filename = os.path.join(download_path, f"image_{i}{img_extension}")
-                with open(filename, "wb") as f:
-                    f.write(img_data)
-                downloaded_images.append(filename)
-            except Exception as e:
-                print(f"Error downloading image {img_url}: {e}")
-        return downloaded_images
+        return download_images(img_urls, download_path, base_url)
     return img_urls
 
+def download_images(img_urls, download_path=None, base_url=None):
+    """Download images (relative URLs resolved against base_url) and return the saved filenames.
+
+    download_path defaults to the directory set with configure_image_downloader(), or "images".
+    """
+    from scraper.images import get_image_downloader
+
+    manifest = get_image_downloader(download_path).download(img_urls, base_url)
+    return [filename for filename in manifest.values() if filename]
+
 def extract_metadata(html):
-    soup = BeautifulSoup(html, "html.parser")
+    soup = parse_document(html).soup
     metadata = {}
 
     title_tag = soup.find('title')
@@ -95,60 +299,149 @@ def extract_metadata(html):
     return metadata
 
 def extract_document_links(html):
-    soup = BeautifulSoup(html, "html.parser")
-    all_links = [a['href'] for a in soup.find_all('a', href = True)]
+    return filter_document_links(parse_document(html).hrefs)
 
+def filter_document_links(all_links):
+    """Return the hrefs that point to office documents or PDFs."""
     document_extensions = ['.pdf','.doc','.docx','.xls','.xlsx','.ppt','.pptx']
     document_links = [link for link in all_links if any(link.lower().endswith(ext) for ext in document_extensions)]
 
     return document_links
 
+# Cell values that become typed column values; anything else stays a string.
+INT_CELL = re.compile(r"[+-]?\d{1,3}(?:,\d{3})+|[+-]?\d+")
+FLOAT_CELL = re.compile(r"[+-]?(?:\d{1,3}(?:,\d{3})+|\d*)\.\d+(?:[eE][+-]?\d+)?|[+-]?\d+[eE][+-]?\d+")
+# Identifiers that only look numeric (ZIP codes, "007", "+44 ..."): a leading zero other than "0" or "0.x", or a leading "+".
+IDENTIFIER_CELL = re.compile(r"\+|-?0[\d,]")
+
+# Upper bound on colspan/rowspan, so a malformed attribute cannot blow up the grid.
+MAX_SPAN = 1000
+
+def _span(cell, name):
+    value = cell.attrs.get(name)
+    if value is None:
+        return 1
+    try:
+        return min(max(int(value), 1), MAX_SPAN)
+    except (TypeError, ValueError):
+        return 1
+
+def _child_tags(element, names):
+    # Direct children only; much cheaper than find_all(recursive=False) on large tables.
+    return [child for child in element.children if child.name in names]
+
+def _table_rows(table):
+    """Yield (is_header, cells) for the rows of a table, skipping rows of nested tables."""
+    for child in _child_tags(table, ('tr', 'thead', 'tbody', 'tfoot')):
+        rows = [child] if child.name == 'tr' else _child_tags(child, ('tr',))
+        for row in rows:
+            cells = _child_tags(row, ('td', 'th'))
+            is_header = child.name == 'thead' or (bool(cells) and all(cell.name == 'th' for cell in cells))
+            yield is_header, cells
+
+def _table_grid(table):
+    """Expand colspan and rowspan into a rectangular grid; return (header rows, body rows)."""
+    header, body = [], []
+    pending = {}  # column -> [rows left, text] for cells spanning down from earlier rows
+    in_header = True
+
+    for is_header, cells in _table_rows(table):
+        row = []
+
+        def fill_pending():
+            while len(row) in pending:
+                span = pending[len(row)]
+                row.append(span[1])
+                span[0] -= 1
+                if not span[0]:
+                    del pending[len(row) - 1]
+
+        for cell in cells:
+            fill_pending()
+            text = cell.get_text(strip=True)
+            rowspan = _span(cell, 'rowspan')
+            for _ in range(_span(cell, 'colspan')):
+                if rowspan > 1:
+                    pending[len(row)] = [rowspan - 1, text]
+                row.append(text)
+        fill_pending()
+        for column in sorted(column for column in pending if column > len(row)):
+            row.extend([None] * (column - len(row)))
+            fill_pending()
+
+        # Header rows only count at the top of the table.
+        if in_header and is_header:
+            header.append(row)
+        else:
+            in_header = False
+            body.append(row)
+    return header, body
+
+def _column_names(header, width):
+    names, seen = [], {}
+    for j in range(width):
+        parts = []
+        for row in header:
+            part = row[j] if j < len(row) else None
+            # Cells spanning several header rows or columns are not repeated in the name.
+            if part and (not parts or parts[-1] != part):
+                parts.append(part)
+        name = " / ".join(parts) or f"column_{j + 1}"
+        seen[name] = seen.get(name, 0) + 1
+        names.append(name if seen[name] == 1 else f"{name}_{seen[name]}")
+    return names
+
+def _typed_column(values):
+    """Convert a column of strings to ints or floats when every non-empty cell parses as one.
+
+    A column with any identifier-like cell stays strings, since the conversion would lose its digits.
+    """
+    present = [value for value in values if value]
+    if not present:
+        return [None] * len(values)
+    if any(IDENTIFIER_CELL.match(value) for value in present):
+        return [value if value else None for value in values]
+    if all(INT_CELL.fullmatch(value) for value in present):
+        return [int(value.replace(',', '')) if value else None for value in values]
+    if all(INT_CELL.fullmatch(value) or FLOAT_CELL.fullmatch(value) for value in present):
+        return [float(value.replace(',', '')) if value else None for value in values]
+    return [value if value else None for value in values]
+
+def table_columns(table):
+    """Build one columnar table dict from a <table> element.
+
+    Returns {'header': [column names], 'columns': [typed column values], 'rows': n}.
+    Header rows come from <thead> or leading rows of <th> cells; spanned header
+    cells are joined into names such as "2023 / Q1".
+    """
+    header, body = _table_grid(table)
+    width = max((len(row) for row in header + body), default=0)
+    columns = [[row[j] if j < len(row) else None for row in body] for j in range(width)]
+    return {
+        'header': _column_names(header, width),
+        'columns': [_typed_column(column) for column in columns],
+        'rows': len(body),
+    }
+
 def extract_tables(html, save_csv=False, csv_path='tables'):
-    soup = BeautifulSoup(html, "html.parser")
+    """Extract every table as typed columns, optionally writing each one to a CSV file."""
+    soup = parse_document(html).soup
     tables = soup.find_all('table')
-    
-    if not tables:
-        return []
-    
-    extracted_tables = []
-    
+
     if save_csv:
+        import csv
         import os
-        try:
-            import pandas as pd
-        except ImportError:
-            print("Warning: pandas not installed. Tables will be extracted as HTML.")
-            save_csv = False
-    
-    if save_csv:
-        if not os.path.exists(csv_path):
-            os.makedirs(csv_path)
-            
-        for i, table in enumerate(tables):
-            try:
-                df = pd.read_html(str(table))[0]
-                csv_file = os.path.join(csv_path, f"table_{i}.csv")
-                df.to_csv(csv_file, index=False)
-                extracted_tables.append({
-                    'table_index': i,
-                    'rows': len(df),
-                    'columns': len(df.columns),
-                    'csv_file': csv_file
-                })
-            except Exception as e:
-                print(f"Error processing table {i}: {e}")
-    else:
-        for i, table in enumerate(tables):
-            rows = table.find_all('tr')
-            table_data = []
-            for row in rows:
-                cells = row.find_all(['td', 'th'])
-                row_data = [cell.get_text(strip=True) for cell in cells]
-                table_data.append(row_data)
-            
-            extracted_tables.append({
-                'table_index': i,
-                'data': table_data
-            })
-    
-    return extracted_tables
\ No newline at end of file
+        os.makedirs(csv_path, exist_ok=True)
+
+    extracted_tables = []
+    for i, table in enumerate(tables):
+        extracted = {'table_index': i, **table_columns(table)}
+        if save_csv:
+            csv_file = os.path.join(csv_path, f"table_{i}.csv")
+            with open(csv_file, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(extracted['header'])
+                writer.writerows(zip(*extracted['columns']))
+            extracted['csv_file'] = csv_file
+        extracted_tables.append(extracted)
+    return extracted_tables
@@ -0,0 +1,142 @@
+import re
+
+from scraper.extractors import FIELDS
+
+# Fields sorted by process; emails compare case-insensitively.
+SORT_KEYS = {
+    "emails": str.lower,
+    "phones": None,
+    "links": None,
+}
+
+# A rule prefix that names a field, as opposed to text such as "https" in a URL pattern.
+FIELD_PREFIX = re.compile(r"\s*([A-Za-z_]*|\*)\s*:(?!//)")
+
+def parse_rule(rule):
+    """Parse a "field:pattern" rule into (field, pattern); "*" or no field applies to every field.
+
+    Only a known field or "*" before the first colon is a field, so a rule such as
+    "https://ads.example.com" is a pattern for every field. A word prefix that is not
+    a field raises ValueError; a pattern that itself starts with "word:" (such as
+    "tel:") is written "*:tel:" or "links:tel:".
+    """
+    match = FIELD_PREFIX.match(rule)
+    if match is None:
+        return "*", rule
+    field = match.group(1) or "*"
+    if field != "*" and field not in FIELDS:
+        raise ValueError(f"unknown field in filter rule {rule!r}: {field} (fields: {', '.join(FIELDS)})")
+    return field, rule[match.end():]
+
+# Characters that make a rule a regex; rules without them are matched as case-folded substrings.
+REGEX_CHARS = re.compile(r"[\\^$.|?*+()\[\]{}]")
+
+def compile_rules(rules):
+    """Compile ("word"|"regex", pattern) rules into one predicate over a string, or None if there are none."""
+    if not rules:
+        return None
+    words = tuple(pattern for kind, pattern in rules if kind == "word")
+    patterns = [pattern for kind, pattern in rules if kind == "regex"]
+    # One alternation, so an item is searched once however many regex rules there are.
+    regex = re.compile("|".join(f"(?:{pattern})" for pattern in patterns)) if patterns else None
+
+    if not words:
+        return regex.search
+    if regex is None and len(words) == 1:
+        word = words[0]
+        return lambda text: word in text.casefold()
+
+    def match(text):
+        folded = text.casefold()
+        return any(word in folded for word in words) or (regex is not None and regex.search(text) is not None)
+    return match
+
+def _predicate(include, exclude):
+    if exclude is None:
+        return include
+    if include is None:
+        return lambda text: not exclude(text)
+    return lambda text: not exclude(text) and include(text)
+
+class DataFilter:
+    """Filtering and processing rules compiled once and applied to each page as it arrives.
+
+    Include and exclude rules are "field:pattern" strings matched case-insensitively,
+    as case-folded substrings unless the pattern uses regex syntax; a rule without a
+    field applies to every field. An item is kept when it matches no exclude rule
+    and, if its field has include rules, at least one of them. The keyword and regex
+    of --filter-keyword/--filter-regex are include rules on every field. With process,
+    list items are deduplicated in the same pass and emails, phones and links are sorted.
+    """
+
+    def __init__(self, keyword=None, regex_pattern=None, include=(), exclude=(), process=False):
+        self.process = process
+        self.includes = {}
+        self.excludes = {}
+
+        if keyword:
+            self.includes.setdefault("*", []).append(("word", keyword.casefold()))
+        if regex_pattern:
+            re.compile(regex_pattern)
+            self.includes.setdefault("*", []).append(("regex", regex_pattern))
+        for rules, target in ((include, self.includes), (exclude, self.excludes)):
+            for rule in rules:
+                field, pattern = parse_rule(rule)
+                if REGEX_CHARS.search(pattern):
+                    re.compile(pattern)
+                    target.setdefault(field, []).append(("regex", f"(?i:{pattern})"))
+                else:
+                    target.setdefault(field, []).append(("word", pattern.casefold()))
+
+        self.filtering = bool(self.includes or self.excludes)
+        self._compiled = {}
+
+    def _predicate_for(self, field):
+        if field not in self._compiled:
+            self._compiled[field] = _predicate(
+                compile_rules(self.includes.get(field, []) + self.includes.get("*", [])),
+                compile_rules(self.excludes.get(field, []) + self.excludes.get("*", [])),
+            )
+        return self._compiled[field]
+
+    def apply(self, data):
+        """Return a filtered (and, with process, deduplicated and sorted) copy of one page's results."""
+        result = {}
+        for field, value in data.items():
+            value = self._apply_value(field, value, self._predicate_for(field))
+            if value is not None:
+                result[field] = value
+        return result
+
+    def _apply_value(self, field, value, keep):
+        if isinstance(value, list):
+            items = self._filter_list(value, keep)
+            if self.process and field in SORT_KEYS:
+                items.sort(key=SORT_KEYS[field])
+            return items if items or not self.filtering else None
+        if isinstance(value, dict):
+            nested = {}
+            for key, item in value.items():
+                item = self._apply_value(None, item, keep)
+                if item is not None:
+                    nested[key] = item
+            return nested if nested or not self.filtering else None
+        if keep is None or keep(str(value)):
+            return value
+        return None
+
+    def _filter_list(self, items, keep):
+        # Filtering and deduplication share one pass; only strings are deduplicated.
+        if self.process:
+            seen = set()
+            add = seen.add
+            if keep is None:
+                return [item for item in items if not isinstance(item, str) or not (item in seen or add(item))]
+            return [
+                item for item in items
+                if keep(item if isinstance(item, str) else str(item))
+                and (not isinstance(item, str) or not (item in seen or add(item)))
+            ]
+        if keep is None:
+            return list(items)
+        return [item for item in items if keep(item if isinstance(item, str) else str(item))]
@@ -0,0 +1,172 @@
+import hashlib
+import json
+import sqlite3
+
+def field_hash(value):
+    """Return a stable content hash of a field value."""
+    data = json.dumps(value, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+class HistoryStore:
+    """Append-only history of scraping snapshots that only stores fields that changed.
+
+    Every append() writes one record with the fields whose content hash differs from
+    the previous snapshot of the same URL. snapshot_at() folds the records back into
+    the full snapshot at any point in time and iter_records() streams the change log.
+    """
+
+    def __init__(self):
+        self.last_hashes = self._load_last_hashes()
+
+    def _load_last_hashes(self):
+        last_hashes = {}
+        for record in self.iter_records():
+            last_hashes.setdefault(record["url"], {}).update(record["hashes"])
+        return last_hashes
+
+    def append(self, data):
+        """Store the fields of a scraped snapshot that changed and return their names."""
+        url = data["url"]
+        previous = self.last_hashes.setdefault(url, {})
+        changed, hashes = {}, {}
+
+        for field, value in data.items():
+            if field in ("timestamp", "url"):
+                continue
+            digest = field_hash(value)
+            if previous.get(field) != digest:
+                changed[field] = value
+                hashes[field] = digest
+
+        self._write(data["timestamp"], url, changed, hashes)
+        previous.update(hashes)
+        return list(changed)
+
+    def snapshot_at(self, url, timestamp=None):
+        """Rebuild the full snapshot of url as it was at timestamp (latest if None)."""
+        snapshot = None
+        for record in self.iter_records(url):
+            if timestamp is not None and record["timestamp"] > timestamp:
+                break
+            snapshot = snapshot or {"url": url}
+            snapshot["timestamp"] = record["timestamp"]
+            snapshot.update(record["fields"])
+        return snapshot
+
+    def iter_records(self, url=None):
+        raise NotImplementedError
+
+    def _write(self, timestamp, url, changed, hashes):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class JsonlHistory(HistoryStore):
+    """History stored as one JSON line per snapshot."""
+
+    def __init__(self, path):
+        self.path = path
+        super().__init__()
+
+    def _write(self, timestamp, url, changed, hashes):
+        record = {"timestamp": timestamp, "url": url, "fields": changed, "hashes": hashes}
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def iter_records(self, url=None):
+        try:
+            f = open(self.path, encoding="utf-8")
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A line cut short by a crash mid-write; everything before it is intact.
+                    continue
+                if not isinstance(record, dict) or not {"url", "fields", "hashes"} <= record.keys():
+                    # Not a history record, e.g. a line of some other JSON file.
+                    continue
+                if url is None or record["url"] == url:
+                    yield record
+
+class SqliteHistory(HistoryStore):
+    """History stored in indexed SQLite tables, one row per changed field."""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute('''
+        CREATE TABLE IF NOT EXISTS snapshots (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            url TEXT,
+            timestamp TEXT
+        )
+        ''')
+        self.conn.execute('''
+        CREATE TABLE IF NOT EXISTS field_changes (
+            snapshot_id INTEGER REFERENCES snapshots (id),
+            field TEXT,
+            hash TEXT,
+            value TEXT
+        )
+        ''')
+        self.conn.execute("CREATE INDEX IF NOT EXISTS snapshots_url ON snapshots (url, timestamp)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS field_changes_snapshot ON field_changes (snapshot_id)")
+        self.conn.commit()
+        super().__init__()
+
+    def _load_last_hashes(self):
+        # Only the hashes are needed here, so skip decoding the stored values.
+        last_hashes = {}
+        rows = self.conn.execute(
+            "SELECT s.url, c.field, c.hash FROM field_changes c JOIN snapshots s ON s.id = c.snapshot_id ORDER BY c.snapshot_id"
+        )
+        for url, field, digest in rows:
+            last_hashes.setdefault(url, {})[field] = digest
+        return last_hashes
+
+    def _write(self, timestamp, url, changed, hashes):
+        with self.conn:
+            cursor = self.conn.execute("INSERT INTO snapshots (url, timestamp) VALUES (?, ?)", (url, timestamp))
+            self.conn.executemany(
+                "INSERT INTO field_changes (snapshot_id, field, hash, value) VALUES (?, ?, ?, ?)",
+                [(cursor.lastrowid, field, hashes[field], json.dumps(value)) for field, value in changed.items()]
+            )
+
+    def iter_records(self, url=None):
+        query = '''
+        SELECT s.id, s.url, s.timestamp, c.field, c.hash, c.value
+        FROM snapshots s LEFT JOIN field_changes c ON c.snapshot_id = s.id
+        '''
+        params = ()
+        if url is not None:
+            query += " WHERE s.url = ?"
+            params = (url,)
+        query += " ORDER BY s.id"
+
+        record, current_id = None, None
+        for snapshot_id, row_url, timestamp, field, digest, value in self.conn.execute(query, params):
+            if snapshot_id != current_id:
+                if record is not None:
+                    yield record
+                record = {"timestamp": timestamp, "url": row_url, "fields": {}, "hashes": {}}
+                current_id = snapshot_id
+            if field is not None:
+                record["fields"][field] = json.loads(value)
+                record["hashes"][field] = digest
+        if record is not None:
+            yield record
+
+    def close(self):
+        self.conn.close()
+
+def open_history(path, store="jsonl"):
+    """Open an append-only history store of the given kind ("jsonl" or "sqlite")."""
+    if store == "jsonl":
+        return JsonlHistory(path)
+    if store == "sqlite":
+        return SqliteHistory(path)
+    raise ValueError(f"Unknown history store: {store}")
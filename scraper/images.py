@@ -0,0 +1,171 @@
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit
+
+import requests
+
+from scraper.scraper import get_fetcher
+
+IMAGE_WORKERS = 4
+
+class ImageDownloader:
+    """Concurrent, content-addressed image downloads beside the page fetches.
+
+    Image URLs are resolved against the page URL and fetched by max_workers threads
+    (default: IMAGE_WORKERS) over a session of their own with as many keep-alive
+    connections, so images never wait for, or hold up, a page fetch's connection.
+    Each body streams to disk in chunks while it is hashed, and is stored as
+    <sha256><ext> so the same image is kept once however many URLs point to it.
+    Each URL is fetched at most once per downloader, even when thousands of pages
+    share it; only downloads still running are tracked, finished ones are answered
+    from the manifest. Responses that are not of an allowed content type, or larger than
+    max_bytes, are skipped. Every new URL -> file entry is appended to
+    manifest.jsonl in the download directory.
+    """
+
+    def __init__(self, download_path="images", max_workers=None, max_bytes=10 * 1024 * 1024,
+                 content_types=("image/",), chunk_size=65536):
+        self.download_path = download_path
+        self.max_workers = max_workers or IMAGE_WORKERS
+        self.max_bytes = max_bytes
+        self.content_types = tuple(content_types)
+        self.chunk_size = chunk_size
+        self.manifest = {}
+        self.failed = set()
+        self.lock = threading.Lock()
+        self.session = get_fetcher().new_session(self.max_workers)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self.futures = {}
+        os.makedirs(download_path, exist_ok=True)
+        self._load_manifest()
+
+    def _load_manifest(self):
+        # Images saved by earlier runs are reused instead of being fetched again.
+        try:
+            f = open(os.path.join(self.download_path, "manifest.jsonl"), encoding="utf-8")
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if os.path.exists(entry["file"]):
+                    self.manifest[entry["url"]] = entry["file"]
+
+    def download(self, img_urls, base_url=None):
+        """Download images concurrently and return {absolute URL: saved file or None}."""
+        urls = []
+        for img_url in img_urls:
+            url = urljoin(base_url, img_url.strip()) if base_url else img_url.strip()
+            if urlsplit(url).scheme in ("http", "https") and url not in urls:
+                urls.append(url)
+
+        futures, started = [], []
+        with self.lock:
+            for url in urls:
+                if url in self.manifest or url in self.failed:
+                    futures.append(None)
+                    continue
+                if url not in self.futures:
+                    self.futures[url] = self.executor.submit(self._fetch, url)
+                    started.append(url)
+                futures.append(self.futures[url])
+        # Added outside the lock: the callback runs at once if the download already finished.
+        for url in started:
+            futures[urls.index(url)].add_done_callback(lambda future, url=url: self._forget(url, future))
+        return {
+            url: future.result() if future is not None else self.manifest.get(url)
+            for url, future in zip(urls, futures)
+        }
+
+    def _forget(self, url, future):
+        # A saved image is in the manifest by now; a failed one is remembered so it is not fetched again.
+        with self.lock:
+            if future.exception() is not None or future.result() is None:
+                self.failed.add(url)
+            del self.futures[url]
+
+    def _allowed(self, content_type):
+        return not self.content_types or any(content_type.startswith(allowed) for allowed in self.content_types)
+
+    def _fetch(self, url):
+        tmp_path = None
+        try:
+            with get_fetcher().get(url, session=self.session, stream=True) as response:
+                response.raise_for_status()
+                content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+                if not self._allowed(content_type):
+                    print(f"[I] Skipping image {url}: content type {content_type or 'unknown'}")
+                    return None
+                length = response.headers.get("Content-Length")
+                if length and length.isdigit() and int(length) > self.max_bytes:
+                    print(f"[I] Skipping image {url}: {length} bytes is over the size limit")
+                    return None
+
+                digest = hashlib.sha256()
+                size = 0
+                tmp_path = os.path.join(self.download_path, f".{os.getpid()}-{threading.get_ident()}.part")
+                with open(tmp_path, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=self.chunk_size):
+                        size += len(chunk)
+                        if size > self.max_bytes:
+                            print(f"[I] Skipping image {url}: over the size limit")
+                            return None
+                        digest.update(chunk)
+                        f.write(chunk)
+
+            extension = mimetypes.guess_extension(content_type) or os.path.splitext(urlsplit(url).path)[1].lower() or ".img"
+            filename = os.path.join(self.download_path, digest.hexdigest() + extension)
+            if os.path.exists(filename):
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, filename)
+            tmp_path = None
+            self._record(url, filename)
+            return filename
+        except (requests.exceptions.RequestException, OSError) as e:
+            print(f"Error downloading image {url}: {e}")
+            return None
+        finally:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _record(self, url, filename):
+        with self.lock:
+            self.manifest[url] = filename
+            # One write per line in append mode, so several processes can share the manifest.
+            with open(os.path.join(self.download_path, "manifest.jsonl"), "a", encoding="utf-8") as f:
+                f.write(json.dumps({"url": url, "file": filename}) + "\n")
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.session.close()
+
+_downloaders = {}
+_downloader_options = {}
+_downloaders_lock = threading.Lock()
+
+def configure_image_downloader(**kwargs):
+    """Set the ImageDownloader options used by get_image_downloader(), including the default download_path."""
+    with _downloaders_lock:
+        for downloader in _downloaders.values():
+            downloader.close()
+        _downloaders.clear()
+        _downloader_options.clear()
+        _downloader_options.update(kwargs)
+
+def get_image_downloader(download_path=None):
+    """Return the downloader shared by every page for download_path, creating it on first use."""
+    options = dict(_downloader_options)
+    download_path = download_path or options.pop("download_path", "images")
+    options.pop("download_path", None)
+    with _downloaders_lock:
+        if download_path not in _downloaders:
+            _downloaders[download_path] = ImageDownloader(download_path, **options)
+        return _downloaders[download_path]
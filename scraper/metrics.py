@@ -0,0 +1,264 @@
+import json
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+
+# Upper bounds (seconds) of the timing histogram buckets, as in Prometheus' defaults.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+class Histogram:
+    """Cumulative-bucket timing histogram with count, sum, min and max."""
+
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, seconds):
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+        self.count += 1
+        self.sum += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(BUCKETS, self.buckets):
+            total += count
+            yield bound, total
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "min": round(self.min, 6) if self.count else 0.0,
+            "max": round(self.max, 6),
+            "buckets": {_bound_label(bound): count for bound, count in self.cumulative()},
+        }
+
+def _bound_label(bound):
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+class Metrics:
+    """Thread-safe per-stage timings, bytes, status codes and retries of a run.
+
+    Stages are fetch_html, parse, each extract_* function (or extract_streaming),
+    filter and write. timer() records exclusive time: a stage running inside
+    another, such as the parse an extractor triggers, is subtracted from the outer
+    one, so stage times add up to the time spent working. fetch_html is broken down
+    further into fetch_html.connect (until the response headers arrive: DNS,
+    connect, TLS and server time) and fetch_html.download. With per_url, each URL's
+    own stage times, bytes and status are kept as well.
+    """
+
+    def __init__(self, per_url=True):
+        self.per_url = per_url
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.started = time.time()
+        self.stages = {}
+        self.urls = {}
+        self.bytes = 0
+        self.status_codes = Counter()
+        self.retries = 0
+        self.errors = Counter()
+
+    def _url_entry(self, url):
+        return self.urls.setdefault(url, {"stages": {}})
+
+    def observe(self, stage, seconds, url=None):
+        """Record seconds spent in stage, for url if given."""
+        with self.lock:
+            if stage not in self.stages:
+                self.stages[stage] = Histogram()
+            self.stages[stage].observe(seconds)
+            if url and self.per_url:
+                stages = self._url_entry(url)["stages"]
+                stages[stage] = round(stages.get(stage, 0.0) + seconds, 6)
+
+    def timer(self, stage, url=None):
+        """Context manager timing the block as stage, excluding nested timers."""
+        return _Timer(self, stage, url)
+
+    def exclude(self, seconds):
+        """Leave seconds recorded elsewhere out of the timer running in this thread."""
+        stack = getattr(self.local, "stack", None)
+        if stack:
+            stack[-1].nested += seconds
+
+    def record_response(self, url, status, size, retries):
+        """Count one HTTP response: its status code, bytes on the wire and retries it took."""
+        with self.lock:
+            self.status_codes[status] += 1
+            self.bytes += size
+            self.retries += retries
+            if url and self.per_url:
+                entry = self._url_entry(url)
+                entry.update(status=status, bytes=entry.get("bytes", 0) + size, retries=entry.get("retries", 0) + retries)
+
+    def record_error(self, url, error):
+        """Count a failed request by exception type."""
+        with self.lock:
+            self.errors[type(error).__name__] += 1
+            if url and self.per_url:
+                self._url_entry(url)["error"] = type(error).__name__
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                "started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started)),
+                "elapsed": round(time.time() - self.started, 3),
+                "stages": {stage: histogram.to_dict() for stage, histogram in sorted(self.stages.items())},
+                "bytes": self.bytes,
+                "status_codes": {str(code): count for code, count in sorted(self.status_codes.items())},
+                "retries": self.retries,
+                "errors": dict(self.errors),
+                "urls": {url: dict(entry, stages=dict(entry["stages"])) for url, entry in self.urls.items()},
+            }
+
+    def save(self, filename):
+        """Write the stats as JSON."""
+        with open(filename, "w") as f:
+            json.dump(self.to_dict(), f, indent=4)
+
+    def prometheus_text(self):
+        """Return the aggregate metrics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP scraper_stage_seconds Exclusive time spent in each scraping stage.",
+            "# TYPE scraper_stage_seconds histogram",
+        ]
+        with self.lock:
+            for stage, histogram in sorted(self.stages.items()):
+                for bound, count in histogram.cumulative():
+                    lines.append(f'scraper_stage_seconds_bucket{{stage="{stage}",le="{_bound_label(bound)}"}} {count}')
+                lines.append(f'scraper_stage_seconds_sum{{stage="{stage}"}} {histogram.sum:.6f}')
+                lines.append(f'scraper_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+            lines += [
+                "# HELP scraper_downloaded_bytes_total Response bytes received over the wire.",
+                "# TYPE scraper_downloaded_bytes_total counter",
+                f"scraper_downloaded_bytes_total {self.bytes}",
+                "# HELP scraper_responses_total HTTP responses by status code.",
+                "# TYPE scraper_responses_total counter",
+            ]
+            lines += [f'scraper_responses_total{{code="{code}"}} {count}' for code, count in sorted(self.status_codes.items())]
+            lines += [
+                "# HELP scraper_retries_total Requests retried after connection errors or 429/5xx responses.",
+                "# TYPE scraper_retries_total counter",
+                f"scraper_retries_total {self.retries}",
+                "# HELP scraper_fetch_errors_total Failed requests by exception type.",
+                "# TYPE scraper_fetch_errors_total counter",
+            ]
+            lines += [f'scraper_fetch_errors_total{{error="{error}"}} {count}' for error, count in sorted(self.errors.items())]
+        return "\n".join(lines) + "\n"
+
+class _Timer:
+    def __init__(self, metrics, stage, url):
+        self.metrics = metrics
+        self.stage = stage
+        self.url = url
+
+    def __enter__(self):
+        stack = self.metrics.local.__dict__.setdefault("stack", [])
+        stack.append(self)
+        self.nested = 0.0
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        stack = self.metrics.local.stack
+        stack.pop()
+        if stack:
+            stack[-1].nested += elapsed
+        self.metrics.observe(self.stage, elapsed - self.nested, self.url)
+
+_metrics = None
+
+def configure_metrics(enabled=True, per_url=True):
+    """Start collecting metrics in a fresh Metrics object, or stop collecting with enabled=False."""
+    global _metrics
+    _metrics = Metrics(per_url) if enabled else None
+    return _metrics
+
+def get_metrics():
+    """Return the active Metrics, or None when metrics are not being collected."""
+    return _metrics
+
+def timed(stage, url=None):
+    """Time a block as stage when metrics are being collected; a no-op otherwise."""
+    return _metrics.timer(stage, url) if _metrics is not None else nullcontext()
+
+def serve_metrics(metrics, port, host="127.0.0.1"):
+    """Serve metrics.prometheus_text() at http://host:port/metrics from a background thread."""
+    import http.server
+
+    class MetricsHandler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"[I] Serving metrics at http://{host}:{server.server_port}/metrics")
+    return server
+
+def run_profiled(filename, func, *args, **kwargs):
+    """Run func under cProfile, save the profile to filename and print the slowest calls.
+
+    cProfile only sees the thread it is enabled in, so every thread started while func
+    runs gets its own profiler, and the stats of the threads that finished by the end
+    are merged into the report. Work done in other processes is not profiled.
+    """
+    import cProfile
+    import pstats
+
+    thread_profilers = []
+    lock = threading.Lock()
+    thread_run = threading.Thread.run
+
+    def profiled_run(thread):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Python 3.12+ profiles through sys.monitoring, which already covers every thread.
+            return thread_run(thread)
+        try:
+            return thread_run(thread)
+        finally:
+            profiler.disable()
+            with lock:
+                thread_profilers.append(profiler)
+
+    profiler = cProfile.Profile()
+    threading.Thread.run = profiled_run
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        threading.Thread.run = thread_run
+        stats = pstats.Stats(profiler)
+        with lock:
+            for thread_profiler in thread_profilers:
+                stats.add(thread_profiler)
+        stats.dump_stats(filename)
+        stats.sort_stats("cumulative").print_stats(20)
+        print(f"[I] Profile saved to: {filename}, {len(thread_profilers)} worker threads merged "
+              f"(inspect with: python -m pstats {filename})")
@@ -1,76 +1,95 @@
 import csv
+import json
+import os
 from colorama import Fore, Style
 
+from scraper.extractors import FIELDS
+
+# Section titles per field; fields missing from the results (not selected) are left out.
+TXT_SECTIONS = (
+    ("links", "Links"), ("emails", "Emails"), ("social", "Social Media"), ("authors", "Authors"),
+    ("phones", "Phones"), ("images", "Images"), ("metadata", "Metadata"), ("documents", "Documents"),
+    ("tables", "Tables"),
+)
+MD_SECTIONS = (
+    ("links", "Links"), ("emails", "Emails"), ("social", "Social Media"), ("authors", "Authors"),
+    ("phones", "Phone Numbers"), ("images", "Images"), ("metadata", "Metadata"), ("documents", "Documents"),
+    ("tables", "Tables"),
+)
+
 def print_to_terminal(data):
     # Links in blue
-    print(Fore.BLUE + "\nExtracted Links:" + Style.RESET_ALL)
-    for link in data.get('links', []):
-        print(f"  {Fore.CYAN}{link}{Style.RESET_ALL}")
+    if 'links' in data:
+        print(Fore.BLUE + "\nExtracted Links:" + Style.RESET_ALL)
+        for link in data.get('links', []):
+            print(f"  {Fore.CYAN}{link}{Style.RESET_ALL}")
     
     # Emails in green
-    print(Fore.GREEN + "\nEmails:" + Style.RESET_ALL)
-    for email in data.get('emails', []):
-        print(f"  {Fore.GREEN}{email}{Style.RESET_ALL}")
+    if 'emails' in data:
+        print(Fore.GREEN + "\nEmails:" + Style.RESET_ALL)
+        for email in data.get('emails', []):
+            print(f"  {Fore.GREEN}{email}{Style.RESET_ALL}")
     
     # Social media links in magenta
-    print(Fore.MAGENTA + "\nSocial Media Links:" + Style.RESET_ALL)
-    social = data.get('social', {})
-    for platform, links in social.items():
-        print(f"  {Fore.YELLOW}{platform}:{Style.RESET_ALL}")
-        for link in links:
-            print(f"    {Fore.MAGENTA}{link}{Style.RESET_ALL}")
+    if 'social' in data:
+        print(Fore.MAGENTA + "\nSocial Media Links:" + Style.RESET_ALL)
+        social = data.get('social', {})
+        for platform, links in social.items():
+            print(f"  {Fore.YELLOW}{platform}:{Style.RESET_ALL}")
+            for link in links:
+                print(f"    {Fore.MAGENTA}{link}{Style.RESET_ALL}")
     
     # Author names in yellow
-    print(Fore.YELLOW + "\nAuthor Names:" + Style.RESET_ALL)
-    for author in data.get('authors', []):
-        print(f"  {Fore.YELLOW}{author}{Style.RESET_ALL}")
+    if 'authors' in data:
+        print(Fore.YELLOW + "\nAuthor Names:" + Style.RESET_ALL)
+        for author in data.get('authors', []):
+            print(f"  {Fore.YELLOW}{author}{Style.RESET_ALL}")
     
     # Phone numbers in red
-    print(Fore.RED + "\nPhone Numbers:" + Style.RESET_ALL)
-    for phone in data.get('phones', []):
-        print(f"  {Fore.RED}{phone}{Style.RESET_ALL}")
+    if 'phones' in data:
+        print(Fore.RED + "\nPhone Numbers:" + Style.RESET_ALL)
+        for phone in data.get('phones', []):
+            print(f"  {Fore.RED}{phone}{Style.RESET_ALL}")
     
     # Images in cyan
-    print(Fore.CYAN + "\nImages:" + Style.RESET_ALL)
-    for img in data.get('images', []):
-        print(f"  {Fore.CYAN}{img}{Style.RESET_ALL}")
+    if 'images' in data:
+        print(Fore.CYAN + "\nImages:" + Style.RESET_ALL)
+        for img in data.get('images', []):
+            print(f"  {Fore.CYAN}{img}{Style.RESET_ALL}")
     
     # Metadata in white
-    print(Fore.WHITE + "\nMetadata:" + Style.RESET_ALL)
-    metadata = data.get('metadata', {})
-    for key, value in metadata.items():
-        print(f"  {Fore.WHITE}{key}:{Style.RESET_ALL} {value}")
+    if 'metadata' in data:
+        print(Fore.WHITE + "\nMetadata:" + Style.RESET_ALL)
+        metadata = data.get('metadata', {})
+        for key, value in metadata.items():
+            print(f"  {Fore.WHITE}{key}:{Style.RESET_ALL} {value}")
     
     # Documents in blue
-    print(Fore.BLUE + "\nDocuments:" + Style.RESET_ALL)
-    for doc in data.get('documents', []):
-        print(f"  {Fore.BLUE}{doc}{Style.RESET_ALL}")
+    if 'documents' in data:
+        print(Fore.BLUE + "\nDocuments:" + Style.RESET_ALL)
+        for doc in data.get('documents', []):
+            print(f"  {Fore.BLUE}{doc}{Style.RESET_ALL}")
     
     # Tables in white
-    print(Fore.WHITE + "\nTables:" + Style.RESET_ALL)
-    tables = data.get('tables', [])
-    for i, table in enumerate(tables):
-        print(f"  {Fore.WHITE}Table {i}:{Style.RESET_ALL}")
-        if isinstance(table, dict) and 'data' in table:
-            for row in table['data'][:5]:
-                print(f"    {row}")
-            if len(table['data']) > 5:
-                print(f"    ... and {len(table['data']) - 5} more rows")
-
-def save_to_file(data, filename, format="txt"):
+    if 'tables' in data:
+        print(Fore.WHITE + "\nTables:" + Style.RESET_ALL)
+        tables = data.get('tables', [])
+        for i, table in enumerate(tables):
+            print(f"  {Fore.WHITE}Table {i}:{Style.RESET_ALL}")
+            if isinstance(table, dict) and 'columns' in table:
+                print(f"    {table['header']}")
+                for row in zip(*(column[:5] for column in table['columns'])):
+                    print(f"    {list(row)}")
+                if table['rows'] > 5:
+                    print(f"    ... and {table['rows'] - 5} more rows")
+
+def save_to_file(data, filename, format="txt", url=None):
     if format == "txt":
         with open(filename, 'w') as f:
-            f.write(f"Links:\n{data.get('links')}\n")
-            f.write(f"Emails:\n{data.get('emails')}\n")
-            f.write(f"Social Media:\n{data.get('social')}\n")
-            f.write(f"Authors:\n{data.get('authors')}\n")
-            f.write(f"Phones:\n{data.get('phones')}\n")
-            f.write(f"Images:\n{data.get('images')}\n")
-            f.write(f"Metadata:\n{data.get('metadata')}\n")
-            f.write(f"Documents:\n{data.get('documents')}\n")
-            f.write(f"Tables:\n{data.get('tables')}\n")
+            for key, title in TXT_SECTIONS:
+                if key in data:
+                    f.write(f"{title}:\n{data[key]}\n")
     elif format == "json":
-        import json
         with open(filename, 'w') as f:
             json.dump(data, f, indent=4)
     elif format == "csv":
@@ -82,15 +101,9 @@ def save_to_file(data, filename, format="txt"):
     elif format == "md":
         with open(filename, 'w') as f:
             f.write("# Web Scraping Results\n\n")
-            f.write(f"## Links\n\n{data.get('links')}\n\n")
-            f.write(f"## Emails\n\n{data.get('emails')}\n\n")
-            f.write(f"## Social Media\n\n{data.get('social')}\n\n")
-            f.write(f"## Authors\n\n{data.get('authors')}\n\n")
-            f.write(f"## Phone Numbers\n\n{data.get('phones')}\n\n")
-            f.write(f"## Images\n\n{data.get('images')}\n\n")
-            f.write(f"## Metadata\n\n{data.get('metadata')}\n\n")
-            f.write(f"## Documents\n\n{data.get('documents')}\n\n")
-            f.write(f"## Tables\n\n{data.get('tables')}\n\n")
+            for key, title in MD_SECTIONS:
+                if key in data:
+                    f.write(f"## {title}\n\n{data[key]}\n\n")
     elif format == "xlsx":
         try:
             import pandas as pd
@@ -110,26 +123,229 @@ def save_to_file(data, filename, format="txt"):
         except ImportError:
             print("Error: pandas and openpyxl are required for Excel export. Install with: pip install pandas openpyxl")
     elif format == "sqlite":
+        from scraper.store import store_results
+        store_results(filename, data, url)
+    elif format == "parquet":
         try:
-            import sqlite3
-            import json
-            
-            conn = sqlite3.connect(filename)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS scraping_data (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                category TEXT,
-                data TEXT
-            )
-            ''')
-            
-            for key, value in data.items():
-                cursor.execute("INSERT INTO scraping_data (category, data) VALUES (?, ?)",
-                             (key, json.dumps(value)))
-            
-            conn.commit()
-            conn.close()
+            writer = ParquetWriter(filename).open()
         except ImportError:
-            print("Error: sqlite3 is required for SQLite export.")
\ No newline at end of file
+            print("Error: pyarrow is required for Parquet export. Install with: pip install pyarrow")
+            return
+        with writer:
+            for page_url, page_data in iter_pages(data, url):
+                writer.write_page(page_url, page_data)
+
+def iter_pages(data, url=None):
+    """Yield (url, page) pairs from one page's results, a crawl summary or a {url: page} mapping."""
+    if any(key in data for key in FIELDS + ("error",)):
+        yield data.get("url") or url, data
+        return
+    for page_url, page_data in data.items():
+        if isinstance(page_data, dict):
+            yield page_url, page_data
+
+class PageWriter:
+    """Incremental writer that saves each page's results as soon as it is scraped.
+
+    Call open(), then write_page(url, data) for every page and close() at the end.
+    Pages already written survive a crash, and nothing is kept in memory between pages.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+
+    def open(self):
+        return self
+
+    def write_page(self, url, data):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *exc):
+        self.close()
+
+class JsonlWriter(PageWriter):
+    """One JSON object per line: {"url": ..., "data": {...}}."""
+
+    def open(self):
+        self.file = open(self.filename, 'w', encoding='utf-8')
+        return self
+
+    def write_page(self, url, data):
+        self.file.write(json.dumps({"url": url, "data": data}) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class CsvWriter(PageWriter):
+    """Rows of url, category and the JSON-encoded data."""
+
+    def open(self):
+        self.file = open(self.filename, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(["URL", "Category", "Data"])
+        return self
+
+    def write_page(self, url, data):
+        self.writer.writerows([url, key, json.dumps(value)] for key, value in data.items())
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class SqliteWriter(PageWriter):
+    """Pages in the normalized result store, committed in batched transactions."""
+
+    def __init__(self, filename, batch_size=50):
+        super().__init__(filename)
+        self.batch_size = batch_size
+        self.pending = 0
+
+    def open(self):
+        from scraper.store import ResultStore
+        self.store = ResultStore(self.filename)
+        self.run_id = self.store.start_run()
+        return self
+
+    def write_page(self, url, data):
+        self.store.add_page(self.run_id, url, data)
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.store.commit()
+            self.pending = 0
+
+    def close(self):
+        self.store.close()
+
+class XlsxWriter(PageWriter):
+    """One sheet per category, streamed with openpyxl's write-only mode.
+
+    The workbook is only a valid file once close() has run.
+    """
+
+    def open(self):
+        from openpyxl import Workbook
+        self.workbook = Workbook(write_only=True)
+        self.sheets = {}
+        return self
+
+    def _sheet(self, key, header):
+        if key not in self.sheets:
+            self.sheets[key] = self.workbook.create_sheet(key[:31])
+            self.sheets[key].append(header)
+        return self.sheets[key]
+
+    def write_page(self, url, data):
+
+        def cell(value):
+            return value if isinstance(value, (str, int, float)) or value is None else json.dumps(value)
+
+        for key, value in data.items():
+            if isinstance(value, list):
+                sheet = self._sheet(key, ["url", key])
+                for item in value:
+                    sheet.append([url, cell(item)])
+            elif isinstance(value, dict):
+                sheet = self._sheet(key, ["url", "key", "value"])
+                for name, item in value.items():
+                    sheet.append([url, name, cell(item)])
+            else:
+                self._sheet(key, ["url", key]).append([url, cell(value)])
+
+    def close(self):
+        if not self.sheets:
+            self.workbook.create_sheet("results")
+        self.workbook.save(self.filename)
+
+class ParquetWriter(PageWriter):
+    """List fields as Arrow record batches in one Parquet file, and every table in a file of its own.
+
+    The main file holds one row per extracted value (url, field, key, value), where key
+    is the social platform or metadata name. Tables keep their typed columns and are
+    written to <name>_tables/page<n>_table<i>.parquet, with the page URL in the file metadata.
+    """
+
+    def __init__(self, filename, batch_rows=65536):
+        super().__init__(filename)
+        self.batch_rows = batch_rows
+        self.tables_dir = os.path.splitext(filename)[0] + "_tables"
+        self.pages = 0
+
+    def open(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.schema = pa.schema([("url", pa.string()), ("field", pa.string()), ("key", pa.string()), ("value", pa.string())])
+        self.writer = pq.ParquetWriter(self.filename, self.schema)
+        self.rows = {name: [] for name in self.schema.names}
+        return self
+
+    def _add(self, url, field, key, value):
+        if value is None:
+            return
+        self.rows["url"].append(url)
+        self.rows["field"].append(field)
+        self.rows["key"].append(key)
+        self.rows["value"].append(value if isinstance(value, str) else json.dumps(value))
+
+    def write_page(self, url, data):
+        for field, value in data.items():
+            if field in ("url", "tables"):
+                continue
+            if isinstance(value, list):
+                for item in value:
+                    self._add(url, field, None, item)
+            elif isinstance(value, dict):
+                for key, item in value.items():
+                    for each in item if isinstance(item, list) else [item]:
+                        self._add(url, field, key, each)
+            else:
+                self._add(url, field, None, value)
+
+        # Rows are buffered so row groups stay large however small the pages are.
+        if len(self.rows["url"]) >= self.batch_rows:
+            self._flush()
+        for i, table in enumerate(data.get("tables") or []):
+            self._write_table(url, table.get("table_index", i), table)
+        self.pages += 1
+
+    def _flush(self):
+        if self.rows["url"]:
+            self.writer.write_batch(self.pa.record_batch(list(self.rows.values()), schema=self.schema))
+            self.rows = {name: [] for name in self.schema.names}
+
+    def _write_table(self, url, index, table):
+        import pyarrow.parquet as pq
+
+        if 'columns' not in table:
+            return
+        os.makedirs(self.tables_dir, exist_ok=True)
+        arrow_table = self.pa.table(
+            {name: self.pa.array(column) for name, column in zip(table['header'], table['columns'])}
+        ).replace_schema_metadata({"url": url, "table_index": str(index)})
+        pq.write_table(arrow_table, os.path.join(self.tables_dir, f"page{self.pages}_table{index}.parquet"))
+
+    def close(self):
+        self._flush()
+        self.writer.close()
+
+PAGE_WRITERS = {
+    "json": JsonlWriter,
+    "csv": CsvWriter,
+    "sqlite": SqliteWriter,
+    "xlsx": XlsxWriter,
+    "parquet": ParquetWriter,
+}
+
+def open_page_writer(filename, format="json"):
+    """Open an incremental writer for the given format (json is written as JSON Lines)."""
+    if format not in PAGE_WRITERS:
+        raise ValueError(f"Streaming output is not supported for format: {format}")
+    return PAGE_WRITERS[format](filename).open()
@@ -0,0 +1,50 @@
+"""Parity check of the parser backends: every backend must give the extractor output html.parser gives.
+
+The corpus covers well-formed and loosely written markup on which the backends agree.
+They do not agree on everything: html.parser does not apply the HTML5 implied end tags
+for table cells, and lxml replaces NUL characters, so html.parser stays the default and
+lxml is only used with --parser lxml.
+"""
+from scraper.extractors import ParsedDocument, extract_all
+
+CORPUS = {
+    "basic": (
+        "<html><head><title>Home</title><meta name='author' content='Ann'>"
+        "<meta property='og:title' content='OG'></head><body><a href='/a'>a</a>"
+        "<a href='https://facebook.com/x'>f</a><img src='/i.png'><img alt='none'>"
+        "<p>mail: a@b.com call +1 202-555-0143</p></body></html>"
+    ),
+    "unclosed": (
+        "<title>T</title><body><p>text <a href=/x>x<p><a href='/doc.PDF'>d<img src=a.jpg>"
+        "<table><tr><td>1</td><td>2</td></tr><tr><td>3</td></tr></table>"
+    ),
+    "nested_tables": "<table><tr><td><table><tr><td>inner</td></tr></table></td><td>outer</td></tr></table>",
+    "no_head": "<meta name=author content=Bob><a href='https://youtu.be/x'>y</a><title>Late</title>",
+    "entities": "<title>A &amp; B</title><a href='/q?a=1&amp;b=2'>q</a><meta name='description' content='&lt;x&gt;'>",
+    "duplicate_meta": "<meta name='keywords' content='a'><meta name='keywords' content='b'><meta name='keywords' content='c'>",
+    "whitespace_cells": (
+        "<table>\n <tr>\n  <th> H1 </th>\n  <th>H2</th>\n </tr>\n"
+        " <tr><td>\n x \n</td><td></td></tr>\n</table>"
+    ),
+    "anchors": (
+        "<!DOCTYPE html><html><body><div><a href='mailto:x@y.org'>m</a>"
+        "<a href=''>empty</a><a>nohref</a></div></body></html>"
+    ),
+    "comments_scripts": (
+        "<!-- <a href='/hidden'>h</a> --><script>var a = '<a href=\"/js\">';</script>"
+        "<a href='/real'>r</a>"
+    ),
+    "svg": "<svg><a href='/svglink'>s</a><image href='x.png'/></svg><img src='/r.png'>",
+}
+
+def check_parity(parsers):
+    """Return a list of (case, field, parser) mismatches against html.parser."""
+    mismatches = []
+    for name, html in CORPUS.items():
+        expected = extract_all(ParsedDocument(html, "html.parser"))
+        for parser in parsers:
+            actual = extract_all(ParsedDocument(html, parser))
+            for field in expected:
+                if actual[field] != expected[field]:
+                    mismatches.append((name, field, parser))
+    return mismatches
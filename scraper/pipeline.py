@@ -0,0 +1,117 @@
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from tqdm import tqdm
+
+from scraper.extractors import extract_page, get_parser, get_phone_mode
+from scraper.scraper import fetch_html
+
+_DONE = object()
+
+class StageCounter:
+    """Thread-safe per-stage completion counts for throughput reporting."""
+
+    def __init__(self, *stages):
+        self.lock = threading.Lock()
+        self.counts = dict.fromkeys(stages, 0)
+        self.started = time.perf_counter()
+
+    def add(self, stage):
+        with self.lock:
+            self.counts[stage] += 1
+
+    def rates(self):
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        with self.lock:
+            return {stage: f"{count / elapsed:.1f}/s" for stage, count in self.counts.items()}
+
+def scrape_pipeline(urls, country="US", fetch_workers=5, extract_workers=None, queue_size=100,
+                    download_images=False, on_result=None, fields=None, host_scheduler=None):
+    """Scrape URLs through a fetch -> extract -> write pipeline.
+
+    fetch_workers threads download pages and submit them to a process pool of
+    extract_workers, so parsing scales with cores instead of sharing the GIL.
+    A single writer (the calling thread) consumes finished pages in order of
+    submission. The queue between the stages holds at most queue_size pages,
+    so fetchers block instead of piling HTML up in memory when extraction
+    falls behind. With a host_scheduler, fetches are dispatched through it, so
+    its per-host concurrency, rate and crawl-delay limits apply as they do for
+    scrape_parallel. Returns the same {url: data} mapping as scrape_parallel;
+    with on_result, finished pages are handed to it instead.
+    """
+    results = {}
+    pending = iter(urls)
+    pending_lock = threading.Lock()
+    in_flight = queue.Queue(maxsize=queue_size)
+    counter = StageCounter("fetch", "extract", "write")
+    parser = get_parser()
+    phone_mode = get_phone_mode()
+
+    def next_url():
+        with pending_lock:
+            return next(pending, None)
+
+    def fetch(url, executor):
+        try:
+            html = fetch_html(url)
+        except Exception as e:
+            html = None
+            print(f"Error fetching {url}: {e}")
+        counter.add("fetch")
+
+        if not html:
+            in_flight.put((url, None))
+            return
+        future = executor.submit(extract_page, url, html, country, download_images, parser, phone_mode, fields)
+        future.add_done_callback(lambda _: counter.add("extract"))
+        in_flight.put((url, future))
+
+    def fetch_worker(executor):
+        while True:
+            url = next_url()
+            if url is None:
+                break
+            fetch(url, executor)
+
+    def run_fetchers(executor):
+        if host_scheduler is not None:
+            for _ in host_scheduler.map(lambda url: fetch(url, executor), urls, fetch_workers):
+                pass
+        else:
+            threads = [threading.Thread(target=fetch_worker, args=(executor,), daemon=True) for _ in range(fetch_workers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        in_flight.put(_DONE)
+
+    with ProcessPoolExecutor(max_workers=extract_workers) as executor:
+        threading.Thread(target=run_fetchers, args=(executor,), daemon=True).start()
+
+        with tqdm(total=len(urls), desc="Scraping URLs") as progress:
+            while True:
+                item = in_flight.get()
+                if item is _DONE:
+                    break
+
+                url, future = item
+                if future is None:
+                    data = {"error": "Failed to fetch HTML"}
+                else:
+                    try:
+                        data = future.result()
+                    except Exception as e:
+                        print(f"Error scraping {url}: {e}")
+                        data = {"error": str(e)}
+
+                if on_result is not None:
+                    on_result(url, data)
+                else:
+                    results[url] = data
+                counter.add("write")
+                progress.set_postfix(counter.rates(), refresh=False)
+                progress.update(1)
+
+    return results
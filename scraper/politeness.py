@@ -0,0 +1,256 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from scraper.urls import normalize_url, url_host
+
+# Responses asking the client to slow down.
+BACKOFF_STATUSES = (429, 503)
+
+# Crawl delay of a host whose robots.txt is still being fetched.
+_FETCHING = object()
+
+class TokenBucket:
+    """Token bucket allowing rate requests per second on average, in bursts of up to burst."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now):
+        """Return the seconds until a token is available (0 if one is available now)."""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now):
+        self._refill(now)
+        self.tokens -= 1
+
+class HostState:
+    """Pending URLs and politeness state of one host."""
+
+    def __init__(self, limit, bucket):
+        self.pending = deque()
+        self.active = 0
+        self.limit = limit
+        self.successes = 0
+        self.bucket = bucket
+        self.not_before = 0.0
+        self.backoff = 0.0
+
+def parse_crawl_delay(robots_txt, user_agent="*"):
+    """Return the Crawl-delay a robots.txt sets for user_agent in seconds, or None."""
+    from urllib.robotparser import RobotFileParser
+
+    robots = RobotFileParser()
+    robots.parse(robots_txt.splitlines())
+    delay = robots.crawl_delay(user_agent)
+    return float(delay) if delay else None
+
+def retry_after_seconds(value):
+    """Parse a Retry-After header (seconds or an HTTP date) into seconds, or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+class HostScheduler:
+    """Dispatch URLs to a shared worker pool from per-host ready queues.
+
+    Each host has its own queue, at most max_per_host requests in flight and, with
+    rate, a token bucket of rate requests per second (bursts of burst). The
+    Crawl-delay of each host's robots.txt is fetched once, cached, and enforced
+    between requests. A 429 or 503 (including ones retried by the fetcher) backs the
+    host off exponentially from backoff up to max_backoff seconds, honouring
+    Retry-After, and halves its concurrency; successes restore both gradually.
+    Hosts take turns, and a worker is only handed a URL whose host is ready, so
+    throttled or slow hosts never hold up the others.
+
+    Set as the fetcher's host_scheduler so responses report back through
+    record_response() and release(). A request counts against its host's
+    concurrency until its response body has been read, not while the page is being
+    extracted. The host state is kept across map() calls.
+    """
+
+    def __init__(self, max_per_host=4, rate=None, burst=1, respect_crawl_delay=True, backoff=1.0,
+                 max_backoff=60.0, user_agent="*"):
+        self.max_per_host = max(1, max_per_host)
+        self.rate = rate
+        self.burst = burst
+        self.respect_crawl_delay = respect_crawl_delay
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.user_agent = user_agent
+        self.hosts = OrderedDict()
+        self.crawl_delays = {}
+        self.throttled = 0
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.wakeup = threading.Event()
+
+    @staticmethod
+    def host_of(url):
+        return url_host(normalize_url(url) or url)
+
+    def _state(self, host):
+        if host not in self.hosts:
+            bucket = TokenBucket(self.rate, self.burst) if self.rate else None
+            self.hosts[host] = HostState(self.max_per_host, bucket)
+        return self.hosts[host]
+
+    def crawl_delay(self, url):
+        """Fetch the host's robots.txt and return its Crawl-delay for user_agent, or None."""
+        from requests.exceptions import RequestException
+        from scraper.scraper import get_fetcher
+
+        parts = urlsplit(url)
+        try:
+            response = get_fetcher().get(f"{parts.scheme}://{parts.netloc}/robots.txt")
+        except RequestException:
+            return None
+        if response.status_code != 200:
+            return None
+        return parse_crawl_delay(response.text, self.user_agent)
+
+    def _wait_time(self, host, state, now):
+        # Seconds until the host can take another request, or None while it is at its concurrency limit.
+        if state.active >= state.limit or self.crawl_delays.get(host) is _FETCHING:
+            return None
+        wait_time = state.not_before - now
+        if state.bucket is not None:
+            wait_time = max(wait_time, state.bucket.wait_time(now))
+        return max(wait_time, 0.0)
+
+    def map(self, func, urls, max_workers=5):
+        """Run func(url) for every URL on max_workers threads and yield (url, future) as each finishes."""
+        with self.lock:
+            for url in urls:
+                self._state(self.host_of(url)).pending.append(url)
+        queued = sum(len(state.pending) for state in self.hosts.values())
+
+        def task(host, url):
+            self.local.slot = host
+            try:
+                return func(url)
+            finally:
+                self._release_slot()
+
+        def submit(executor, function, *args):
+            future = executor.submit(function, *args)
+            future.add_done_callback(lambda _: self.wakeup.set())
+            return future
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            running = {}
+            while queued or running:
+                # Cleared before looking at the hosts, so a release or completion after the look is not missed.
+                self.wakeup.clear()
+                timeout = None
+                dispatched = True
+                with self.lock:
+                    now = time.monotonic()
+                    # Hand out one URL per ready host per round until the workers or the ready hosts run out.
+                    while dispatched and len(running) < max_workers:
+                        dispatched = False
+                        timeout = None
+                        for host, state in list(self.hosts.items()):
+                            if len(running) >= max_workers:
+                                break
+                            if not state.pending:
+                                continue
+                            if self.respect_crawl_delay and host not in self.crawl_delays:
+                                self.crawl_delays[host] = _FETCHING
+                                running[submit(executor, self.crawl_delay, state.pending[0])] = (host, None)
+                                continue
+                            wait_time = self._wait_time(host, state, now)
+                            if wait_time is None:
+                                continue
+                            if wait_time > 0:
+                                timeout = wait_time if timeout is None else min(timeout, wait_time)
+                                continue
+
+                            url = state.pending.popleft()
+                            queued -= 1
+                            state.active += 1
+                            if state.bucket is not None:
+                                state.bucket.take(now)
+                            delay = self.crawl_delays.get(host) if self.respect_crawl_delay else None
+                            if delay:
+                                state.not_before = max(state.not_before, now + delay)
+                            # The next round starts with the hosts that did not just get a worker.
+                            self.hosts.move_to_end(host)
+                            running[submit(executor, task, host, url)] = (host, url)
+                            dispatched = True
+
+                done = [future for future in running if future.done()]
+                if not done:
+                    self.wakeup.wait(timeout)
+                for future in done:
+                    host, url = running.pop(future)
+                    if url is None:
+                        with self.lock:
+                            self.crawl_delays[host] = future.result() if future.exception() is None else None
+                        continue
+                    yield url, future
+
+    def _release_slot(self):
+        # Free the concurrency slot the current worker holds on its host, once.
+        host = getattr(self.local, "slot", None)
+        if host is None:
+            return
+        self.local.slot = None
+        with self.lock:
+            self.hosts[host].active -= 1
+        self.wakeup.set()
+
+    def record_response(self, url, response):
+        """Adapt the host's pacing to a response: back off on 429/503, recover on success."""
+        retries = getattr(response.raw, "retries", None)
+        statuses = [entry.status for entry in retries.history] if retries else []
+        statuses.append(response.status_code)
+
+        with self.lock:
+            state = self.hosts.get(self.host_of(url))
+            if state is None:
+                return
+            if any(status in BACKOFF_STATUSES for status in statuses):
+                self.throttled += 1
+                state.backoff = min(max(state.backoff * 2, self.backoff), self.max_backoff)
+                retry_after = min(retry_after_seconds(response.headers.get("Retry-After")) or 0.0, self.max_backoff)
+                state.not_before = max(state.not_before, time.monotonic() + max(state.backoff, retry_after))
+                state.limit = max(1, state.limit // 2)
+                state.successes = 0
+            else:
+                state.backoff = state.backoff / 2 if state.backoff > self.backoff else 0.0
+                # Additive increase: one more concurrent request after a full window of successes.
+                state.successes += 1
+                if state.successes >= state.limit and state.limit < self.max_per_host:
+                    state.limit += 1
+                    state.successes = 0
+
+    def release(self, url):
+        """Free the slot the calling worker holds on url's host, once the response body has been read."""
+        if getattr(self.local, "slot", None) == self.host_of(url):
+            self._release_slot()
+
+    def summary(self):
+        """Return a one-line report of throttling and crawl delays."""
+        delays = {host: delay for host, delay in self.crawl_delays.items() if isinstance(delay, float)}
+        text = f"{len(self.hosts)} host{'s' if len(self.hosts) != 1 else ''}, {self.throttled} throttled responses"
+        if delays:
+            text += ", crawl delays: " + ", ".join(f"{host} {delay:g}s" for host, delay in delays.items())
+        return text
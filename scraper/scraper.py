@@ -1,13 +1,340 @@
+import codecs
+import re
+import time
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-def fetch_html(url):
-    """Fetch HTML content from a given URL!"""
-    try: 
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        return response.text
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching {url}: {e}")
+from scraper.metrics import get_metrics, timed
+
+# Responses worth retrying: rate limiting and transient server errors.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Content-Type prefixes fetched as pages by default; responses without a Content-Type are fetched too.
+PAGE_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+
+# Bytes at the start of a page searched for a <meta> charset declaration.
+SNIFF_BYTES = 4096
+
+# Bytes at the start of a page given to charset detection when it declares no encoding and is not UTF-8.
+DETECT_BYTES = 65536
+
+CHARSET_PARAM = re.compile(r'charset\s*=\s*["\']?([^"\';\s]+)', re.IGNORECASE)
+META_CHARSET = re.compile(rb'<meta[^>]+?charset\s*=\s*["\']?\s*([a-zA-Z0-9_.:-]+)', re.IGNORECASE)
+
+BOMS = ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"))
+
+class ResponseTooLarge(requests.exceptions.RequestException):
+    """The response body is larger than the fetcher's max_bytes."""
+
+def _codec(name):
+    try:
+        return codecs.lookup(name).name if name else None
+    except LookupError:
         return None
-    
-    
\ No newline at end of file
+
+def page_encoding(content_type, head):
+    """Return the encoding a page declares: a byte order mark, the Content-Type charset or a <meta> charset.
+
+    head is the start of the body; only its first SNIFF_BYTES are searched. Returns
+    None when the page declares nothing usable.
+    """
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+    declared = CHARSET_PARAM.search(content_type or "")
+    encoding = _codec(declared and declared.group(1))
+    if encoding is None:
+        declared = META_CHARSET.search(head, 0, SNIFF_BYTES)
+        encoding = _codec(declared and declared.group(1).decode("ascii"))
+    return encoding
+
+def guess_encoding(body, final=True):
+    """Return "utf-8" if body decodes as UTF-8 (a truncated last character is fine unless final), else a detected encoding.
+
+    Statistical detection only runs on bodies that are not UTF-8, over their first DETECT_BYTES.
+    """
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(body, final)
+        return "utf-8"
+    except UnicodeDecodeError:
+        from requests.compat import chardet
+
+        return _codec(chardet.detect(bytes(body[:DETECT_BYTES]))["encoding"]) or "utf-8"
+
+def decode_page(body, content_type=""):
+    """Decode a page body with the encoding it declares, guessing only when it declares none."""
+    encoding = page_encoding(content_type, body) or guess_encoding(body)
+    return body.decode(encoding, errors="replace")
+
+class Fetcher:
+    """Shared HTTP client with pooled keep-alive connections, retries and backoff.
+
+    Each host gets its own connection pool holding up to max_workers connections,
+    so parallel and recursive crawls reuse TCP/TLS connections instead of opening
+    a new one per request. Retry-After headers on 429/503 are honoured.
+    With a ResponseCache, pages are revalidated with conditional requests and
+    a 304 reuses the cached body. With a HostScheduler, every response is reported
+    to it so it can pace and back off each host.
+
+    Pages are streamed: a response whose Content-Type does not start with one of
+    page_types is skipped before its body is read, and one larger than max_bytes is
+    abandoned as soon as that is known. Bodies are decoded once, with the encoding
+    from the headers or a <meta> tag in the first bytes; the body is only run through
+    charset detection when it declares nothing and is not UTF-8. With a PageArchive,
+    every page body read from the network is also appended to it with its headers.
+    """
+
+    def __init__(self, max_workers=5, retries=3, backoff=0.5, connect_timeout=5, read_timeout=10, cache=None,
+                 host_scheduler=None, max_bytes=None, page_types=PAGE_TYPES, archive=None):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_workers = max_workers
+        self.cache = cache
+        self.host_scheduler = host_scheduler
+        self.max_bytes = max_bytes
+        self.page_types = tuple(page_types or ())
+        self.archive = archive
+        self.retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=["GET", "HEAD"],
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        self.session = self.new_session(max_workers)
+
+    def new_session(self, pool_size):
+        """Return a session with this fetcher's retries and its own pools of pool_size connections per host."""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max(10, pool_size), pool_maxsize=pool_size, max_retries=self.retry)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def get(self, url, session=None, **kwargs):
+        """Send a GET request through the shared session, or through session if given.
+
+        A streamed response keeps its host scheduler slot until the caller has read
+        the body and calls _release_host().
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        response = (session or self.session).get(url, **kwargs)
+        if self.host_scheduler is not None:
+            self.host_scheduler.record_response(url, response)
+            if not kwargs.get("stream"):
+                self.host_scheduler.release(url)
+        return response
+
+    def _release_host(self, url):
+        if self.host_scheduler is not None:
+            self.host_scheduler.release(url)
+
+    def _cached_get(self, url, **kwargs):
+        """GET url, revalidating any cached copy. Returns (response, cached_body)."""
+        entry = self.cache.lookup(url) if self.cache else None
+        if entry is None:
+            return self.get(url, **kwargs), None
+        if self.cache.is_fresh(entry):
+            return None, entry["body"]
+
+        response = self.get(url, headers=self.cache.conditional_headers(entry), **kwargs)
+        if response.status_code == 304:
+            response.close()
+            self.cache.refresh(url)
+            return None, entry["body"]
+        return response, None
+
+    def fetch_html(self, url):
+        """Fetch HTML content from a given URL!"""
+        with timed("fetch_html", url):
+            started = time.perf_counter()
+            try:
+                response, cached_body = self._cached_get(url, stream=True)
+                if response is None:
+                    return cached_body
+                with response:
+                    try:
+                        response.raise_for_status()
+                        if not self._is_page(url, response):
+                            return None
+                        body = self._read_body(response)
+                    finally:
+                        self._record_response(url, response, started)
+                if self.archive is not None:
+                    self.archive.write(url, response.status_code, response.reason, response.headers, body)
+                html = decode_page(body, response.headers.get("Content-Type"))
+                if self.cache:
+                    self.cache.store(url, html, response.headers)
+                return html
+            except requests.exceptions.RequestException as e:
+                self._record_error(url, e)
+                print(f"Error fetching {url}: {e}")
+                return None
+            finally:
+                self._release_host(url)
+
+    def _is_page(self, url, response):
+        """Return True if the response's Content-Type is one of page_types (or missing); report a skip otherwise."""
+        content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if not content_type or not self.page_types or content_type.startswith(self.page_types):
+            return True
+        print(f"[I] Skipping {url}: content type {content_type}")
+        return False
+
+    def _check_length(self, response):
+        length = response.headers.get("Content-Length")
+        if self.max_bytes and length and length.isdigit() and int(length) > self.max_bytes:
+            raise ResponseTooLarge(f"{length} bytes is over the {self.max_bytes} byte limit", response=response)
+
+    def _read_body(self, response, chunk_size=65536):
+        """Read a streamed body into one buffer, raising ResponseTooLarge past max_bytes."""
+        self._check_length(response)
+        body = bytearray()
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            body += chunk
+            if self.max_bytes and len(body) > self.max_bytes:
+                raise ResponseTooLarge(f"over the {self.max_bytes} byte limit", response=response)
+        return body
+
+    def _record_response(self, url, response, started, size=None):
+        """Record the connect/download split, bytes, status and retries of a response in the metrics."""
+        metrics = get_metrics()
+        if metrics is None:
+            return
+        total = time.perf_counter() - started
+        connect = min(response.elapsed.total_seconds(), total)
+        metrics.observe("fetch_html.connect", connect, url)
+        if size is None:
+            metrics.observe("fetch_html.download", total - connect, url)
+            # Bytes read from the socket, before any gzip/deflate decoding.
+            size = response.raw.tell() if response.raw is not None else len(response.content)
+        retries = getattr(response.raw, "retries", None)
+        metrics.record_response(url, response.status_code, size, len(retries.history) if retries else 0)
+
+    def _record_error(self, url, error):
+        metrics = get_metrics()
+        if metrics is not None:
+            metrics.record_error(url, error)
+
+    def fetch_html_chunks(self, url, chunk_size=65536):
+        """Fetch a URL and return an iterator over decoded HTML chunks as they arrive."""
+        started = time.perf_counter()
+        try:
+            response, cached_body = self._cached_get(url, stream=True)
+            if response is None:
+                self._release_host(url)
+                return iter([cached_body])
+            if get_metrics() is not None and not response.ok:
+                self._record_response(url, response, started, size=0)
+            response.raise_for_status()
+            if not self._is_page(url, response):
+                response.close()
+                self._release_host(url)
+                return None
+            self._check_length(response)
+        except requests.exceptions.RequestException as e:
+            self._record_error(url, e)
+            self._release_host(url)
+            print(f"Error fetching {url}: {e}")
+            return None
+
+        chunks = self._decoded_chunks(url, response, chunk_size)
+        if get_metrics() is not None:
+            chunks = self._measured_chunks(url, response, chunks, started)
+        if self.cache:
+            self.cache.invalidate_extracted(url)
+            return self._store_chunks(url, chunks, response.headers)
+        return chunks
+
+    def _decoded_chunks(self, url, response, chunk_size):
+        # The encoding is picked from the first SNIFF_BYTES, then chunks are decoded
+        # incrementally as they arrive; past max_bytes the download is abandoned.
+        # With an archive, the raw bytes are kept and archived once the body is complete.
+        # The host scheduler slot is held until the body is read or the download ends.
+        try:
+            raw = response.iter_content(chunk_size=chunk_size)
+            head = bytearray()
+            for chunk in raw:
+                head += chunk
+                if len(head) >= SNIFF_BYTES:
+                    break
+            encoding = page_encoding(response.headers.get("Content-Type"), head) or guess_encoding(head, final=False)
+            decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+            size = len(head)
+            text = decoder.decode(head)
+            body = head if self.archive is not None else None
+            del head
+            with response:
+                for chunk in raw:
+                    if text:
+                        yield text
+                    size += len(chunk)
+                    if self.max_bytes and size > self.max_bytes:
+                        raise ResponseTooLarge(f"over the {self.max_bytes} byte limit", response=response)
+                    if body is not None:
+                        body += chunk
+                    text = decoder.decode(chunk)
+                text += decoder.decode(b"", True)
+        finally:
+            self._release_host(url)
+        if body is not None:
+            self.archive.write(url, response.status_code, response.reason, response.headers, body)
+        if text:
+            yield text
+
+    def _measured_chunks(self, url, response, chunks, started):
+        # The body downloads while the caller extracts from it, so only the time spent
+        # waiting for chunks counts as fetch_html, and it is left out of the caller's stage.
+        metrics = get_metrics()
+        waiting = time.perf_counter() - started
+        for_chunk = time.perf_counter()
+        for chunk in chunks:
+            spent = time.perf_counter() - for_chunk
+            waiting += spent
+            metrics.exclude(spent)
+            yield chunk
+            for_chunk = time.perf_counter()
+        spent = time.perf_counter() - for_chunk
+        waiting += spent
+        metrics.exclude(spent)
+        metrics.observe("fetch_html", waiting, url)
+        metrics.observe("fetch_html.download", max(waiting - response.elapsed.total_seconds(), 0.0), url)
+        self._record_response(url, response, started, size=response.raw.tell())
+
+    def _store_chunks(self, url, chunks, headers):
+        body = []
+        for chunk in chunks:
+            body.append(chunk)
+            yield chunk
+        self.cache.store(url, "".join(body), headers)
+
+    def close(self):
+        self.session.close()
+        if self.cache:
+            self.cache.close()
+
+_fetcher = None
+
+def configure_fetcher(**kwargs):
+    """Replace the shared fetcher with one built from the given Fetcher options."""
+    global _fetcher
+    if _fetcher is not None:
+        _fetcher.close()
+    _fetcher = Fetcher(**kwargs)
+    return _fetcher
+
+def get_fetcher():
+    """Return the fetcher shared by every caller, creating a default one on first use."""
+    if _fetcher is None:
+        return configure_fetcher()
+    return _fetcher
+
+def fetch_html(url):
+    """Fetch HTML content from a given URL using the shared fetcher."""
+    return get_fetcher().fetch_html(url)
+
+def fetch_html_chunks(url, chunk_size=65536):
+    """Fetch a URL through the shared fetcher and iterate over decoded HTML chunks."""
+    return get_fetcher().fetch_html_chunks(url, chunk_size)
@@ -0,0 +1,307 @@
+import hashlib
+import math
+import os
+import sqlite3
+import sys
+from array import array
+
+SEEN_STORES = ("set", "fingerprint", "bloom", "sqlite")
+
+def fingerprint(key):
+    """Return a 64-bit fingerprint of a string; collisions are negligible below billions of keys."""
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+class SeenStore:
+    """Set-like record of keys already seen, with add() reporting whether a key is new.
+
+    Subclasses trade exactness for memory; memory_bytes() reports what the store holds in RAM.
+    """
+
+    def add(self, key):
+        """Record key and return True if it was not seen before."""
+        raise NotImplementedError
+
+    def __contains__(self, key):
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def memory_bytes(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class MemorySeen(SeenStore):
+    """Exact store backed by a Python set of the keys themselves."""
+
+    def __init__(self):
+        self.keys = set()
+
+    def add(self, key):
+        if key in self.keys:
+            return False
+        self.keys.add(key)
+        return True
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def __len__(self):
+        return len(self.keys)
+
+    def memory_bytes(self):
+        return sys.getsizeof(self.keys) + sum(sys.getsizeof(key) for key in self.keys)
+
+class FingerprintSet(SeenStore):
+    """Open-addressing hash set of 64-bit fingerprints in a flat array, 8 bytes per slot.
+
+    Roughly 16 bytes per key at the maximum load of one half, against ~100 for a set of URL strings.
+    """
+
+    def __init__(self, capacity=1024):
+        size = 1
+        while size < capacity * 2:
+            size *= 2
+        self.slots = array("Q", bytes(8 * size))
+        self.mask = size - 1
+        self.count = 0
+
+    def _find(self, fp):
+        # Linear probing; 0 marks an empty slot, so fingerprints never take that value.
+        i = fp & self.mask
+        slots = self.slots
+        while slots[i] and slots[i] != fp:
+            i = (i + 1) & self.mask
+        return i
+
+    def add(self, key):
+        fp = fingerprint(key) or 1
+        i = self._find(fp)
+        if self.slots[i]:
+            return False
+        self.slots[i] = fp
+        self.count += 1
+        if self.count * 2 > len(self.slots):
+            self._grow()
+        return True
+
+    def _grow(self):
+        old = self.slots
+        self.slots = array("Q", bytes(16 * len(old)))
+        self.mask = len(self.slots) - 1
+        for fp in old:
+            if fp:
+                self.slots[self._find(fp)] = fp
+
+    def __contains__(self, key):
+        return bool(self.slots[self._find(fingerprint(key) or 1)])
+
+    def __len__(self):
+        return self.count
+
+    def memory_bytes(self):
+        return self.slots.itemsize * len(self.slots)
+
+class BloomFilter:
+    """Fixed-size Bloom filter sized for capacity keys at error_rate false positives."""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def contains(self, h1, h2):
+        # Double hashing: the k positions are h1 + i * h2, stepping through the bit array.
+        size, bits = self.size, self.bits
+        pos, step = h1 % size, h2 % size or 1
+        for _ in range(self.hashes):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+            pos += step
+            if pos >= size:
+                pos -= size
+        return True
+
+    def add(self, h1, h2):
+        size, bits = self.size, self.bits
+        pos, step = h1 % size, h2 % size or 1
+        for _ in range(self.hashes):
+            bits[pos >> 3] |= 1 << (pos & 7)
+            pos += step
+            if pos >= size:
+                pos -= size
+        self.count += 1
+
+class ScalableBloomFilter(SeenStore):
+    """Bloom filter that grows by adding larger filters as it fills up.
+
+    Each new filter doubles the capacity and halves the error rate, so the overall
+    false positive rate stays below error_rate however many keys are added. A false
+    positive makes add() report a new key as already seen, so it is skipped.
+    """
+
+    def __init__(self, capacity=100000, error_rate=0.001):
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.initial_capacity = capacity
+        self.error_rate = error_rate
+        self.filters = []
+        self._add_filter()
+
+    def _add_filter(self):
+        n = len(self.filters)
+        self.filters.append(BloomFilter(self.initial_capacity * 2 ** n, self.error_rate * 0.5 ** (n + 1)))
+
+    @staticmethod
+    def _hashes(key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+    def add(self, key):
+        h1, h2 = self._hashes(key)
+        if any(bloom.contains(h1, h2) for bloom in self.filters):
+            return False
+        if self.filters[-1].count >= self.filters[-1].capacity:
+            self._add_filter()
+        self.filters[-1].add(h1, h2)
+        return True
+
+    def __contains__(self, key):
+        h1, h2 = self._hashes(key)
+        return any(bloom.contains(h1, h2) for bloom in self.filters)
+
+    def __len__(self):
+        return sum(bloom.count for bloom in self.filters)
+
+    def memory_bytes(self):
+        return sum(len(bloom.bits) for bloom in self.filters)
+
+# Open SQLite seen files by absolute path: [connection, number of stores using it].
+_sqlite_files = {}
+
+class SqliteSeen(SeenStore):
+    """Exact store of 64-bit fingerprints in an on-disk SQLite table; RAM use is the page cache.
+
+    Several stores can share one database file under different names; each starts
+    empty. Stores in one file share one connection, so a batch of uncommitted adds to
+    one table never locks the others out. Without a path, a temporary file is used
+    and removed on close().
+    """
+
+    def __init__(self, path=None, name="seen", cache_pages=2000, batch_size=1000):
+        self.temporary = path is None
+        if self.temporary:
+            import tempfile
+            fd, path = tempfile.mkstemp(suffix=".sqlite", prefix="seen-")
+            os.close(fd)
+        self.path = path
+        self.table = f"seen_{name}"
+        self.cache_pages = cache_pages
+        self.batch_size = batch_size
+        self.pending = 0
+        self.count = 0
+
+        self.key = os.path.abspath(path)
+        shared = _sqlite_files.get(self.key)
+        if shared is None:
+            conn = sqlite3.connect(path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute(f"PRAGMA cache_size={int(cache_pages)}")
+            shared = _sqlite_files[self.key] = [conn, 0]
+        shared[1] += 1
+        self.conn = shared[0]
+        self.conn.execute(f"DROP TABLE IF EXISTS {self.table}")
+        self.conn.execute(f"CREATE TABLE {self.table} (fp INTEGER PRIMARY KEY) WITHOUT ROWID")
+
+    @staticmethod
+    def _key(key):
+        # SQLite integers are signed 64-bit.
+        fp = fingerprint(key)
+        return fp - (1 << 64) if fp >= 1 << 63 else fp
+
+    def add(self, key):
+        cursor = self.conn.execute(f"INSERT OR IGNORE INTO {self.table} (fp) VALUES (?)", (self._key(key),))
+        if not cursor.rowcount:
+            return False
+        self.count += 1
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.conn.commit()
+            self.pending = 0
+        return True
+
+    def __contains__(self, key):
+        return self.conn.execute(f"SELECT 1 FROM {self.table} WHERE fp = ?", (self._key(key),)).fetchone() is not None
+
+    def __len__(self):
+        return self.count
+
+    def memory_bytes(self):
+        page_size, page_count = (self.conn.execute(f"PRAGMA {pragma}").fetchone()[0] for pragma in ("page_size", "page_count"))
+        return page_size * min(page_count, self.cache_pages)
+
+    def close(self):
+        self.conn.commit()
+        shared = _sqlite_files[self.key]
+        shared[1] -= 1
+        if shared[1]:
+            return
+        del _sqlite_files[self.key]
+        self.conn.close()
+        if self.temporary:
+            for suffix in ("", "-wal", "-shm"):
+                try:
+                    os.remove(self.path + suffix)
+                except FileNotFoundError:
+                    pass
+
+class UniqueValues:
+    """Insertion-ordered, exactly deduplicated values, usable where a set was updated.
+
+    Merged values are all output, so they are held in memory anyway and are not
+    deduplicated through a SeenStore: a false positive would drop a real value.
+    """
+
+    def __init__(self):
+        self.values = {}
+
+    def update(self, values):
+        for value in values:
+            self.values.setdefault(value)
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def memory_bytes(self):
+        return sys.getsizeof(self.values) + sum(sys.getsizeof(value) for value in self.values)
+
+def open_seen_store(kind="set", path=None, name="seen", error_rate=0.001, capacity=None):
+    """Open a visited/dedup store: "set", "fingerprint", "bloom" or "sqlite" (at path, or a temporary file).
+
+    capacity is the initial size; fingerprint and bloom stores grow past it as needed.
+    """
+    if kind == "set":
+        return MemorySeen()
+    if kind == "fingerprint":
+        return FingerprintSet(capacity or 1024)
+    if kind == "bloom":
+        return ScalableBloomFilter(capacity or 10000, error_rate)
+    if kind == "sqlite":
+        return SqliteSeen(path, name)
+    raise ValueError(f"Unknown seen store: {kind}")
+
+def format_bytes(size):
+    """Return a byte count as a short human-readable string."""
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
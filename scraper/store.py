@@ -0,0 +1,189 @@
+import json
+import sqlite3
+import time
+from urllib.parse import urljoin, urlsplit
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at TEXT
+);
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER REFERENCES runs (id),
+    url TEXT,
+    domain TEXT,
+    title TEXT,
+    error TEXT,
+    UNIQUE (run_id, url)
+);
+CREATE TABLE IF NOT EXISTS links (page_id INTEGER REFERENCES pages (id), value TEXT, domain TEXT, UNIQUE (page_id, value));
+CREATE TABLE IF NOT EXISTS emails (page_id INTEGER REFERENCES pages (id), value TEXT, domain TEXT, UNIQUE (page_id, value));
+CREATE TABLE IF NOT EXISTS phones (page_id INTEGER REFERENCES pages (id), value TEXT, UNIQUE (page_id, value));
+CREATE TABLE IF NOT EXISTS images (page_id INTEGER REFERENCES pages (id), value TEXT, domain TEXT, UNIQUE (page_id, value));
+CREATE TABLE IF NOT EXISTS documents (page_id INTEGER REFERENCES pages (id), value TEXT, domain TEXT, UNIQUE (page_id, value));
+CREATE TABLE IF NOT EXISTS social (page_id INTEGER REFERENCES pages (id), platform TEXT, value TEXT, UNIQUE (page_id, platform, value));
+CREATE TABLE IF NOT EXISTS metadata (page_id INTEGER REFERENCES pages (id), name TEXT, value TEXT, UNIQUE (page_id, name, value));
+CREATE TABLE IF NOT EXISTS tables (page_id INTEGER REFERENCES pages (id), table_index INTEGER, data TEXT, UNIQUE (page_id, table_index));
+
+CREATE INDEX IF NOT EXISTS pages_url ON pages (url);
+CREATE INDEX IF NOT EXISTS pages_domain ON pages (domain);
+CREATE INDEX IF NOT EXISTS links_value ON links (value);
+CREATE INDEX IF NOT EXISTS links_domain ON links (domain);
+CREATE INDEX IF NOT EXISTS emails_value ON emails (value);
+CREATE INDEX IF NOT EXISTS emails_domain ON emails (domain);
+CREATE INDEX IF NOT EXISTS phones_value ON phones (value);
+CREATE INDEX IF NOT EXISTS images_value ON images (value);
+CREATE INDEX IF NOT EXISTS images_domain ON images (domain);
+CREATE INDEX IF NOT EXISTS documents_value ON documents (value);
+CREATE INDEX IF NOT EXISTS documents_domain ON documents (domain);
+CREATE INDEX IF NOT EXISTS social_value ON social (value);
+CREATE INDEX IF NOT EXISTS metadata_name ON metadata (name, value);
+'''
+
+# Tables holding one value per row, and whether they have a domain column.
+VALUE_TABLES = {
+    "links": True,
+    "emails": True,
+    "phones": False,
+    "images": True,
+    "documents": True,
+    "social": False,
+    "metadata": False,
+}
+
+QUERY_KINDS = ("pages",) + tuple(VALUE_TABLES)
+
+def _url_domain(value, base):
+    try:
+        return (urlsplit(urljoin(base or "", value)).hostname or "").lower() or None
+    except ValueError:
+        return None
+
+def _email_domain(value):
+    return value.rsplit("@", 1)[-1].lower()
+
+class ResultStore:
+    """Normalized SQLite store of scraping results, queryable through indexes.
+
+    Every page gets a row in pages keyed by (run, url); each extracted value is a
+    row in the table for its category, with UNIQUE constraints dropping duplicates
+    on insert and indexes on values and domains for lookups across runs.
+    """
+
+    def __init__(self, filename):
+        self.conn = sqlite3.connect(filename)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def start_run(self):
+        """Register a new crawl run and return its id."""
+        with self.conn:
+            cursor = self.conn.execute("INSERT INTO runs (started_at) VALUES (?)", (time.strftime('%Y-%m-%d %H:%M:%S'),))
+        return cursor.lastrowid
+
+    def add_page(self, run_id, url, data):
+        """Insert one page's results; call commit() to make them durable."""
+        metadata = data.get("metadata") or {}
+        title = metadata.get("title") if isinstance(metadata.get("title"), str) else None
+        self.conn.execute(
+            "INSERT OR IGNORE INTO pages (run_id, url, domain, title, error) VALUES (?, ?, ?, ?, ?)",
+            (run_id, url, _url_domain(url, None), title, data.get("error"))
+        )
+        page_id = self.conn.execute("SELECT id FROM pages WHERE run_id = ? AND url = ?", (run_id, url)).fetchone()[0]
+
+        def values(key):
+            return [value for value in data.get(key) or [] if isinstance(value, str)]
+
+        for key in ("links", "images", "documents"):
+            self.conn.executemany(
+                f"INSERT OR IGNORE INTO {key} (page_id, value, domain) VALUES (?, ?, ?)",
+                [(page_id, value, _url_domain(value, url)) for value in values(key)]
+            )
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO emails (page_id, value, domain) VALUES (?, ?, ?)",
+            [(page_id, value, _email_domain(value)) for value in values("emails")]
+        )
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO phones (page_id, value) VALUES (?, ?)",
+            [(page_id, value) for value in values("phones")]
+        )
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO social (page_id, platform, value) VALUES (?, ?, ?)",
+            [(page_id, platform, link) for platform, links in (data.get("social") or {}).items() for link in links]
+        )
+
+        rows = []
+        for name, value in metadata.items():
+            for item in value if isinstance(value, list) else [value]:
+                rows.append((page_id, name, item))
+        self.conn.executemany("INSERT OR IGNORE INTO metadata (page_id, name, value) VALUES (?, ?, ?)", rows)
+
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO tables (page_id, table_index, data) VALUES (?, ?, ?)",
+            [(page_id, table.get("table_index", i), json.dumps(table)) for i, table in enumerate(data.get("tables") or [])]
+        )
+        return page_id
+
+    def commit(self):
+        self.conn.commit()
+
+    def query(self, kind, domain=None, value=None, run_id=None, limit=None):
+        """Return (page_url, value) rows of kind, filtered through the indexes.
+
+        domain matches the value's domain (the email domain for emails, the host
+        for links, images and documents, the page host for pages); value matches
+        exactly, or by metadata name for metadata.
+        """
+        if kind not in QUERY_KINDS:
+            raise ValueError(f"Unknown query: {kind}")
+
+        if kind == "pages":
+            sql = "SELECT p.url, p.title FROM pages p"
+            conditions, params = [], []
+            if domain:
+                conditions.append("p.domain = ?")
+                params.append(domain.lower())
+            if value:
+                conditions.append("p.url = ?")
+                params.append(value)
+        else:
+            column = "t.name || ': ' || t.value" if kind == "metadata" else "t.value"
+            if kind == "social":
+                column = "t.platform || ': ' || t.value"
+            sql = f"SELECT p.url, {column} FROM {kind} t JOIN pages p ON p.id = t.page_id"
+            conditions, params = [], []
+            if domain:
+                if VALUE_TABLES[kind]:
+                    conditions.append("t.domain = ?")
+                else:
+                    conditions.append("p.domain = ?")
+                params.append(domain.lower())
+            if value:
+                conditions.append("t.name = ?" if kind == "metadata" else "t.value = ?")
+                params.append(value)
+
+        if run_id is not None:
+            conditions.append("p.run_id = ?")
+            params.append(run_id)
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return self.conn.execute(sql, params).fetchall()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+def store_results(filename, data, url=None):
+    """Save a results dict (one page, a crawl summary or {url: page}) as a new run."""
+    from scraper.output import iter_pages
+
+    store = ResultStore(filename)
+    run_id = store.start_run()
+    for page_url, page_data in iter_pages(data, url):
+        store.add_page(run_id, page_url, page_data)
+    store.close()
@@ -0,0 +1,178 @@
+import re
+from html.parser import HTMLParser
+
+from scraper.extractors import (
+    FIELDS,
+    EMAIL_PATTERN,
+    INVISIBLE_TAGS,
+    ParsedDocument,
+    classify_social_links,
+    download_images,
+    extract_phone_numbers,
+    extract_tables,
+    filter_document_links,
+    get_phone_mode,
+    phones_in_tel_links,
+    phones_in_text
+)
+from scraper.metrics import timed
+
+# Fields that are collected from tag and text events; the others only need the raw chunks.
+TOKENIZED_FIELDS = ("links", "social", "authors", "images", "metadata", "documents")
+
+# Trailing run of characters an email address can contain; kept back so a match is never split between chunks.
+_EMAIL_TAIL = re.compile(r"[a-zA-Z0-9_.+@-]*\Z")
+
+class StreamingExtractor(HTMLParser):
+    """Single-pass extractor that collects fields from HTML chunks without building a tree.
+
+    Feed chunks as they arrive and call close() to get the same dict extract_all() returns.
+    Only tables (built from a tree) and phones in "raw" mode (matched over the whole
+    HTML) keep the page in memory, and only when they are requested. In "visible"
+    mode phones are matched text node by text node as the page streams past.
+    """
+
+    def __init__(self, fields=None, country="US", download_images=False, phone_mode=None, base_url=None):
+        super().__init__(convert_charrefs=True)
+        self.fields = tuple(fields or FIELDS)
+        for field in self.fields:
+            if field not in FIELDS:
+                raise ValueError(f"Unknown field: {field}")
+
+        self.country = country
+        self.download_images = download_images
+        self.base_url = base_url
+        self.phone_mode = phone_mode or get_phone_mode()
+        self.phones = []
+        self._text = []
+        self._invisible = None
+        self.hrefs = []
+        self.img_urls = []
+        self.authors = []
+        self.meta = []
+        self.emails = []
+        self.title = None
+        self._in_title = False
+        self._email_tail = ""
+        buffered = "tables" in self.fields or ("phones" in self.fields and self.phone_mode == "raw")
+        self._buffer = [] if buffered else None
+        self._visible_phones = "phones" in self.fields and self.phone_mode == "visible"
+        self._tokenize = self._visible_phones or any(field in TOKENIZED_FIELDS for field in self.fields)
+
+    def feed(self, chunk):
+        if self._buffer is not None:
+            self._buffer.append(chunk)
+        if "emails" in self.fields:
+            self._scan_emails(chunk)
+        if self._tokenize:
+            super().feed(chunk)
+
+    def _scan_emails(self, chunk):
+        text = self._email_tail + chunk
+        split = _EMAIL_TAIL.search(text).start()
+        self.emails.extend(EMAIL_PATTERN.findall(text, 0, split))
+        self._email_tail = text[split:]
+
+    def _flush_text(self):
+        # Text can arrive in several handle_data calls; match phones on the whole text node.
+        if self._text:
+            self.phones.extend(phones_in_text("".join(self._text), self.country))
+            self._text = []
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_text()
+        if tag in INVISIBLE_TAGS:
+            self._invisible = tag
+        if tag == "a":
+            attrs = dict(attrs)
+            if "href" in attrs:
+                self.hrefs.append(attrs["href"] or "")
+        elif tag == "img":
+            src = dict(attrs).get("src")
+            if src:
+                self.img_urls.append(src)
+        elif tag == "meta":
+            attrs = dict(attrs)
+            if attrs.get("name") == "author":
+                self.authors.append(attrs.get("content"))
+            name = attrs.get("name") or attrs.get("property")
+            if name:
+                self.meta.append((name, attrs.get("content") or ""))
+        elif tag == "title" and self.title is None:
+            self._in_title = True
+            self.title = ""
+
+    def handle_endtag(self, tag):
+        self._flush_text()
+        if tag == self._invisible:
+            self._invisible = None
+        if tag == "title":
+            self._in_title = False
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        if self._visible_phones and self._invisible is None:
+            self._text.append(data)
+
+    def handle_comment(self, data):
+        self._flush_text()
+
+    def handle_decl(self, decl):
+        self._flush_text()
+
+    def handle_pi(self, data):
+        self._flush_text()
+
+    def unknown_decl(self, data):
+        self._flush_text()
+
+    def close(self):
+        """Flush the parser and return the extracted fields."""
+        super().close()
+        self._flush_text()
+        if "emails" in self.fields:
+            self.emails.extend(EMAIL_PATTERN.findall(self._email_tail))
+            self._email_tail = ""
+
+        html = "".join(self._buffer) if self._buffer is not None else None
+        self._buffer = None
+
+        extractors = {
+            'links': lambda: list(self.hrefs),
+            'emails': lambda: self.emails,
+            'social': lambda: classify_social_links(self.hrefs),
+            'authors': lambda: self.authors,
+            'phones': lambda: (
+                self.phones + phones_in_tel_links(self.hrefs, self.country)
+                if self.phone_mode == "visible"
+                else extract_phone_numbers(html, self.country, "raw")
+            ),
+            'images': lambda: download_images(self.img_urls, base_url=self.base_url) if self.download_images else self.img_urls,
+            'metadata': self._metadata,
+            'documents': lambda: filter_document_links(self.hrefs),
+            'tables': lambda: extract_tables(ParsedDocument(html)),
+        }
+        return {field: extractors[field]() for field in self.fields}
+
+    def _metadata(self):
+        metadata = {'title': self.title or ""}
+        for name, content in self.meta:
+            if name in metadata:
+                if isinstance(metadata[name], list):
+                    metadata[name].append(content)
+                else:
+                    metadata[name] = [metadata[name], content]
+            else:
+                metadata[name] = content
+        return metadata
+
+def extract_streaming(chunks, fields=None, country="US", download_images=False, phone_mode=None, base_url=None):
+    """Run the streaming extractor over a string or an iterable of string chunks."""
+    with timed("extract_streaming", base_url):
+        extractor = StreamingExtractor(fields, country, download_images, phone_mode, base_url)
+        if isinstance(chunks, str):
+            chunks = [chunks]
+        for chunk in chunks:
+            extractor.feed(chunk)
+        return extractor.close()
@@ -0,0 +1,38 @@
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+def normalize_url(url, base=None):
+    """Resolve url against base and return a canonical key, or None if it is not http(s).
+
+    The scheme and host are lowercased, default ports and fragments are dropped and an
+    empty path becomes "/", so variants of the same page map to the same string.
+    """
+    if base:
+        url = urljoin(base, url.strip())
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    netloc = parts.hostname.lower()
+    if ":" in netloc:
+        netloc = f"[{netloc}]"
+    if port and port != DEFAULT_PORTS[scheme]:
+        netloc = f"{netloc}:{port}"
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
+
+def url_host(url):
+    """Return the host[:port] part of a normalized URL."""
+    return urlsplit(url).netloc
+
+def is_same_site(url, root):
+    """Return True if url is on root's host or one of its subdomains."""
+    host = urlsplit(url).hostname or ""
+    root_host = urlsplit(root).hostname or ""
+    return host == root_host or host.endswith("." + root_host)
@@ -0,0 +1,301 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+WORK_QUEUES = ("sqlite", "memory")
+
+# States of a queued URL.
+PENDING, LEASED, DONE = 0, 1, 2
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS queue (
+    id INTEGER PRIMARY KEY,
+    url TEXT UNIQUE NOT NULL,
+    depth INTEGER NOT NULL,
+    state INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS queue_pending ON queue (state, depth, id);
+CREATE INDEX IF NOT EXISTS queue_leases ON queue (state, lease_until);
+'''
+
+def _dumps(data):
+    return None if data is None else json.dumps(data, separators=(",", ":"), default=str)
+
+class WorkQueue:
+    """Crawl frontier and results shared by any number of worker processes.
+
+    Every URL is added once (later adds of a known URL are ignored) and is pending,
+    leased or done. claim() leases a batch of pending URLs to a worker for a number
+    of seconds; complete() records the results of the worker's leased URLs together
+    with the links they found. A lease that runs out, because its worker crashed or
+    stalled, makes its URLs claimable again, so no worker coordinates the others. A
+    URL leased max_attempts times without completing is given up as failed.
+    """
+
+    def add_urls(self, urls, depth):
+        """Queue URLs found at depth; URLs already known are ignored."""
+        raise NotImplementedError
+
+    def claim(self, worker, count, lease):
+        """Lease up to count claimable URLs to worker for lease seconds and return them as (url, depth) pairs."""
+        raise NotImplementedError
+
+    def complete(self, worker, pages):
+        """Record (url, data, links, link_depth) for URLs leased to worker, queueing their links.
+
+        data is None for a page that failed. Pages whose lease worker has lost to
+        another worker are skipped; returns the number recorded.
+        """
+        raise NotImplementedError
+
+    def release(self, worker):
+        """Return the URLs still leased to worker to the queue, as if never claimed."""
+        raise NotImplementedError
+
+    def renew(self, worker, lease):
+        """Extend the leases worker still holds to lease seconds from now; returns how many were extended."""
+        raise NotImplementedError
+
+    def finished(self):
+        """Return True when every known URL is done."""
+        raise NotImplementedError
+
+    def counts(self):
+        """Return (done, leased, pending) URL counts."""
+        raise NotImplementedError
+
+    def iter_results(self):
+        """Yield (url, data) for every page done with results, in discovery order."""
+        raise NotImplementedError
+
+    def get_meta(self, key):
+        raise NotImplementedError
+
+    def set_meta(self, key, value):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class SqliteWorkQueue(WorkQueue):
+    """Work queue in a SQLite file that every worker opens.
+
+    claim() and complete() each run in one write transaction, so a batch is leased
+    to exactly one worker and a page's results and links are stored atomically.
+    Transactions are serialised, so another thread of the worker may renew() its
+    leases while the batch is being worked. The
+    default WAL journal only works for processes on one machine; for workers on
+    several machines sharing a network filesystem use journal="delete", which relies
+    on the filesystem's file locks. Leases are wall-clock times, so the machines'
+    clocks should agree to well within the lease.
+    """
+
+    def __init__(self, filename, journal="wal", max_attempts=3, timeout=60.0):
+        import sqlite3
+
+        self.filename = filename
+        self.max_attempts = max_attempts
+        # Transactions are managed explicitly so claims can take the write lock up front.
+        self.conn = sqlite3.connect(filename, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self.conn.execute(f"PRAGMA journal_mode={journal}")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def _transaction(self):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def get_meta(self, key):
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_meta(self, key, value):
+        """Store value under key unless it is already set; returns the stored value."""
+        with self._transaction():
+            self.conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+        return self.get_meta(key)
+
+    def add_urls(self, urls, depth):
+        with self._transaction():
+            self.conn.executemany("INSERT OR IGNORE INTO queue (url, depth) VALUES (?, ?)", ((url, depth) for url in urls))
+
+    def claim(self, worker, count, lease):
+        with self._transaction():
+            now = time.time()
+            self.conn.execute(
+                "UPDATE queue SET state = ?, worker = NULL WHERE state = ? AND lease_until < ? AND attempts >= ?",
+                (DONE, LEASED, now, self.max_attempts)
+            )
+            # Expired leases first: they are the oldest work in the crawl.
+            rows = self.conn.execute(
+                "SELECT id, url, depth FROM queue WHERE state = ? AND lease_until < ? ORDER BY depth, id LIMIT ?",
+                (LEASED, now, count)
+            ).fetchall()
+            if len(rows) < count:
+                rows += self.conn.execute(
+                    "SELECT id, url, depth FROM queue WHERE state = ? ORDER BY depth, id LIMIT ?",
+                    (PENDING, count - len(rows))
+                ).fetchall()
+            self.conn.executemany(
+                "UPDATE queue SET state = ?, worker = ?, lease_until = ?, attempts = attempts + 1 WHERE id = ?",
+                ((LEASED, worker, now + lease, row_id) for row_id, _, _ in rows)
+            )
+        return [(url, depth) for _, url, depth in rows]
+
+    def complete(self, worker, pages):
+        recorded = 0
+        with self._transaction():
+            for url, data, links, link_depth in pages:
+                updated = self.conn.execute(
+                    "UPDATE queue SET state = ?, worker = NULL, data = ? WHERE url = ? AND state = ? AND worker = ?",
+                    (DONE, _dumps(data), url, LEASED, worker)
+                ).rowcount
+                if not updated:
+                    continue
+                recorded += 1
+                if links:
+                    self.conn.executemany(
+                        "INSERT OR IGNORE INTO queue (url, depth) VALUES (?, ?)", ((link, link_depth) for link in links)
+                    )
+        return recorded
+
+    def release(self, worker):
+        with self._transaction():
+            self.conn.execute(
+                "UPDATE queue SET state = ?, worker = NULL, attempts = attempts - 1 WHERE state = ? AND worker = ?",
+                (PENDING, LEASED, worker)
+            )
+
+    def renew(self, worker, lease):
+        with self._transaction():
+            return self.conn.execute(
+                "UPDATE queue SET lease_until = ? WHERE state = ? AND worker = ?", (time.time() + lease, LEASED, worker)
+            ).rowcount
+
+    def finished(self):
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM queue WHERE state IN (?, ?) LIMIT 1", (PENDING, LEASED)).fetchone() is None
+
+    def counts(self):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT COALESCE(SUM(state = ?), 0), COALESCE(SUM(state = ?), 0), COALESCE(SUM(state = ?), 0) FROM queue",
+                (DONE, LEASED, PENDING)
+            ).fetchone()
+
+    def iter_results(self):
+        rows = self.conn.execute("SELECT url, data FROM queue WHERE state = ? AND data IS NOT NULL ORDER BY id", (DONE,))
+        for url, data in rows:
+            yield url, json.loads(data)
+
+    def close(self):
+        self.conn.close()
+
+class MemoryWorkQueue(WorkQueue):
+    """In-process work queue with the same semantics, for workers that are threads of one process."""
+
+    def __init__(self, max_attempts=3):
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.meta = {}
+
+    def get_meta(self, key):
+        return self.meta.get(key)
+
+    def set_meta(self, key, value):
+        with self.lock:
+            return self.meta.setdefault(key, value)
+
+    def _add(self, urls, depth):
+        for url in urls:
+            if url not in self.entries:
+                self.entries[url] = {"depth": depth, "state": PENDING, "worker": None, "lease_until": 0.0, "attempts": 0, "data": None}
+
+    def add_urls(self, urls, depth):
+        with self.lock:
+            self._add(urls, depth)
+
+    def claim(self, worker, count, lease):
+        with self.lock:
+            now = time.time()
+            expired, pending = [], []
+            for url, entry in self.entries.items():
+                if entry["state"] == LEASED and entry["lease_until"] < now:
+                    if entry["attempts"] >= self.max_attempts:
+                        entry.update(state=DONE, worker=None)
+                    else:
+                        expired.append(url)
+                elif entry["state"] == PENDING:
+                    pending.append(url)
+            by_depth = lambda urls: sorted(urls, key=lambda url: self.entries[url]["depth"])
+            claimed = (by_depth(expired) + by_depth(pending))[:count]
+            for url in claimed:
+                entry = self.entries[url]
+                entry.update(state=LEASED, worker=worker, lease_until=now + lease, attempts=entry["attempts"] + 1)
+            return [(url, self.entries[url]["depth"]) for url in claimed]
+
+    def complete(self, worker, pages):
+        recorded = 0
+        with self.lock:
+            for url, data, links, link_depth in pages:
+                entry = self.entries.get(url)
+                if entry is None or entry["state"] != LEASED or entry["worker"] != worker:
+                    continue
+                entry.update(state=DONE, worker=None, data=data)
+                recorded += 1
+                self._add(links or (), link_depth)
+        return recorded
+
+    def release(self, worker):
+        with self.lock:
+            for entry in self.entries.values():
+                if entry["state"] == LEASED and entry["worker"] == worker:
+                    entry.update(state=PENDING, worker=None, attempts=entry["attempts"] - 1)
+
+    def renew(self, worker, lease):
+        renewed = 0
+        with self.lock:
+            lease_until = time.time() + lease
+            for entry in self.entries.values():
+                if entry["state"] == LEASED and entry["worker"] == worker:
+                    entry["lease_until"] = lease_until
+                    renewed += 1
+        return renewed
+
+    def finished(self):
+        with self.lock:
+            return all(entry["state"] == DONE for entry in self.entries.values())
+
+    def counts(self):
+        with self.lock:
+            states = [entry["state"] for entry in self.entries.values()]
+        return states.count(DONE), states.count(LEASED), states.count(PENDING)
+
+    def iter_results(self):
+        with self.lock:
+            results = [(url, entry["data"]) for url, entry in self.entries.items() if entry["state"] == DONE and entry["data"] is not None]
+        yield from results
+
+def open_work_queue(kind="sqlite", path=None, journal="wal", max_attempts=3):
+    """Open a work queue: "sqlite" (the file at path, shared by processes) or "memory" (one process)."""
+    if kind == "sqlite":
+        return SqliteWorkQueue(path, journal, max_attempts)
+    if kind == "memory":
+        return MemoryWorkQueue(max_attempts)
+    raise ValueError(f"Unknown work queue: {kind}")
@@ -0,0 +1,57 @@
+import http.server
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+class SlowBodyHandler(http.server.BaseHTTPRequestHandler):
+    """Sends headers at once, then the body in slow chunks, counting requests per path and downloads in progress."""
+    protocol_version = "HTTP/1.1"
+    state = None
+
+    def do_GET(self):
+        with self.state["lock"]:
+            self.state["requests"][self.path] += 1
+            self.state["active"] += 1
+            self.state["peak"] = max(self.state["peak"], self.state["active"])
+        try:
+            chunk = b"<p>" + b"x" * 1000 + b"</p>"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(chunk) * 4))
+            self.end_headers()
+            for _ in range(4):
+                self.wfile.write(chunk)
+                self.wfile.flush()
+                time.sleep(0.05)
+        finally:
+            with self.state["lock"]:
+                self.state["active"] -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def slow_site():
+    state = {"lock": threading.Lock(), "active": 0, "peak": 0, "requests": Counter()}
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), type("Handler", (SlowBodyHandler,), {"state": state}))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}", state
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def run_main(tmp_path):
+    """Run main.py with the given arguments in tmp_path and return the CompletedProcess."""
+    def run_main(*args, timeout=60):
+        return subprocess.run([sys.executable, os.path.join(ROOT, "main.py"), *args], cwd=tmp_path,
+                              capture_output=True, text=True, timeout=timeout)
+    return run_main
@@ -0,0 +1,46 @@
+import threading
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from scraper.async_engine import scrape_async
+from scraper.metrics import configure_metrics
+from scraper.politeness import HostScheduler
+
+class ThreadRecordingArchive:
+    """Stands in for a PageArchive, recording the thread each write ran on."""
+
+    def __init__(self):
+        self.threads = []
+
+    def write(self, url, status, reason, headers, body):
+        self.threads.append(threading.get_ident())
+
+@pytest.fixture
+def metrics():
+    yield configure_metrics(per_url=False)
+    configure_metrics(enabled=False)
+
+def test_max_per_host_limits_downloads(slow_site):
+    base_url, state = slow_site
+    scheduler = HostScheduler(max_per_host=1, respect_crawl_delay=False)
+    results = scrape_async([f"{base_url}/{n}" for n in range(4)], max_in_flight=4, extract_workers=1,
+                           fields=("links",), host_scheduler=scheduler)
+    assert len(results) == 4 and not any("error" in data for data in results.values())
+    assert state["peak"] == 1
+
+def test_archive_writes_leave_the_event_loop(slow_site):
+    base_url, _ = slow_site
+    archive = ThreadRecordingArchive()
+    scrape_async([f"{base_url}/{n}" for n in range(2)], extract_workers=1, fields=("links",), archive=archive)
+    assert len(archive.threads) == 2
+    assert threading.get_ident() not in archive.threads
+
+def test_fetches_are_recorded_in_metrics(slow_site, metrics):
+    base_url, _ = slow_site
+    scrape_async([f"{base_url}/{n}" for n in range(3)], extract_workers=1, fields=("links",))
+    data = metrics.to_dict()
+    assert data["status_codes"] == {"200": 3}
+    assert data["stages"]["fetch_html"]["count"] == 3
+    assert data["bytes"] > 0
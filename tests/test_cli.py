@@ -0,0 +1,4 @@
+def test_urls_without_a_parallel_mode_is_rejected(run_main):
+    result = run_main("--urls", "http://127.0.0.1:9/a", "http://127.0.0.1:9/b", "--output", "file")
+    assert result.returncode == 2
+    assert "--urls needs --parallel" in result.stderr
@@ -0,0 +1,23 @@
+from main import crawl_order
+
+ROOT = "https://example.com/"
+
+PAGES = {
+    ROOT: {"links": ["/a", "/b", "https://other.org/x"]},
+    "https://example.com/a": {"links": ["/c"]},
+    "https://example.com/b": {"links": []},
+    "https://example.com/c": {"links": []},
+    "https://example.com/orphan": {"links": []},
+}
+
+def test_unreachable_pages_are_left_out():
+    assert crawl_order(ROOT, PAGES, max_depth=3) == [
+        ROOT, "https://example.com/a", "https://example.com/b", "https://example.com/c"
+    ]
+
+def test_depth_and_page_limits_apply():
+    assert crawl_order(ROOT, PAGES, max_depth=2) == [ROOT, "https://example.com/a", "https://example.com/b"]
+    assert crawl_order(ROOT, PAGES, max_depth=3, max_pages_per_depth=1) == [
+        ROOT, "https://example.com/a", "https://example.com/c"
+    ]
+    assert crawl_order(ROOT, PAGES, max_depth=3, max_pages_per_host=2) == [ROOT, "https://example.com/a"]
@@ -0,0 +1,28 @@
+import json
+
+from scraper.workqueue import open_work_queue
+
+def test_workers_fetch_every_url_exactly_once(slow_site, run_main, tmp_path):
+    base_url, state = slow_site
+    urls = [f"{base_url}/page/{n}" for n in range(24)]
+    queue = str(tmp_path / "queue.sqlite")
+    # Each batch takes longer than the lease, so it only stays with its worker because the lease is renewed.
+    result = run_main(
+        "--urls", *urls, "--work-queue", queue, "--workers", "3", "--max-workers", "2", "--batch-size", "4",
+        "--lease", "0.3", "--ignore-crawl-delay", "--fields", "links",
+        "--output", "file", "--format", "json", "--filename", "out.json",
+        timeout=120
+    )
+    assert result.returncode == 0, result.stderr
+
+    with open(tmp_path / "out.json", encoding="utf-8") as f:
+        assert sorted(json.load(f)) == sorted(urls)
+    pages = {path: count for path, count in state["requests"].items() if path.startswith("/page/")}
+    assert pages == {f"/page/{n}": 1 for n in range(24)}
+
+    work_queue = open_work_queue("sqlite", queue)
+    try:
+        assert work_queue.counts() == (24, 0, 0)
+        assert len(list(work_queue.iter_results())) == 24
+    finally:
+        work_queue.close()
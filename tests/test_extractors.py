@@ -0,0 +1,22 @@
+import pytest
+
+from scraper.extractors import _typed_column, extract_tables
+
+@pytest.mark.parametrize("values, expected", [
+    (["02134", "10001"], ["02134", "10001"]),
+    (["007", "42"], ["007", "42"]),
+    (["+44", "12"], ["+44", "12"]),
+    (["00.5", "1.5"], ["00.5", "1.5"]),
+    (["0", "12", ""], [0, 12, None]),
+    (["0.5", "-0.25", "1,234.5"], [0.5, -0.25, 1234.5]),
+    (["-3", "1,000"], [-3, 1000]),
+    (["12", "n/a"], ["12", "n/a"]),
+])
+def test_typed_column(values, expected):
+    assert _typed_column(values) == expected
+
+def test_table_keeps_zip_codes():
+    html = "<table><tr><th>zip</th><th>count</th></tr><tr><td>02134</td><td>3</td></tr><tr><td>10001</td><td>05</td></tr></table>"
+    table = extract_tables(html)[0]
+    assert table["header"] == ["zip", "count"]
+    assert table["columns"] == [["02134", "10001"], ["3", "05"]]
@@ -0,0 +1,27 @@
+import pytest
+
+from scraper.filters import DataFilter, parse_rule
+
+@pytest.mark.parametrize("rule, expected", [
+    ("emails:@example\\.com$", ("emails", "@example\\.com$")),
+    (" social : github", ("social", " github")),
+    ("*:noreply", ("*", "noreply")),
+    (":noreply", ("*", "noreply")),
+    ("noreply", ("*", "noreply")),
+    ("https://ads.example.com", ("*", "https://ads.example.com")),
+    ("links:https://ads.example.com", ("links", "https://ads.example.com")),
+    ("^https?://cdn", ("*", "^https?://cdn")),
+    ("*:tel:+1202", ("*", "tel:+1202")),
+])
+def test_parse_rule(rule, expected):
+    assert parse_rule(rule) == expected
+
+@pytest.mark.parametrize("rule", ["linkz:ok", "tel:+1202"])
+def test_parse_rule_rejects_unknown_fields(rule):
+    with pytest.raises(ValueError):
+        parse_rule(rule)
+
+def test_exclude_url_rule_applies_to_every_field():
+    page = {"links": ["https://ads.example.com/x", "https://example.com/"], "images": ["https://ads.example.com/a.png"]}
+    data = DataFilter(exclude=["https://ads.example.com"]).apply(page)
+    assert data == {"links": ["https://example.com/"]}
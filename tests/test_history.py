@@ -0,0 +1,10 @@
+import json
+
+from scraper.history import open_history
+
+def test_jsonl_history_skips_lines_that_are_not_records(tmp_path):
+    path = tmp_path / "history.jsonl"
+    path.write_text(json.dumps([{"url": "https://example.com"}]) + "\n" + "42\n", encoding="utf-8")
+    history = open_history(str(path), "jsonl")
+    assert history.append({"timestamp": "2024-01-01 00:00:00", "url": "https://example.com", "title": "A"}) == ["title"]
+    assert history.snapshot_at("https://example.com")["title"] == "A"
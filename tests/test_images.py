@@ -0,0 +1,17 @@
+from scraper.images import ImageDownloader
+
+def test_finished_downloads_are_not_kept_or_repeated(slow_site, tmp_path):
+    base_url, state = slow_site
+    downloader = ImageDownloader(str(tmp_path / "images"), content_types=("text/",))
+    try:
+        saved = downloader.download(["/a.png", "/b.png"], base_url + "/page")
+        assert all(saved.values())
+        # The pages are not images, so with the default types every download is skipped.
+        downloader.content_types = ("image/",)
+        assert downloader.download(["/c.png"], base_url) == {base_url + "/c.png": None}
+        again = downloader.download(["/a.png", "/b.png", "/c.png"], base_url)
+    finally:
+        downloader.close()
+    assert again == {**saved, base_url + "/c.png": None}
+    assert downloader.futures == {}
+    assert state["requests"] == {"/a.png": 1, "/b.png": 1, "/c.png": 1}
@@ -0,0 +1,17 @@
+import pstats
+from concurrent.futures import ThreadPoolExecutor
+
+from scraper.metrics import run_profiled
+
+def work_in_thread(n):
+    return sum(i * i for i in range(n))
+
+def crawl():
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        return list(executor.map(work_in_thread, [1000, 2000, 3000]))
+
+def test_run_profiled_includes_worker_threads(tmp_path):
+    filename = str(tmp_path / "crawl.prof")
+    assert run_profiled(filename, crawl) == [work_in_thread(n) for n in (1000, 2000, 3000)]
+    calls = {function: stat[1] for (_, _, function), stat in pstats.Stats(filename).stats.items()}
+    assert calls["work_in_thread"] == 3
@@ -0,0 +1,25 @@
+import pytest
+
+from scraper import extractors
+from scraper.extractors import available_parsers, get_parser, set_parser
+from scraper.parser_parity import check_parity
+
+@pytest.fixture(autouse=True)
+def default_parser(monkeypatch):
+    monkeypatch.setattr(extractors, "_parser", None)
+
+def test_html_parser_is_the_default():
+    assert get_parser() == "html.parser"
+    assert set_parser() == "html.parser"
+
+@pytest.mark.skipif("lxml" not in available_parsers(), reason="lxml is not installed")
+def test_lxml_is_opt_in():
+    assert set_parser("lxml") == "lxml"
+
+def test_unknown_parser():
+    with pytest.raises(ValueError):
+        set_parser("auto")
+
+@pytest.mark.skipif(len(available_parsers()) < 2, reason="only html.parser is installed")
+def test_backends_agree_on_parity_corpus():
+    assert check_parity(available_parsers()) == []
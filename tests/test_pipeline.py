@@ -0,0 +1,20 @@
+import pytest
+
+from scraper.pipeline import scrape_pipeline
+from scraper.politeness import HostScheduler
+from scraper.scraper import configure_fetcher
+
+@pytest.fixture
+def fetcher_with():
+    # The shared fetcher is put back to the default one afterwards.
+    yield configure_fetcher
+    configure_fetcher()
+
+def test_max_per_host_limits_downloads(slow_site, fetcher_with):
+    base_url, state = slow_site
+    scheduler = HostScheduler(max_per_host=1, respect_crawl_delay=False)
+    fetcher_with(max_workers=4, host_scheduler=scheduler)
+    results = scrape_pipeline([f"{base_url}/{n}" for n in range(4)], fetch_workers=4, extract_workers=1,
+                              fields=("links",), host_scheduler=scheduler)
+    assert len(results) == 4 and not any("error" in data for data in results.values())
+    assert state["peak"] == 1
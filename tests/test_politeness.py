@@ -0,0 +1,25 @@
+import pytest
+
+from scraper.politeness import HostScheduler
+from scraper.scraper import configure_fetcher
+
+@pytest.fixture
+def fetcher_with():
+    # The shared fetcher is put back to the default one afterwards.
+    yield configure_fetcher
+    configure_fetcher()
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_max_per_host_limits_body_downloads(slow_site, fetcher_with, streaming):
+    base_url, state = slow_site
+    scheduler = HostScheduler(max_per_host=1, respect_crawl_delay=False)
+    fetcher = fetcher_with(max_workers=4, host_scheduler=scheduler)
+
+    def fetch(url):
+        if streaming:
+            return "".join(fetcher.fetch_html_chunks(url))
+        return fetcher.fetch_html(url)
+
+    pages = [future.result() for _, future in scheduler.map(fetch, [f"{base_url}/{n}" for n in range(4)], max_workers=4)]
+    assert all(page and page.startswith("<p>") for page in pages)
+    assert state["peak"] == 1
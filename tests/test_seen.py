@@ -0,0 +1,36 @@
+import main
+from scraper.seen import SqliteSeen, UniqueValues
+
+ROOT = "https://example.com/"
+
+def fake_page(url, country="US", fields=None):
+    """Page n of a small site: links to pages 2n+1 and 2n+2 (below 7) and back to the root."""
+    n = 0 if url == ROOT else int(url.rsplit("/", 1)[1])
+    children = [f"{ROOT}page/{child}" for child in (2 * n + 1, 2 * n + 2) if child < 7]
+    return {"links": children + [ROOT], "emails": [f"team{n}@example.com", "info@example.com"]}
+
+def test_scrape_recursive_with_sqlite_seen_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "scrape_page", fake_page)
+    result = main.scrape_recursive(ROOT, max_depth=3, seen_store="sqlite", seen_path=str(tmp_path / "seen.sqlite"))
+    assert result["emails"] == ["team0@example.com", "info@example.com"] + [f"team{n}@example.com" for n in range(1, 7)]
+
+def test_sqlite_stores_share_a_file(tmp_path):
+    path = str(tmp_path / "seen.sqlite")
+    first = SqliteSeen(path, "first")
+    # Uncommitted adds in one store must not lock out a store opened later on the same file.
+    assert first.add("a")
+    second = SqliteSeen(path, "second")
+    assert second.add("a") and second.add("b")
+    assert not first.add("a") and "b" not in first
+    first.close()
+    assert "b" in second
+    second.close()
+
+def test_unique_values_are_exact_and_counted():
+    values = UniqueValues()
+    empty = values.memory_bytes()
+    values.update(["b", "a", "b"])
+    values.update(["c", "a"])
+    assert list(values) == ["b", "a", "c"]
+    assert len(values) == 3
+    assert values.memory_bytes() > empty
@@ -0,0 +1,19 @@
+from scraper.store import ResultStore, store_results
+
+def test_single_page_with_a_subset_of_fields(tmp_path):
+    filename = str(tmp_path / "results.sqlite")
+    store_results(filename, {"phones": ["+12025550143", "+12025550100"]}, url="https://example.com/")
+    store = ResultStore(filename)
+    try:
+        assert sorted(store.query("phones")) == [("https://example.com/", "+12025550100"), ("https://example.com/", "+12025550143")]
+    finally:
+        store.close()
+
+def test_url_mapping(tmp_path):
+    filename = str(tmp_path / "results.sqlite")
+    store_results(filename, {"https://a/": {"emails": ["x@a.org"]}, "https://b/": {"emails": ["y@b.org"]}})
+    store = ResultStore(filename)
+    try:
+        assert sorted(store.query("emails")) == [("https://a/", "x@a.org"), ("https://b/", "y@b.org")]
+    finally:
+        store.close()
@@ -0,0 +1,89 @@
+import pytest
+
+from scraper import workqueue
+from scraper.workqueue import open_work_queue
+
+class Clock:
+    """Stands in for the time module so leases expire without sleeping."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(workqueue, "time", clock)
+    return clock
+
+@pytest.fixture(params=["sqlite", "memory"])
+def open_queue(request, tmp_path):
+    queues = []
+
+    def open_kind(max_attempts=3):
+        queues.append(open_work_queue(request.param, str(tmp_path / "queue.sqlite"), max_attempts=max_attempts))
+        return queues[-1]
+    yield open_kind
+    for queue in queues:
+        queue.close()
+
+def test_claim_leases_each_url_once(open_queue, clock):
+    queue = open_queue()
+    queue.add_urls(["https://a/1", "https://a/2", "https://a/1"], 1)
+    assert queue.claim("w1", 5, 60) == [("https://a/1", 1), ("https://a/2", 1)]
+    assert queue.claim("w2", 5, 60) == []
+    assert queue.counts() == (0, 2, 0)
+
+def test_expired_lease_is_claimed_again(open_queue, clock):
+    queue = open_queue()
+    queue.add_urls(["https://a/1"], 1)
+    queue.claim("w1", 1, 60)
+    clock.now += 30
+    assert queue.claim("w2", 1, 60) == []
+    clock.now += 31
+    assert queue.claim("w2", 1, 60) == [("https://a/1", 1)]
+
+def test_complete_is_skipped_after_losing_the_lease(open_queue, clock):
+    queue = open_queue()
+    queue.add_urls(["https://a/1"], 1)
+    queue.claim("w1", 1, 60)
+    clock.now += 61
+    queue.claim("w2", 1, 60)
+    assert queue.complete("w1", [("https://a/1", {"by": "w1"}, ["https://a/stale"], 2)]) == 0
+    assert queue.complete("w2", [("https://a/1", {"by": "w2"}, ["https://a/2"], 2)]) == 1
+    assert list(queue.iter_results()) == [("https://a/1", {"by": "w2"})]
+    assert queue.claim("w3", 5, 60) == [("https://a/2", 2)]
+
+def test_release_returns_urls_without_using_an_attempt(open_queue, clock):
+    queue = open_queue(max_attempts=1)
+    queue.add_urls(["https://a/1", "https://a/2"], 1)
+    queue.claim("w1", 2, 60)
+    queue.release("w1")
+    assert queue.counts() == (0, 0, 2)
+    assert queue.claim("w2", 2, 60) == [("https://a/1", 1), ("https://a/2", 1)]
+    assert queue.complete("w2", [("https://a/1", {"ok": True}, [], 2), ("https://a/2", None, [], 2)]) == 2
+    assert queue.finished()
+
+def test_exhausted_url_is_done_without_data(open_queue, clock):
+    queue = open_queue(max_attempts=2)
+    queue.add_urls(["https://a/1"], 1)
+    for worker in ("w1", "w2"):
+        assert queue.claim(worker, 1, 60) == [("https://a/1", 1)]
+        clock.now += 61
+    assert queue.claim("w3", 1, 60) == []
+    assert queue.finished()
+    assert queue.counts() == (1, 0, 0)
+    assert list(queue.iter_results()) == []
+
+def test_renewed_lease_is_not_taken_over(open_queue, clock):
+    queue = open_queue()
+    queue.add_urls(["https://a/1", "https://a/2"], 1)
+    queue.claim("w1", 1, 60)
+    clock.now += 50
+    assert queue.renew("w1", 60) == 1
+    clock.now += 50
+    assert queue.claim("w2", 5, 60) == [("https://a/2", 1)]
+    assert queue.renew("w1", 60) == 1
+    assert queue.complete("w1", [("https://a/1", {}, [], 2)]) == 1